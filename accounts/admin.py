@@ -1,8 +1,119 @@
+import json
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
 from .forms import CustomUserCreationForm, CustomUserChangeForm
-from .models import CustomUser
+from .models import AccountDeletion, CustomUser
+
+KEYSET_VAR = "after"
+
+
+def estimate_count(queryset):
+    """
+    Return the PostgreSQL planner's estimate of the number of rows queryset
+    would return, or None on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Count with the planner's estimate instead of COUNT(*) once the estimate
+    is above exact_count_limit, where an exact count gets expensive.
+    """
+
+    exact_count_limit = 10000
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > self.exact_count_limit:
+            self.estimated = True
+            return estimate
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Page through the change list by seeking past the last row of the
+    previous page (?after=<value>) instead of using OFFSET, whenever the list
+    is ordered by a single unique field. result_list is then a list, so
+    list_editable, whose formset needs a queryset, keeps page numbers.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(KEYSET_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_count_estimated = self.paginator.estimated
+        self.keyset = False
+        field = self.get_keyset_field(request)
+        if field is None or self.show_all:
+            return
+        name = field.lstrip("-")
+        queryset = self.queryset
+        after = request.GET.get(KEYSET_VAR)
+        if after is not None:
+            model_field = (
+                self.lookup_opts.pk
+                if name == "pk"
+                else self.lookup_opts.get_field(name)
+            )
+            try:
+                after = model_field.to_python(after)
+            except ValidationError as e:
+                raise IncorrectLookupParameters(e)
+            lookup = "lt" if field.startswith("-") else "gt"
+            queryset = queryset.filter(**{f"{name}__{lookup}": after})
+        # One more row than a page says whether there is a next page.
+        rows = list(queryset[: self.list_per_page + 1])
+        self.keyset = True
+        self.result_list = rows[: self.list_per_page]
+        self.multi_page = after is not None or len(rows) > self.list_per_page
+        self.keyset_first_url = (
+            self.get_query_string(remove=[KEYSET_VAR])
+            if after is not None
+            else None
+        )
+        self.keyset_next_url = (
+            self.get_query_string(
+                {KEYSET_VAR: getattr(rows[self.list_per_page - 1], name)}
+            )
+            if len(rows) > self.list_per_page
+            else None
+        )
+
+    def get_keyset_field(self, request):
+        if self.list_editable:
+            return None
+        ordering = self.get_ordering(request, self.queryset.order_by())
+        if len(ordering) != 1 or not isinstance(ordering[0], str):
+            return None
+        name = ordering[0].lstrip("-")
+        if name == "pk" or self.lookup_opts.get_field(name).unique:
+            return ordering[0]
+        return None
 
 
 class CustomUserAdmin(UserAdmin):
@@ -17,10 +128,26 @@ class CustomUserAdmin(UserAdmin):
         "position",
         "is_staff",
     ]
+    # The searched columns have trigram indexes on PostgreSQL.
+    search_fields = UserAdmin.search_fields + ("position",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = UserAdmin.fieldsets + ((None, {"fields": ("position",)}),)
     add_fieldsets = UserAdmin.add_fieldsets + (
         (None, {"fields": ("position",)}),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ["user_id", "requested_at", "completed_at"]
+    readonly_fields = ["user_id", "requested_at", "progress", "completed_at"]
+
+    def has_add_permission(self, request):
+        return False
+
 
 admin.site.register(CustomUser, CustomUserAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
@@ -0,0 +1,182 @@
+"""
+JSON API for clients that sign in with tokens instead of a session cookie.
+
+    POST  api/login/    {"username", "password"} -> access and refresh token
+    POST  api/refresh/  {"refresh_token"} -> a new access and refresh token
+    POST  api/logout/   {"refresh_token"} -> 204, ending its family
+    GET   api/profile/  the user's details, with an ETag
+    PATCH api/profile/  change any of them, as CustomUserUpdateForm does
+
+The profile endpoints take "Authorization: Bearer <access token>". See
+accounts.tokens for how the tokens work.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import authenticate, user_logged_in
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .forms import CustomUserUpdateForm
+from .models import CustomUser
+from .tokens import (
+    InvalidToken,
+    issue_tokens,
+    refresh_tokens,
+    revoke_family,
+    verify_access_token,
+)
+
+
+def error(code, status, **extra):
+    return JsonResponse({"error": code, **extra}, status=status)
+
+
+def tokens_response(access, refresh):
+    return JsonResponse(
+        {
+            "token_type": "Bearer",
+            "access_token": access,
+            "expires_in": settings.API_ACCESS_TOKEN_SECONDS,
+            "refresh_token": refresh,
+        }
+    )
+
+
+def profile(user):
+    data = {"id": user.pk}
+    for name in CustomUserUpdateForm._meta.fields:
+        data[name] = getattr(user, name)
+    return data
+
+
+def profile_etag(data):
+    encoded = json.dumps(data, sort_keys=True).encode()
+    return f'"{hashlib.md5(encoded).hexdigest()}"'
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ApiView(View):
+    """
+    Parses a JSON object from the request body into self.data. CSRF checks
+    are left out, as the API reads no cookies.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.data = {}
+        if request.body:
+            try:
+                self.data = json.loads(request.body)
+            except ValueError:
+                self.data = None
+            if not isinstance(self.data, dict):
+                return error("invalid_request", 400)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_strings(self, *names):
+        """
+        Return the values of names in self.data, "" for those missing, or
+        None if any of them is not a string.
+        """
+        values = [self.data.get(name, "") for name in names]
+        if not all(isinstance(value, str) for value in values):
+            return None
+        return values
+
+
+class LoginApiView(ApiView):
+    def post(self, request):
+        values = self.get_strings("username", "password")
+        if values is None:
+            return error("invalid_request", 400)
+        username, password = values
+        user = authenticate(request, username=username, password=password)
+        if user is None:
+            return error("invalid_grant", 401)
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+        return tokens_response(*issue_tokens(user))
+
+
+class RefreshApiView(ApiView):
+    def post(self, request):
+        values = self.get_strings("refresh_token")
+        if values is None:
+            return error("invalid_request", 400)
+        try:
+            _, tokens = refresh_tokens(*values)
+        except InvalidToken:
+            return error("invalid_grant", 401)
+        return tokens_response(*tokens)
+
+
+class LogoutApiView(ApiView):
+    def post(self, request):
+        values = self.get_strings("refresh_token")
+        if values is None:
+            return error("invalid_request", 400)
+        try:
+            revoke_family(*values)
+        except InvalidToken:
+            return error("invalid_grant", 401)
+        return HttpResponse(status=204)
+
+
+class ProfileApiView(ApiView):
+    def dispatch(self, request, *args, **kwargs):
+        scheme, _, token = request.META.get(
+            "HTTP_AUTHORIZATION", ""
+        ).partition(" ")
+        try:
+            if scheme.lower() != "bearer":
+                raise InvalidToken
+            self.user_id = verify_access_token(token)
+        except InvalidToken:
+            response = error("invalid_token", 401)
+            response["WWW-Authenticate"] = 'Bearer error="invalid_token"'
+            return response
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_user(self):
+        return CustomUser._default_manager.filter(
+            pk=self.user_id, is_active=True
+        ).first()
+
+    def get(self, request):
+        user = self.get_user()
+        if user is None:
+            return error("invalid_token", 401)
+        data = profile(user)
+        response = JsonResponse(data)
+        response["ETag"] = profile_etag(data)
+        return response
+
+    def patch(self, request):
+        user = self.get_user()
+        if user is None:
+            return error("invalid_token", 401)
+        data = profile(user)
+        if_match = request.META.get("HTTP_IF_MATCH")
+        if if_match and profile_etag(data) not in parse_etags(if_match):
+            return error("precondition_failed", 412)
+        form = CustomUserUpdateForm(
+            {
+                name: self.data.get(name, data[name])
+                for name in CustomUserUpdateForm._meta.fields
+            },
+            instance=user,
+        )
+        if not form.is_valid():
+            return error("invalid", 400, fields=form.errors.get_json_data())
+        form.save()
+        if form.errors:
+            # Changed by another request between validation and saving.
+            return error("conflict", 409)
+        data = profile(user)
+        response = JsonResponse(data)
+        response["ETag"] = profile_etag(data)
+        return response
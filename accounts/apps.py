@@ -1,5 +1,21 @@
 from django.apps import AppConfig
+from django.contrib.auth.signals import user_logged_in
+from django.core import checks
+from django.core.signals import request_finished, request_started
 
 
 class AccountsConfig(AppConfig):
     name = "accounts"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db import check_reused_connections, mark_connections_idle
+        from .sessions import check_shared_cache
+
+        # accounts.signals.update_last_login takes over from Django's.
+        user_logged_in.disconnect(dispatch_uid="update_last_login")
+
+        request_started.connect(check_reused_connections)
+        request_finished.connect(mark_connections_idle)
+
+        checks.register(check_shared_cache, checks.Tags.caches)
@@ -0,0 +1,41 @@
+"""
+Third-party assets used by base.html.
+
+Each asset is loaded from jsDelivr unless SELF_HOSTED_STATIC is set, in
+which case it is served from STATIC_ROOT after being fetched into
+accounts/static by the vendor_static command. The integrity hashes are the
+ones jsDelivr publishes, so the vendored copies are checked against them.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.templatetags.static import static
+
+
+Asset = namedtuple("Asset", ["url", "integrity"])
+
+VENDOR_DIR = "vendor/bootstrap-5.0.0-beta1"
+
+ASSETS = {
+    "bootstrap.min.css": Asset(
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta1/dist/css/"
+        "bootstrap.min.css",
+        "sha384-giJF6kkoqNQ00vy+HMDP7azOuL0xtbfIcaT9wjKHr8RbDVddVHyTfAAsrekwKmP1",
+    ),
+    "bootstrap.bundle.min.js": Asset(
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta1/dist/js/"
+        "bootstrap.bundle.min.js",
+        "sha384-ygbV9kiqUc6oa4msXn9868pTtWMgiQaeYH7/t7LECLbyPA2x65Kgf80OJFdroafW",
+    ),
+}
+
+
+def static_name(name):
+    return f"{VENDOR_DIR}/{name}"
+
+
+def asset_url(name):
+    if settings.SELF_HOSTED_STATIC:
+        return static(static_name(name))
+    return ASSETS[name].url
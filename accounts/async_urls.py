@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import async_views
+
+
+urlpatterns = [
+    path("login/", async_views.sign_in, name="login"),
+    path("logout/", async_views.sign_out, name="logout"),
+    path("register/", async_views.register, name="register"),
+    path("<int:pk>/update/", async_views.user_update, name="user_update"),
+    path("export/", async_views.personal_data_export, name="user_export"),
+]
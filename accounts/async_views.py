@@ -0,0 +1,128 @@
+"""
+Async versions of the sign-in, sign-out, register, user update and personal
+data export views, used when the app is served through config/asgi.py.
+
+Django 3.1 only supports async function-based views, and its ORM is
+synchronous, so each view makes at most one thread hop per request and does
+all of its database and password hashing work inside it. Rendering an empty
+form needs no database access and stays on the event loop.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import login, logout
+from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render, resolve_url
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from .export import stream_csv, stream_json
+from .models import CustomUser
+from .forms import CustomUserCreationForm, CustomUserUpdateForm
+
+
+async def sign_in(request):
+    if request.method == "POST":
+        form = await sync_to_async(_sign_in)(request)
+        if form.is_valid():
+            return HttpResponseRedirect(_get_login_redirect_url(request))
+    else:
+        form = AuthenticationForm(request)
+    response = render(request, "registration/login.html", {"form": form})
+    add_never_cache_headers(response)
+    return response
+
+
+def _sign_in(request):
+    form = AuthenticationForm(request, data=request.POST)
+    if form.is_valid():
+        login(request, form.get_user())
+    return form
+
+
+def _get_login_redirect_url(request):
+    redirect_to = request.POST.get("next", request.GET.get("next", ""))
+    if url_has_allowed_host_and_scheme(
+        redirect_to,
+        allowed_hosts={request.get_host()},
+        require_https=request.is_secure(),
+    ):
+        return redirect_to
+    return resolve_url(settings.LOGIN_REDIRECT_URL)
+
+
+async def sign_out(request):
+    await sync_to_async(logout)(request)
+    return HttpResponseRedirect(resolve_url(settings.LOGOUT_REDIRECT_URL))
+
+
+async def register(request):
+    if request.method == "POST":
+        form = await sync_to_async(_register)(request)
+        if form.is_valid():
+            return HttpResponseRedirect(reverse("login"))
+    else:
+        form = CustomUserCreationForm()
+    return render(request, "registration/register.html", {"form": form})
+
+
+def _register(request):
+    form = CustomUserCreationForm(request.POST)
+    if form.is_valid():
+        form.save()
+    return form
+
+
+async def user_update(request, pk):
+    if request.method == "POST":
+        form = await sync_to_async(_user_update)(request, pk)
+        if form.is_valid():
+            return HttpResponseRedirect(reverse("home"))
+    else:
+        user = await sync_to_async(get_object_or_404)(CustomUser, pk=pk)
+        form = CustomUserUpdateForm(instance=user)
+    return render(
+        request,
+        "registration/user_update_form.html",
+        {"form": form, "object": form.instance},
+    )
+
+
+def _user_update(request, pk):
+    user = get_object_or_404(CustomUser, pk=pk)
+    form = CustomUserUpdateForm(request.POST, instance=user)
+    if form.is_valid():
+        form.save()
+    return form
+
+
+async def personal_data_export(request):
+    # Django 3.1's ASGI handler iterates a StreamingHttpResponse on the
+    # event loop, where the export's queries would fail part way through,
+    # so here the export is built in the thread hop and sent whole.
+    exported = await sync_to_async(_personal_data_export)(request)
+    if exported is None:
+        return redirect_to_login(request.get_full_path())
+    content, content_type, filename = exported
+    response = HttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _personal_data_export(request):
+    if not request.user.is_authenticated:
+        return None
+    if request.GET.get("format") == "csv":
+        return (
+            "".join(stream_csv(request.user)),
+            "text/csv",
+            "personal_data.csv",
+        )
+    return (
+        "".join(stream_json(request.user)),
+        "application/json",
+        "personal_data.json",
+    )
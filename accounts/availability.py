@@ -0,0 +1,224 @@
+"""
+Username and email availability checks for the registration page.
+
+A check is answered by the indexed UPPER() lookup that
+CaseInsensitiveUniqueMixin makes. With AVAILABILITY_FILTER_REFRESH_SECONDS
+above 0, each process first consults a Bloom filter of every username and
+email in use, and only queries the database when the filter says the value
+may be taken, which for an unused value happens about FALSE_POSITIVE_RATE
+of the time. The filter is built and updated in a background thread, and
+checks made before the first build is ready go to the database.
+
+A Bloom filter cannot forget a value, and only knows what it was given.
+Saves in this process add the new values at once. Users added by other
+processes, or by bulk imports, are fetched by pk at most every
+AVAILABILITY_FILTER_REFRESH_SECONDS. The filter is rebuilt every
+AVAILABILITY_FILTER_REBUILD_SECONDS, which also picks up renames made in
+other processes and drops values no longer in use. So an answer is only a
+hint: CustomUserCreationForm still checks when the form is posted.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("username", "email")
+
+FALSE_POSITIVE_RATE = 0.01
+
+MIN_CAPACITY = 1000
+
+CHUNK_SIZE = 5000
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings, sized to hold capacity items with
+    a false positive rate of error_rate. The bit positions of an item are
+    derived from one BLAKE2b digest by double hashing.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+def filter_key(field, value):
+    return f"{field}:{value.upper()}"
+
+
+class TakenFilter:
+    """
+    The Bloom filter of usernames and emails in use, kept up to date as
+    described above by one background thread at a time. Until the first
+    build is ready every value may be taken, so checks go to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._updating = False
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._bloom = None
+            self._max_pk = 0
+            self._built_at = self._refreshed_at = 0.0
+            self._added_while_building = None
+
+    def might_be_taken(self, field, value):
+        bloom = self._get_filter()
+        return bloom is None or filter_key(field, value) in bloom
+
+    def add_user(self, user):
+        with self._lock:
+            if self._bloom is not None:
+                self._add(user.pk, user.username, user.email)
+            if self._added_while_building is not None:
+                self._added_while_building.append(
+                    (user.pk, user.username, user.email)
+                )
+
+    def _add(self, pk, username, email):
+        self._bloom.add(filter_key("username", username))
+        if email:
+            self._bloom.add(filter_key("email", email))
+        self._max_pk = max(self._max_pk, pk)
+
+    def _needs_rebuild(self, now):
+        bloom = self._bloom
+        return (
+            bloom is None
+            or bloom.count > bloom.capacity
+            or now - self._built_at
+            >= settings.AVAILABILITY_FILTER_REBUILD_SECONDS
+        )
+
+    def _get_filter(self):
+        now = time.monotonic()
+        if (
+            self._needs_rebuild(now)
+            or now - self._refreshed_at
+            >= settings.AVAILABILITY_FILTER_REFRESH_SECONDS
+        ):
+            self._start_update()
+        return self._bloom
+
+    def _start_update(self):
+        with self._lock:
+            if self._updating:
+                return
+            self._updating = True
+        threading.Thread(
+            target=self._run_update, name="taken-filter", daemon=True
+        ).start()
+
+    def _run_update(self):
+        try:
+            self.update()
+        except Exception:
+            logger.exception("Failed to update the availability filter")
+        finally:
+            with self._lock:
+                self._updating = False
+            connections.close_all()
+
+    def update(self):
+        """
+        Rebuild the filter if it is due, else fetch the users added since.
+        """
+        now = time.monotonic()
+        with self._lock:
+            rebuild = self._needs_rebuild(now)
+            if rebuild:
+                self._added_while_building = []
+            max_pk = self._max_pk
+        if rebuild:
+            self._rebuild(now)
+        else:
+            self._refresh(max_pk, now)
+
+    def _rebuild(self, now):
+        try:
+            users = CustomUser._default_manager.order_by()
+            capacity = max(4 * users.count(), MIN_CAPACITY)
+            bloom = BloomFilter(capacity, FALSE_POSITIVE_RATE)
+            max_pk = 0
+            rows = users.values_list("pk", "username", "email")
+            for pk, username, email in rows.iterator(chunk_size=CHUNK_SIZE):
+                bloom.add(filter_key("username", username))
+                if email:
+                    bloom.add(filter_key("email", email))
+                max_pk = max(max_pk, pk)
+            with self._lock:
+                added = self._added_while_building
+                if added is None:
+                    # Cleared while building.
+                    return
+                self._bloom = bloom
+                self._max_pk = max_pk
+                # Saves made while building may have been read before them.
+                for row in added:
+                    self._add(*row)
+                self._built_at = self._refreshed_at = now
+        finally:
+            with self._lock:
+                self._added_while_building = None
+
+    def _refresh(self, max_pk, now):
+        rows = list(
+            CustomUser._default_manager.filter(pk__gt=max_pk).values_list(
+                "pk", "username", "email"
+            )
+        )
+        with self._lock:
+            if self._bloom is None:
+                return
+            for row in rows:
+                self._add(*row)
+            self._refreshed_at = now
+
+
+taken_filter = TakenFilter()
+
+
+def is_available(field, value):
+    if (
+        settings.AVAILABILITY_FILTER_REFRESH_SECONDS > 0
+        and not taken_filter.might_be_taken(field, value)
+    ):
+        return True
+    return not CustomUser._default_manager.filter(
+        **{f"{field}__iexact": value}
+    ).exists()
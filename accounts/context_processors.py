@@ -0,0 +1,17 @@
+from .last_login import writer
+
+
+def last_login(request):
+    """
+    Add the signed-in user's last_login, including a sign-in time that is
+    still waiting to be written to the database.
+    """
+
+    def get_last_login():
+        user = request.user
+        if not user.is_authenticated:
+            return None
+        return writer.get_pending(user.pk) or user.last_login
+
+    # Templates call callables, so the user is only loaded when used.
+    return {"last_login": get_last_login}
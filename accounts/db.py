@@ -0,0 +1,171 @@
+"""
+Database connection reuse.
+
+With CONN_MAX_AGE above 0 Django keeps each thread's connection open between
+requests, but only notices that the server has dropped it when a query
+fails. check_reused_connections() runs at the start of each request and
+replaces any reused connection that has been idle for at least
+DB_HEALTH_CHECK_IDLE seconds and no longer answers.
+
+ConnectionPool shares up to DB_POOL_SIZE connections between all the threads
+of a process; the accounts.postgresql_pool database backend borrows from it
+when Django connects and returns the connection when Django closes it, so
+connections outlive requests even where each request may run on a different
+thread, as under ASGI.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.db import connections
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A pool of at most size database connections. acquire() waits up to
+    timeout seconds for a free connection, and connections that have been
+    idle for at least health_check_idle seconds are checked with is_usable
+    before they are handed out.
+    """
+
+    def __init__(
+        self,
+        connect,
+        size,
+        timeout,
+        health_check_idle,
+        is_usable,
+        reset,
+        close,
+    ):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self._is_usable = is_usable
+        self._reset = reset
+        self._close = close
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.retired = False
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f"No database connection free after {self.timeout} seconds."
+            )
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, idle_since = self._idle.pop()
+                idle = time.monotonic() - idle_since
+                if idle < self.health_check_idle or self._is_usable(
+                    connection
+                ):
+                    return connection
+                self._discard(connection)
+            return self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        try:
+            if not discard:
+                try:
+                    self._reset(connection)
+                except Exception:
+                    discard = True
+            if discard or self.retired:
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _discard(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def retire(self):
+        """
+        Close the idle connections, and those in use as they are released.
+        """
+        self.retired = True
+        self.close_idle()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, make_pool):
+    """
+    Return this process's pool for alias, made by make_pool(conn_params).
+    Pools are keyed by process, as connections must not be shared across a
+    fork. A pool is retired and replaced once the alias's connection
+    parameters change, e.g. when the test runner points NAME at the test
+    database.
+    """
+    key = (os.getpid(), alias)
+    digest = hashlib.sha256(
+        repr(sorted(conn_params.items())).encode()
+    ).hexdigest()
+    current = _pools.get(key)
+    if current is not None and current[0] == digest:
+        return current[1]
+    with _pools_lock:
+        current = _pools.get(key)
+        if current is not None:
+            if current[0] == digest:
+                return current[1]
+            current[1].retire()
+        pool = make_pool(conn_params)
+        _pools[key] = (digest, pool)
+        return pool
+
+
+_idle_since = weakref.WeakKeyDictionary()
+
+
+def mark_connections_idle(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            _idle_since[connection] = now
+
+
+def check_reused_connections(**kwargs):
+    """
+    Close reused connections that the server has dropped, so that the
+    request opens a new one instead of failing.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        idle_since = _idle_since.get(connection, now)
+        if now - idle_since < settings.DB_HEALTH_CHECK_IDLE:
+            continue
+        if not connection.is_usable():
+            connection.close()
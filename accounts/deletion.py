@@ -0,0 +1,142 @@
+"""
+Account deletion.
+
+Deleting a CustomUser cascades through every table that refers to it in a
+single transaction, which for a user with a long history can hold locks
+for seconds. So the request only calls request_deletion(), which
+deactivates the user and makes their password unusable, ending their
+sessions and API tokens at once, and records an AccountDeletion.
+
+The purge_deleted_accounts management command then purges the rest with
+purge_next_batch(), at most batch_size rows per transaction. Each batch
+records its progress on the AccountDeletion in the same transaction, so an
+interrupted purge resumes where it stopped. The steps are:
+
+* the user's sessions stored in the database, found by the key hashes on
+  their login events, deleted through the session engine so cached copies
+  go too;
+* the rows of each table with a foreign key to CustomUser, deleted or set
+  to NULL as its on_delete says. They are found the way Django's deletion
+  collector finds them, so tables added later are included;
+* the CustomUser row itself.
+"""
+
+import functools
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.functions import SHA256
+from django.utils import timezone
+
+from .models import AccountDeletion, CustomUser, LoginEvent
+
+
+SESSIONS = "sessions"
+
+
+def request_deletion(user):
+    with transaction.atomic():
+        user.is_active = False
+        user.set_unusable_password()
+        user.save(update_fields=["is_active", "password"])
+        AccountDeletion.objects.get_or_create(user_id=user.pk)
+
+
+def purge_sessions(user_id, state, batch_size):
+    # Login events are only deleted by a later step, so walk them by pk.
+    events = LoginEvent.objects.filter(user_id=user_id).exclude(
+        session_key_hash=""
+    )
+    if "after" in state:
+        events = events.filter(pk__gt=state["after"])
+    batch = list(
+        events.order_by("pk").values_list("pk", "session_key_hash")[
+            :batch_size
+        ]
+    )
+    session_keys = (
+        Session.objects.filter(expire_date__gt=timezone.now())
+        .annotate(key_hash=SHA256("session_key"))
+        .filter(key_hash__in=[key_hash for _, key_hash in batch])
+        .values_list("session_key", flat=True)
+    )
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    for session_key in session_keys:
+        store(session_key).delete()
+    if batch:
+        state["after"] = batch[-1][0]
+    return len(batch)
+
+
+def purge_related(related, user_id, state, batch_size):
+    manager = related.related_model._base_manager
+    name = related.field.name
+    pks = list(
+        manager.filter(**{name: user_id})
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    rows = manager.filter(pk__in=pks)
+    if related.on_delete is models.SET_NULL:
+        rows.update(**{name: None})
+    else:
+        rows.delete()
+    return len(pks)
+
+
+def purge_user(user_id, state, batch_size):
+    # Only empty tables are left to cascade through.
+    _, counts = CustomUser._base_manager.filter(pk=user_id).delete()
+    return counts.get(CustomUser._meta.label, 0)
+
+
+def get_steps():
+    """
+    Return the purge steps in order, as (label, function) pairs. Each
+    function purges up to batch_size rows for a user and returns how many
+    it purged, keeping anything it needs to resume in state.
+    """
+    steps = [(SESSIONS, purge_sessions)]
+    for related in get_candidate_relations_to_delete(CustomUser._meta):
+        if related.on_delete not in (models.CASCADE, models.SET_NULL):
+            # PROTECT and the like are left to the final delete.
+            continue
+        label = f"{related.related_model._meta.label}.{related.field.name}"
+        steps.append((label, functools.partial(purge_related, related)))
+    steps.append((CustomUser._meta.label, purge_user))
+    return steps
+
+
+def purge_next_batch(batch_size):
+    """
+    Purge the next batch of the oldest incomplete deletion that no other
+    worker is purging, and return it, or None if there is none.
+    """
+    with transaction.atomic():
+        deletion = (
+            AccountDeletion.objects.select_for_update(skip_locked=True)
+            .filter(completed_at=None)
+            .order_by("requested_at")
+            .first()
+        )
+        if deletion is None:
+            return None
+        steps = get_steps()
+        for label, purge in steps:
+            state = deletion.progress.setdefault(
+                label, {"rows": 0, "done": False}
+            )
+            if not state["done"]:
+                count = purge(deletion.user_id, state, batch_size)
+                state["rows"] += count
+                state["done"] = count < batch_size
+                break
+        if all(
+            deletion.progress.get(label, {}).get("done") for label, _ in steps
+        ):
+            deletion.completed_at = timezone.now()
+        deletion.save(update_fields=["progress", "completed_at"])
+    return deletion
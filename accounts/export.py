@@ -0,0 +1,157 @@
+"""
+Personal data export.
+
+The export is produced as a stream of chunks so that memory use stays flat
+however many login events a user has. Login events are read with
+QuerySet.iterator(), which uses a server-side cursor on PostgreSQL.
+"""
+
+import csv
+import datetime
+
+from django.contrib.sessions.models import Session
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import SHA256
+from django.utils import timezone
+
+from .models import LoginEvent
+
+
+PROFILE_FIELDS = (
+    "username",
+    "first_name",
+    "last_name",
+    "position",
+    "email",
+    "date_joined",
+    "last_login",
+)
+
+CSV_HEADER = [
+    "record",
+    "field",
+    "value",
+    "ip_address",
+    "user_agent",
+    "expires",
+]
+
+CHUNK_SIZE = 2000
+
+
+def get_profile(user):
+    return {field: getattr(user, field) for field in PROFILE_FIELDS}
+
+
+def iter_logins(user):
+    events = (
+        LoginEvent.objects.filter(user=user)
+        .order_by("created_at")
+        .values_list("created_at", "ip_address", "user_agent")
+    )
+    for created_at, ip_address, user_agent in events.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield {
+            "time": created_at,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+        }
+
+
+def iter_sessions(user):
+    """
+    Yield the sign-in time and expiry of each of the user's sessions that is
+    still active, matched by the hashes of their keys on the login events.
+    Only active sessions are hashed, through the expire_date index.
+    """
+    events = (
+        LoginEvent.objects.filter(user=user)
+        .exclude(session_key_hash="")
+        .order_by("created_at")
+        .values_list("created_at", "session_key_hash")
+    )
+    batch = []
+    for event in events.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(event)
+        if len(batch) == CHUNK_SIZE:
+            yield from _active_sessions(batch)
+            batch = []
+    yield from _active_sessions(batch)
+
+
+def _active_sessions(batch):
+    if not batch:
+        return
+    expiry = dict(
+        Session.objects.filter(expire_date__gt=timezone.now())
+        .annotate(key_hash=SHA256("session_key"))
+        .filter(key_hash__in=[key_hash for _, key_hash in batch])
+        .values_list("key_hash", "expire_date")
+    )
+    for created_at, key_hash in batch:
+        if key_hash in expiry:
+            yield {"signed_in": created_at, "expires": expiry[key_hash]}
+
+
+def stream_json(user):
+    encoder = DjangoJSONEncoder()
+    yield '{"profile": %s' % encoder.encode(get_profile(user))
+    for name, rows in (
+        ("logins", iter_logins(user)),
+        ("sessions", iter_sessions(user)),
+    ):
+        yield ', "%s": [' % name
+        separator = ""
+        for row in rows:
+            yield separator + encoder.encode(row)
+            separator = ", "
+        yield "]"
+    yield "}\n"
+
+
+class Echo:
+    """
+    A file-like object for csv.writer that returns each line instead of
+    storing it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(user):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for field, value in get_profile(user).items():
+        yield writer.writerow(["profile", field, _format(value), "", "", ""])
+    for login in iter_logins(user):
+        yield writer.writerow(
+            [
+                "login",
+                "time",
+                _format(login["time"]),
+                login["ip_address"] or "",
+                login["user_agent"],
+                "",
+            ]
+        )
+    for session in iter_sessions(user):
+        yield writer.writerow(
+            [
+                "session",
+                "signed_in",
+                _format(session["signed_in"]),
+                "",
+                "",
+                _format(session["expires"]),
+            ]
+        )
+
+
+def _format(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
@@ -1,11 +1,45 @@
 from django import forms
+from django.core import signing
 from django.forms import ModelForm
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 
+from .availability import taken_filter
 from .models import CustomUser
+from .user_cache import invalidate_user
 
 
-class CustomUserCreationForm(UserCreationForm):
+class CaseInsensitiveUniqueMixin:
+    """
+    Reject a username or email that matches another user's apart from case.
+    The iexact lookups are served by the UPPER() indexes on CustomUser.
+    """
+
+    def clean_username(self):
+        username = self.cleaned_data["username"]
+        if username != self.instance.username and self._taken(
+            username__iexact=username
+        ):
+            raise forms.ValidationError(
+                "A user with that username already exists."
+            )
+        return username
+
+    def clean_email(self):
+        email = self.cleaned_data["email"]
+        if email != self.instance.email and self._taken(email__iexact=email):
+            raise forms.ValidationError(
+                "A user with that email address already exists."
+            )
+        return email
+
+    def _taken(self, **lookup):
+        users = CustomUser.objects.filter(**lookup)
+        if self.instance.pk is not None:
+            users = users.exclude(pk=self.instance.pk)
+        return users.exists()
+
+
+class CustomUserCreationForm(CaseInsensitiveUniqueMixin, UserCreationForm):
 
     # Overidden to be required fields
     first_name = forms.CharField(required=True, max_length=150)
@@ -39,9 +73,14 @@ class CustomUserChangeForm(UserChangeForm):
         )
 
 
-class CustomUserUpdateForm(ModelForm):
+class CustomUserUpdateForm(CaseInsensitiveUniqueMixin, ModelForm):
     """
     Used for the user to change his/her user details apart from the password.
+
+    Only the fields the user edited are written, and only if nobody else has
+    changed them since the form was rendered: the template posts
+    form.original, a signed copy of the values the user started from. A form
+    submitted without changes writes nothing.
     """
 
     # Overidden to be required fields
@@ -49,6 +88,16 @@ class CustomUserUpdateForm(ModelForm):
     last_name = forms.CharField(required=True, max_length=150)
     email = forms.EmailField(required=True)
 
+    signing_salt = "accounts.forms.CustomUserUpdateForm"
+    conflict_message = (
+        "This was changed to “%(value)s” elsewhere after you opened this "
+        "page. Submit again to replace it."
+    )
+    race_message = (
+        "Your details were changed elsewhere while saving. Check them and "
+        "submit again."
+    )
+
     class Meta:
         model = CustomUser
         fields = (
@@ -58,3 +107,129 @@ class CustomUserUpdateForm(ModelForm):
             "position",
             "email",
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stored = {
+            name: getattr(self.instance, name) for name in self._meta.fields
+        }
+        self.changed_fields = []
+        self.original = self._sign(self.stored)
+        self._submitted = self.stored
+
+    def _sign(self, values):
+        return signing.dumps(values, salt=self.signing_salt, compress=True)
+
+    def _accept(self, names):
+        """
+        Move the snapshot of the named fields to their stored values, so
+        that submitting the form again replaces them deliberately. Other
+        fields keep the values the user started from.
+        """
+        values = dict(self._submitted)
+        for name in names:
+            values[name] = self.stored[name]
+        self.original = self._sign(values)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        try:
+            self._submitted = signing.loads(
+                self.data.get("original", ""), salt=self.signing_salt
+            )
+        except signing.BadSignature:
+            # Submitted without a usable snapshot, so compare with the
+            # stored values: the last write wins, as it did before.
+            self._submitted = self.stored
+        self.changed_fields = [
+            name
+            for name in self._meta.fields
+            if name in cleaned_data
+            and cleaned_data[name] != self._submitted.get(name)
+            and cleaned_data[name] != self.stored[name]
+        ]
+        conflicts = [
+            name
+            for name in self.changed_fields
+            if self.stored[name] != self._submitted.get(name)
+        ]
+        for name in conflicts:
+            self.add_error(
+                name,
+                forms.ValidationError(
+                    self.conflict_message,
+                    code="conflict",
+                    params={"value": self.stored[name] or ""},
+                ),
+            )
+        self._accept(conflicts)
+        return cleaned_data
+
+    def validate_unique(self):
+        # As ModelForm.validate_unique(), but unchanged values cannot newly
+        # clash with another user's, so only changed fields are checked.
+        exclude = self._get_validation_exclusions() + [
+            name
+            for name in self._meta.fields
+            if name not in self.changed_fields
+        ]
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except forms.ValidationError as e:
+            self._update_errors(e)
+
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+        if not self.changed_fields:
+            return self.instance
+        # The UPDATE only matches if the edited fields still hold the values
+        # they were validated against.
+        updated = CustomUser._default_manager.filter(
+            pk=self.instance.pk,
+            **{name: self.stored[name] for name in self.changed_fields},
+        ).update(
+            **{
+                name: getattr(self.instance, name)
+                for name in self.changed_fields
+            }
+        )
+        if updated:
+            # Saved without signals, so do what their receivers would.
+            invalidate_user(self.instance.pk)
+            taken_filter.add_user(self.instance)
+        else:
+            self.stored = (
+                CustomUser._default_manager.filter(pk=self.instance.pk)
+                .values(*self._meta.fields)
+                .first()
+                or self.stored
+            )
+            self.add_error(None, self.race_message)
+            self._accept(self.changed_fields)
+        return self.instance
+
+
+class AccountDeletionForm(forms.Form):
+    """
+    Asks for the user's password before deleting their account.
+    """
+
+    password = forms.CharField(
+        label="Password",
+        strip=False,
+        widget=forms.PasswordInput(attrs={"autocomplete": "current-password"}),
+    )
+
+    def __init__(self, user, *args, **kwargs):
+        self.user = user
+        super().__init__(*args, **kwargs)
+
+    def clean_password(self):
+        password = self.cleaned_data["password"]
+        if not self.user.check_password(password):
+            raise forms.ValidationError(
+                "Your password was entered incorrectly. Please enter it "
+                "again."
+            )
+        return password
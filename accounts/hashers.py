@@ -0,0 +1,246 @@
+"""
+Password hashing in a bounded worker pool.
+
+PBKDF2 releases the GIL while it runs, so hashing in a pool of threads caps
+how many hashes run at once in a worker process without blocking cheap
+requests behind them. When every thread is busy and the queue is full the
+hash is rejected with HashingPoolSaturated, which HashingPoolMiddleware turns
+into a 503 response.
+
+The request thread still waits for its hash, so this only helps a worker
+that serves several requests at once: Gunicorn's gthread worker (threads
+above 1) or ASGI. A sync worker serves one request at a time, so its pool
+can never fill, and config/gunicorn.py refuses to start one with the pool
+enabled.
+
+The Calibrated hashers take their work factors from settings written by the
+calibrate_hashers command. CalibratedPBKDF2PasswordHasher can also lower the
+iteration count of new hashes while the host is overloaded; see
+LoadAdaptivePolicy.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+from .metrics import record, timing
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    A thread pool that accepts at most size + queue_depth hashes at a time
+    and records how long hashes wait for a thread versus how long they take,
+    both in its stats and as the "hash_wait" and "hash" phases of the
+    request being timed by the metrics middleware.
+    """
+
+    def __init__(self, size, queue_depth, timeout=0):
+        self.size = size
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="password-hasher"
+        )
+        self._slots = threading.BoundedSemaphore(size + queue_depth)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def run(self, func, *args):
+        if self.timeout > 0:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._rejected += 1
+            raise HashingPoolSaturated
+        try:
+            submitted = time.perf_counter()
+            future = self._executor.submit(self._timed, submitted, func, args)
+            result, wait_seconds, hash_seconds = future.result()
+        finally:
+            self._slots.release()
+        # The hash ran in another thread, outside the request's context, so
+        # its timings are added here.
+        record("hash_wait", wait_seconds)
+        record("hash", hash_seconds)
+        return result
+
+    def _timed(self, submitted, func, args):
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._completed += 1
+                self._wait_seconds += started - submitted
+                self._hash_seconds += finished - started
+                self._max_wait_seconds = max(
+                    self._max_wait_seconds, started - submitted
+                )
+        return result, started - submitted, finished - started
+
+    def reset_stats(self):
+        with self._lock:
+            self._completed = 0
+            self._rejected = 0
+            self._wait_seconds = 0.0
+            self._hash_seconds = 0.0
+            self._max_wait_seconds = 0.0
+
+    def stats(self):
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "mean_wait_ms": self._wait_seconds / completed * 1000,
+                "max_wait_ms": self._max_wait_seconds * 1000,
+                "mean_hash_ms": self._hash_seconds / completed * 1000,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    settings.PASSWORD_HASHING_POOL_SIZE,
+                    settings.PASSWORD_HASHING_QUEUE_DEPTH,
+                    settings.PASSWORD_HASHING_QUEUE_TIMEOUT,
+                )
+    return _pool
+
+
+class LoadAdaptivePolicy:
+    """
+    Track a moving average of the time PBKDF2 takes per iteration in this
+    process. When PASSWORD_HASHING_MAX_MS is set and the target iteration
+    count would take longer than that, new hashes use as many iterations as
+    fit in PASSWORD_HASHING_MAX_MS, but never fewer than
+    PASSWORD_PBKDF2_MIN_ITERATIONS. Stored hashes keep their own iteration
+    count, so they always verify.
+    """
+
+    # Weight of the newest sample in the moving average.
+    smoothing = 0.2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._seconds_per_iteration = None
+
+    def record(self, iterations, seconds):
+        sample = seconds / iterations
+        with self._lock:
+            if self._seconds_per_iteration is None:
+                self._seconds_per_iteration = sample
+            else:
+                self._seconds_per_iteration += self.smoothing * (
+                    sample - self._seconds_per_iteration
+                )
+
+    def iterations(self, target):
+        max_ms = settings.PASSWORD_HASHING_MAX_MS
+        seconds_per_iteration = self._seconds_per_iteration
+        if not max_ms or seconds_per_iteration is None:
+            return target
+        affordable = int(max_ms / 1000 / seconds_per_iteration)
+        floor = min(settings.PASSWORD_PBKDF2_MIN_ITERATIONS, target)
+        return max(floor, min(target, affordable))
+
+    def overloaded(self, target):
+        return self.iterations(target) < target
+
+
+load_policy = LoadAdaptivePolicy()
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with PASSWORD_PBKDF2_ITERATIONS iterations, capped by
+    load_policy while the host is overloaded. Hashes made with fewer
+    iterations are upgraded at a later sign-in, once the load has passed.
+    """
+
+    @property
+    def target_iterations(self):
+        return (
+            settings.PASSWORD_PBKDF2_ITERATIONS
+            or PBKDF2PasswordHasher.iterations
+        )
+
+    @property
+    def iterations(self):
+        return load_policy.iterations(self.target_iterations)
+
+    def encode(self, password, salt, iterations=None):
+        iterations = iterations or self.iterations
+        with timing("hash"):
+            started = time.perf_counter()
+            encoded = super().encode(password, salt, iterations)
+            load_policy.record(iterations, time.perf_counter() - started)
+        return encoded
+
+    def must_update(self, encoded):
+        # Rehashing costs a second hash, so it waits until the load passes.
+        if load_policy.overloaded(self.target_iterations):
+            return False
+        return super().must_update(encoded)
+
+
+class CalibratedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return (
+            settings.PASSWORD_ARGON2_TIME_COST
+            or Argon2PasswordHasher.time_cost
+        )
+
+    @property
+    def memory_cost(self):
+        return (
+            settings.PASSWORD_ARGON2_MEMORY_COST
+            or Argon2PasswordHasher.memory_cost
+        )
+
+
+class CalibratedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return (
+            settings.PASSWORD_BCRYPT_ROUNDS
+            or BCryptSHA256PasswordHasher.rounds
+        )
+
+
+class PooledPBKDF2PasswordHasher(CalibratedPBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher that runs in the shared hashing pool. It uses the same
+    algorithm name and encoding as PBKDF2PasswordHasher, so existing hashes
+    keep working. Checking a password also goes through encode(), so both
+    hashing and checking are pooled.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return get_pool().run(super().encode, password, salt, iterations)
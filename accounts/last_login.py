@@ -0,0 +1,111 @@
+"""
+Buffered last_login updates.
+
+Django updates last_login with one UPDATE per sign-in, and each sign-in
+also inserts a LoginEvent. With LAST_LOGIN_WRITE_BEHIND_INTERVAL above 0,
+sign-ins only record these in memory, and a background thread writes the
+latest time of every user who signed in to the database in one bulk UPDATE
+per interval, and their login events in one bulk INSERT. The stored values
+are at most one interval stale, and a crashed worker loses at most one
+interval of sign-ins.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+
+from .user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginWriter:
+    """
+    Buffers last_login times by user pk and applies them to the database in
+    batches. Only the latest time of each user is kept, so several sign-ins
+    within one interval cost a single row update.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._events = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return settings.LAST_LOGIN_WRITE_BEHIND_INTERVAL
+
+    def enqueue(self, pk, last_login):
+        with self._lock:
+            self._pending[pk] = last_login
+            if self._thread is None:
+                self._start()
+
+    def enqueue_event(self, event):
+        with self._lock:
+            self._events.append(event)
+            if self._thread is None:
+                self._start()
+
+    def get_pending(self, pk):
+        with self._lock:
+            return self._pending.get(pk)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            events, self._events = self._events, []
+        if not pending and not events:
+            return
+        try:
+            self._apply(pending, events)
+        except Exception:
+            # Try again with the next batch, unless a later sign-in of the
+            # same user has been queued since.
+            with self._lock:
+                for pk, last_login in pending.items():
+                    self._pending.setdefault(pk, last_login)
+                self._events[:0] = events
+            raise
+
+    def _apply(self, pending, events):
+        from .models import CustomUser, LoginEvent
+
+        using = router.db_for_write(CustomUser)
+        users = [
+            CustomUser(pk=pk, last_login=last_login)
+            for pk, last_login in pending.items()
+        ]
+        with transaction.atomic(using=using):
+            CustomUser.objects.using(using).bulk_update(
+                users, ["last_login"], batch_size=1000
+            )
+            LoginEvent.objects.using(using).bulk_create(
+                events, batch_size=1000
+            )
+        invalidate_user(*pending)
+
+    def _start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="last-login-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered last_login times")
+            finally:
+                close_old_connections()
+
+
+writer = LastLoginWriter()
@@ -0,0 +1,175 @@
+"""
+Queued email delivery.
+
+QueuedEmailBackend stores outgoing messages in the QueuedEmail table instead
+of sending them, so requests such as a password reset return without waiting
+on SES. The send_queued_email management command delivers them in batches
+through QUEUED_EMAIL_BACKEND, retrying failures with exponential backoff.
+
+Messages can carry password reset links, so once one has been sent, or has
+failed for good, its body and attachments are blanked. The
+prune_queued_email command deletes old rows.
+"""
+
+import base64
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        QueuedEmail.objects.bulk_create(
+            [queue_message(message) for message in email_messages]
+        )
+        return len(email_messages)
+
+
+def queue_message(message):
+    return QueuedEmail(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        alternatives=[
+            list(alternative)
+            for alternative in getattr(message, "alternatives", [])
+        ],
+        attachments=[
+            encode_attachment(attachment) for attachment in message.attachments
+        ],
+    )
+
+
+def encode_attachment(attachment):
+    if not isinstance(attachment, tuple):
+        raise TypeError(
+            "QueuedEmailBackend can only queue (filename, content, mimetype) "
+            "attachments."
+        )
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode()
+    return [filename, base64.b64encode(content).decode("ascii"), mimetype]
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        alternatives=[tuple(alt) for alt in email.alternatives],
+        connection=connection,
+    )
+    for filename, content, mimetype in email.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class FakeSESBackend(BaseEmailBackend):
+    """
+    Stands in for django_ses.SESBackend in tests and benchmarks. Sent messages
+    are kept in FakeSESBackend.outbox, each send takes `latency` seconds, and
+    the next `failures` sends raise ConnectionError.
+    """
+
+    outbox = []
+    latency = 0
+    failures = 0
+
+    def send_messages(self, email_messages):
+        time.sleep(self.latency)
+        if FakeSESBackend.failures:
+            FakeSESBackend.failures -= 1
+            raise ConnectionError("Fake SES is unavailable")
+        FakeSESBackend.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to batch_size due emails to this worker. Leased emails are
+    pushed QUEUED_EMAIL_LEASE seconds into the future, so another worker
+    only picks them up again if this one dies before recording the result.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=QueuedEmail.QUEUED, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        QueuedEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(
+            next_attempt_at=now
+            + timedelta(seconds=settings.QUEUED_EMAIL_LEASE)
+        )
+    return batch
+
+
+def send_batch(batch):
+    """
+    Deliver a claimed batch over one connection and record the outcome of
+    each email. Return the number of emails sent.
+    """
+    sent = 0
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    with connection:
+        for email in batch:
+            message = build_message(email, connection)
+            email.attempts += 1
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                record_failure(email, exc)
+            else:
+                email.status = QueuedEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ""
+                sent += 1
+            if email.status != QueuedEmail.QUEUED:
+                email.body = ""
+                email.alternatives = []
+                email.attachments = []
+            email.save(
+                update_fields=[
+                    "status",
+                    "attempts",
+                    "next_attempt_at",
+                    "last_error",
+                    "sent_at",
+                    "body",
+                    "alternatives",
+                    "attachments",
+                ]
+            )
+    return sent
+
+
+def record_failure(email, exc):
+    email.last_error = repr(exc)
+    if email.attempts >= settings.QUEUED_EMAIL_MAX_ATTEMPTS:
+        email.status = QueuedEmail.FAILED
+        return
+    delay = min(
+        settings.QUEUED_EMAIL_RETRY_DELAY * 2 ** (email.attempts - 1),
+        settings.QUEUED_EMAIL_MAX_RETRY_DELAY,
+    )
+    email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
@@ -0,0 +1,65 @@
+import binascii
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.password_validation import (
+    key_from_sha1,
+    password_key,
+    write_index,
+)
+
+
+def read_keys(path, plain):
+    """
+    Yield a key for each line of path. Lines are SHA-1 hashes in hex,
+    optionally followed by ":count" as in the Have I Been Pwned downloads,
+    or plain text passwords when plain is true.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if plain:
+                yield password_key(line)
+                continue
+            try:
+                digest = binascii.unhexlify(line.split(":", 1)[0])
+            except binascii.Error:
+                digest = b""
+            if len(digest) != 20:
+                raise CommandError(
+                    f"Line {line_number} is not a SHA-1 hash. Use --plain "
+                    "for a list of passwords."
+                )
+            yield key_from_sha1(digest)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the index file used by BreachedPasswordValidator from a list "
+        "of SHA-1 password hashes or of plain text passwords."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source")
+        parser.add_argument("output")
+        parser.add_argument(
+            "--plain",
+            action="store_true",
+            help="The source has one plain text password per line.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000000,
+            help="Number of hashes sorted in memory at a time.",
+        )
+
+    def handle(self, *args, **options):
+        count = write_index(
+            read_keys(options["source"], options["plain"]),
+            options["output"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(f"Wrote {count} hashes to {options['output']}.")
@@ -0,0 +1,170 @@
+import math
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+# Rounding bcrypt to whole rounds can overshoot the target by up to
+# sqrt(2), so a hash slower than this has been held at a minimum.
+SLOW_MARGIN = 1.5
+
+
+def time_hasher(hasher_class, runs, **work_factors):
+    """
+    Return the median time in milliseconds that hasher_class takes to hash
+    a password on one core with the given work factors.
+    """
+    hasher = type(hasher_class.__name__, (hasher_class,), work_factors)()
+    salt = hasher.salt()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        hasher.encode("calibration password", salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_pbkdf2(target_ms, runs):
+    iterations = PBKDF2PasswordHasher.iterations
+    ms = time_hasher(PBKDF2PasswordHasher, runs, iterations=iterations)
+    # PBKDF2 time is linear in the iteration count. Never suggest fewer
+    # iterations than the load-adaptive policy would go down to.
+    iterations = max(
+        settings.PASSWORD_PBKDF2_MIN_ITERATIONS,
+        int(round(iterations * target_ms / ms, -3)),
+    )
+    return {"PASSWORD_PBKDF2_ITERATIONS": iterations}, time_hasher(
+        PBKDF2PasswordHasher, runs, iterations=iterations
+    )
+
+
+def calibrate_argon2(target_ms, runs, memory_cost):
+    time_cost = Argon2PasswordHasher.time_cost
+    factors = {"time_cost": time_cost, "memory_cost": memory_cost}
+    ms = time_hasher(Argon2PasswordHasher, runs, **factors)
+    # Memory is fixed; time is linear in the number of passes over it.
+    factors["time_cost"] = max(1, round(time_cost * target_ms / ms))
+    return {
+        "PASSWORD_ARGON2_TIME_COST": factors["time_cost"],
+        "PASSWORD_ARGON2_MEMORY_COST": memory_cost,
+    }, time_hasher(Argon2PasswordHasher, runs, **factors)
+
+
+def calibrate_bcrypt(target_ms, runs):
+    rounds = BCryptSHA256PasswordHasher.rounds
+    ms = time_hasher(BCryptSHA256PasswordHasher, runs, rounds=rounds)
+    # Each extra bcrypt round doubles the time.
+    rounds = min(31, max(4, rounds + round(math.log2(target_ms / ms))))
+    return {"PASSWORD_BCRYPT_ROUNDS": rounds}, time_hasher(
+        BCryptSHA256PasswordHasher, runs, rounds=rounds
+    )
+
+
+def update_env_file(path, values):
+    """
+    Set values in the KEY=value file at path, replacing existing lines for
+    the same keys and keeping every other line.
+    """
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in remaining:
+            lines[i] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure PBKDF2, Argon2 and bcrypt on this host and print the work "
+        "factors that make one hash take about --target-ms on one core."
+    )
+
+    hashers = ("pbkdf2", "argon2", "bcrypt")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Time one hash should take on one core.",
+        )
+        parser.add_argument(
+            "--hashers",
+            nargs="+",
+            choices=self.hashers,
+            default=self.hashers,
+            help="Hashers to calibrate.",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Hashes timed for each measurement.",
+        )
+        parser.add_argument(
+            "--argon2-memory-kib",
+            type=int,
+            default=Argon2PasswordHasher.memory_cost,
+            help="Argon2 memory cost, which is kept fixed.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the settings to this environment file, e.g. .env, "
+            "instead of printing them.",
+        )
+
+    def handle(self, *args, **options):
+        target_ms = options["target_ms"]
+        if target_ms <= 0:
+            raise CommandError("--target-ms must be positive.")
+        runs = options["runs"]
+        calibrations = {
+            "pbkdf2": lambda: calibrate_pbkdf2(target_ms, runs),
+            "argon2": lambda: calibrate_argon2(
+                target_ms, runs, options["argon2_memory_kib"]
+            ),
+            "bcrypt": lambda: calibrate_bcrypt(target_ms, runs),
+        }
+        cores = os.cpu_count() or 1
+        values = {}
+        for name in options["hashers"]:
+            try:
+                factors, ms = calibrations[name]()
+            except ValueError as e:
+                # The hasher's library is not installed.
+                self.stderr.write(f"Skipping {name}: {e}")
+                continue
+            values.update(factors)
+            self.stderr.write(
+                f"{name}: {ms:.0f} ms per hash, about "
+                f"{cores * 1000 / ms:.0f} hashes/sec on {cores} cores"
+            )
+            if ms > target_ms * SLOW_MARGIN:
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"{name} cannot hash in {target_ms:g} ms on this "
+                        f"host without going below its minimum work "
+                        f"factor, so the minimum is suggested."
+                    )
+                )
+        if options["output"]:
+            update_env_file(options["output"], values)
+            self.stdout.write(
+                f"Wrote {len(values)} settings to {options['output']}."
+            )
+        else:
+            for key, value in values.items():
+                self.stdout.write(f"{key}={value}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete revoked API tokens that have expired, and so no longer need "
+        "to be remembered."
+    )
+
+    def handle(self, *args, **options):
+        count, _ = RevokedToken.objects.filter(
+            expires_at__lt=timezone.now()
+        ).delete()
+        self.stdout.write(f"Deleted {count} expired revoked tokens")
@@ -0,0 +1,210 @@
+import csv
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+
+from accounts.forms import CustomUserCreationForm
+from accounts.models import CustomUser
+
+
+FIELDS = ("username", "first_name", "last_name", "position", "email")
+
+
+def read_rows(path, file_format):
+    """
+    Yield (line number, row dict) pairs from a CSV file with a header row or
+    from a JSON Lines file, one row at a time. A line that is not a JSON
+    object is yielded as the ValidationError to report for it.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            # Line 1 is the header.
+            yield from enumerate(csv.DictReader(f), start=2)
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, parse_json_row(line)
+
+
+def parse_json_row(line):
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return ValidationError(f"Invalid JSON: {e}")
+    if not isinstance(row, dict):
+        return ValidationError("Each line must be a JSON object.")
+    return row
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV or JSON Lines file with username, "
+        "first_name, last_name, position, email and password columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows validated, hashed and inserted at a time.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help="Processes used to hash passwords. 0 hashes inline.",
+        )
+        parser.add_argument(
+            "--skip-password-validation",
+            action="store_true",
+            help="Do not run AUTH_PASSWORD_VALIDATORS on each password.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.rsplit(".", 1)[-1].lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("Use --format to give the file format.")
+        self.validate_passwords = not options["skip_password_validation"]
+        # One unbound form provides the field rules for every row.
+        self.form_fields = CustomUserCreationForm().fields
+
+        executor = None
+        if options["processes"]:
+            executor = ProcessPoolExecutor(
+                max_workers=options["processes"], initializer=django.setup
+            )
+
+        imported = skipped = 0
+        started = time.perf_counter()
+        rows = read_rows(path, file_format)
+        try:
+            while True:
+                chunk = list(islice(rows, options["chunk_size"]))
+                if not chunk:
+                    break
+                lines, users = self.validate_chunk(chunk)
+                passwords = [user.password for user in users]
+                if executor:
+                    passwords = executor.map(
+                        make_password, passwords, chunksize=64
+                    )
+                else:
+                    passwords = map(make_password, passwords)
+                for user, password in zip(users, passwords):
+                    user.password = password
+                try:
+                    with transaction.atomic():
+                        CustomUser.objects.bulk_create(users)
+                except IntegrityError:
+                    # Another user took a username or email since the chunk
+                    # was validated.
+                    users = self.create_each(lines, users)
+                imported += len(users)
+                skipped += len(chunk) - len(users)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Imported {imported} users, skipped {skipped} "
+                    f"({imported / elapsed:.0f} rows/sec)"
+                )
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def validate_chunk(self, chunk):
+        """
+        Return the line numbers and unsaved users of the valid rows in chunk,
+        with their plain text passwords in the password field, and report the
+        invalid ones.
+        """
+        taken_usernames = self.taken(chunk, "username")
+        taken_emails = self.taken(chunk, "email")
+        lines = []
+        users = []
+        for line_number, row in chunk:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                user = self.validate_row(row)
+                if user.username.upper() in taken_usernames:
+                    raise ValidationError(
+                        "A user with that username already exists."
+                    )
+                if user.email.upper() in taken_emails:
+                    raise ValidationError(
+                        "A user with that email address already exists."
+                    )
+            except ValidationError as e:
+                self.stderr.write(
+                    f"Line {line_number}: {'; '.join(e.messages)}"
+                )
+                continue
+            taken_usernames.add(user.username.upper())
+            taken_emails.add(user.email.upper())
+            lines.append(line_number)
+            users.append(user)
+        return lines, users
+
+    def create_each(self, lines, users):
+        """
+        Insert users one at a time, reporting those that conflict with an
+        existing user, and return the ones inserted.
+        """
+        created = []
+        for line_number, user in zip(lines, users):
+            try:
+                with transaction.atomic():
+                    CustomUser.objects.bulk_create([user])
+            except IntegrityError:
+                self.stderr.write(
+                    f"Line {line_number}: A user with that username or email "
+                    f"address already exists."
+                )
+                continue
+            created.append(user)
+        return created
+
+    def taken(self, chunk, field):
+        """
+        Return the upper-cased values of field in chunk that already belong
+        to a user, using the UPPER() index on that column.
+        """
+        values = {
+            str(row.get(field, "")).upper()
+            for _, row in chunk
+            if isinstance(row, dict)
+        }
+        return set(
+            CustomUser.objects.annotate(upper=Upper(field))
+            .filter(upper__in=values)
+            .values_list("upper", flat=True)
+        )
+
+    def validate_row(self, row):
+        values = {
+            name: self.form_fields[name].clean(row.get(name, ""))
+            for name in FIELDS
+        }
+        user = CustomUser(**values)
+        password = self.form_fields["password1"].clean(row.get("password", ""))
+        if self.validate_passwords:
+            validate_password(password, user)
+        user.password = password
+        return user
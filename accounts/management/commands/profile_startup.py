@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the WSGI module in a fresh interpreter, as a Gunicorn worker "
+        "does, and report the import time and resident memory added by each "
+        "package, largest first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            default=settings.WSGI_APPLICATION.rsplit(".", 1)[0],
+            help="Module to import. Defaults to the WSGI_APPLICATION module.",
+        )
+        parser.add_argument(
+            "--by-module",
+            action="store_true",
+            help="Report each module rather than each top-level package.",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["time", "rss"],
+            default="time",
+            help="Order the report by import time or by memory.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=25,
+            help="Number of rows to report. 0 reports all of them.",
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, "-m", "accounts.startup", options["module"]],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            cwd=settings.BASE_DIR,
+            env=os.environ,
+        )
+        if result.returncode:
+            raise CommandError(
+                f"Importing {options['module']} failed:\n{result.stderr}"
+            )
+        profile = json.loads(result.stdout)
+
+        rows = {}
+        for name, seconds, kb in profile["modules"]:
+            if not options["by_module"]:
+                name = name.split(".", 1)[0]
+            total_seconds, total_kb = rows.get(name, (0.0, 0))
+            rows[name] = (total_seconds + seconds, total_kb + kb)
+        column = 0 if options["sort"] == "time" else 1
+        ordered = sorted(rows.items(), key=lambda row: -row[1][column])
+        if options["limit"]:
+            ordered = ordered[: options["limit"]]
+
+        self.stdout.write(f"{'module':<50}{'import ms':>12}{'RSS KiB':>12}")
+        for name, (seconds, kb) in ordered:
+            self.stdout.write(f"{name:<50}{seconds * 1000:>12.1f}{kb:>12}")
+        self.stdout.write(
+            f"{'total':<50}{profile['seconds'] * 1000:>12.1f}"
+            f"{profile['rss_after_kb'] - profile['rss_before_kb']:>12}"
+        )
+        self.stdout.write(
+            f"{len(profile['modules'])} modules imported; the interpreter "
+            f"used {profile['rss_before_kb']} KiB before them."
+        )
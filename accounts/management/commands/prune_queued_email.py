@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    help = "Delete queued emails that were sent or failed for good."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=7,
+            help="Keep emails created within this many days, for "
+            "inspecting recent deliveries.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        count, _ = (
+            QueuedEmail.objects.exclude(status=QueuedEmail.QUEUED)
+            .filter(created_at__lt=cutoff)
+            .delete()
+        )
+        self.stdout.write(f"Deleted {count} delivered or failed emails.")
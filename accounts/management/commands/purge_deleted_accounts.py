@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.deletion import purge_next_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge the data of deleted accounts in small batches, resuming any "
+        "purge that was interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows purged per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between batches.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new deletions instead of exiting when "
+            "there are none left.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when there is nothing to "
+            "purge.",
+        )
+
+    def handle(self, *args, **options):
+        completed = 0
+        while True:
+            deletion = purge_next_batch(options["batch_size"])
+            if deletion is None:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+            if deletion.completed_at is not None:
+                completed += 1
+                self.report(deletion)
+            elif options["verbosity"] > 1:
+                self.report(deletion)
+            time.sleep(options["sleep"])
+        self.stdout.write(f"Completed {completed} account deletions.")
+
+    def report(self, deletion):
+        rows = ", ".join(
+            f"{label}: {state['rows']}"
+            for label, state in deletion.progress.items()
+        )
+        self.stdout.write(f"{deletion} ({rows})")
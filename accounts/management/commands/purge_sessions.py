@@ -0,0 +1,164 @@
+import datetime
+import os
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import LoginEvent
+
+
+def read_checkpoint(path):
+    """
+    Return the (expire_date, session_key) of the last session deleted by a
+    previous run, or None.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        expire_date, session_key = f.read().split()
+    return datetime.datetime.fromisoformat(expire_date), session_key
+
+
+def write_checkpoint(path, last):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"{last[0].isoformat()} {last[1]}\n")
+    os.replace(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired database sessions in small batches, walking the "
+        "expire_date index, instead of in one statement like clearsessions. "
+        "Then delete login events older than LOGIN_EVENT_RETENTION_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sessions deleted per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between batches.",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=0,
+            help="Stop after this many seconds. 0 runs until done.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording the last session deleted, so that a run "
+            "stopped by --max-seconds is resumed from there instead of "
+            "rescanning the index. It is removed once a run finishes.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        checkpoint = options["checkpoint"]
+        using = router.db_for_write(Session)
+        cutoff = timezone.now()
+        last = read_checkpoint(checkpoint)
+        finished = False
+        deleted = 0
+        started = reported = time.monotonic()
+        while True:
+            expired = Session.objects.using(using).filter(
+                expire_date__lt=cutoff
+            )
+            if last is not None:
+                # Sessions before the last one deleted are gone, so start
+                # after it rather than at the front of the index.
+                expired = expired.filter(
+                    Q(expire_date__gt=last[0])
+                    | Q(expire_date=last[0], session_key__gt=last[1]),
+                    # Lets the planner seek straight to last on the index.
+                    expire_date__gte=last[0],
+                )
+            batch = list(
+                expired.order_by("expire_date", "session_key").values_list(
+                    "expire_date", "session_key"
+                )[:batch_size]
+            )
+            if not batch:
+                finished = True
+                break
+            with transaction.atomic(using=using):
+                # Recheck the expiry, in case a session was renewed since it
+                # was selected.
+                count, _ = (
+                    Session.objects.using(using)
+                    .filter(
+                        session_key__in=[key for _, key in batch],
+                        expire_date__lt=cutoff,
+                    )
+                    .delete()
+                )
+            deleted += count
+            last = batch[-1]
+            if checkpoint:
+                write_checkpoint(checkpoint, last)
+
+            now = time.monotonic()
+            if options["verbosity"] > 1 or now - reported >= 5:
+                reported = now
+                self.report(deleted, now - started, last[0])
+            if options["max_seconds"] and (
+                now - started >= options["max_seconds"]
+            ):
+                self.stdout.write("Stopping after --max-seconds.")
+                break
+            if len(batch) < batch_size:
+                finished = True
+                break
+            time.sleep(options["sleep"])
+        if finished and checkpoint and os.path.exists(checkpoint):
+            # Sessions that expired before the checkpoint since it was
+            # written are only found by starting at the front again.
+            os.remove(checkpoint)
+        self.report(deleted, time.monotonic() - started)
+        if settings.LOGIN_EVENT_RETENTION_DAYS > 0:
+            self.prune_login_events(batch_size, options["sleep"])
+
+    def prune_login_events(self, batch_size, sleep):
+        using = router.db_for_write(LoginEvent)
+        cutoff = timezone.now() - datetime.timedelta(
+            days=settings.LOGIN_EVENT_RETENTION_DAYS
+        )
+        events = LoginEvent.objects.using(using)
+        deleted = 0
+        while True:
+            # Events are created in pk order, so the old ones are at the
+            # front of the primary key index.
+            pks = list(
+                events.filter(created_at__lt=cutoff)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if pks:
+                count, _ = events.filter(pk__in=pks).delete()
+                deleted += count
+            if len(pks) < batch_size:
+                break
+            time.sleep(sleep)
+        self.stdout.write(f"Deleted {deleted} old login events")
+
+    def report(self, deleted, elapsed, reached=None):
+        message = (
+            f"Deleted {deleted} expired sessions "
+            f"({deleted / max(elapsed, 1e-9):.0f} rows/sec)"
+        )
+        if reached is not None:
+            message += f", up to {reached.isoformat()}"
+        self.stdout.write(message)
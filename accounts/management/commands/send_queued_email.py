@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.mail import claim_batch, send_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver emails queued by accounts.mail.QueuedEmailBackend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of emails to claim and send at a time.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new emails instead of exiting when the "
+            "queue is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = 0
+        total_claimed = 0
+        while True:
+            batch = claim_batch(options["batch_size"])
+            if batch:
+                total_claimed += len(batch)
+                total_sent += send_batch(batch)
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(
+            f"Sent {total_sent} of {total_claimed} queued emails."
+        )
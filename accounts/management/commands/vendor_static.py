@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import os
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.assets import ASSETS, static_name
+
+
+STATIC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static"
+)
+
+
+def integrity(content):
+    digest = hashlib.sha384(content).digest()
+    return "sha384-" + base64.b64encode(digest).decode("ascii")
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the third-party assets in accounts.assets.ASSETS into "
+        "accounts/static, checking each against its integrity hash, so that "
+        "they can be served with SELF_HOSTED_STATIC."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds to wait for each download.",
+        )
+
+    def handle(self, *args, **options):
+        for name, asset in ASSETS.items():
+            path = os.path.join(STATIC_DIR, *static_name(name).split("/"))
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    if integrity(f.read()) == asset.integrity:
+                        self.stdout.write(f"{name} is up to date.")
+                        continue
+            with urlopen(asset.url, timeout=options["timeout"]) as response:
+                content = response.read()
+            if integrity(content) != asset.integrity:
+                raise CommandError(
+                    f"{asset.url} does not match its integrity hash "
+                    f"{asset.integrity}."
+                )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+            self.stdout.write(f"Downloaded {name}.")
@@ -0,0 +1,247 @@
+"""
+Per-request timing of password hashing, session I/O, SQL and template
+rendering. Hashes run in the hashing pool are split into "hash_wait", the
+time spent waiting for a thread, and "hash".
+
+MetricsMiddleware times a sample of requests. While it times one, timing()
+blocks add to the request's phases and every SQL query is counted. The
+accounts.sessions engine times its cache and database work as "session";
+other queries run outside a timing() block are timed as "session" when they
+touch django_session, as other session engines' do, and as "db" otherwise.
+Each sampled request adds to histograms per URL name in this process's
+registry, which is published to the cache every METRICS_PUBLISH_INTERVAL
+seconds so that the metrics endpoint can merge every worker sharing CACHES.
+A worker that stops publishing drops out after WORKER_TTL intervals.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+KEY_PREFIX = "accounts.metrics"
+
+SECONDS_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+WORKER_TTL = 10
+
+_timer = contextvars.ContextVar("accounts.metrics.timer", default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.active = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Count and time a query; for use with connection.execute_wrapper().
+        """
+        self.queries += 1
+        if self.active is not None:
+            return execute(sql, params, many, context)
+        phase = "session" if "django_session" in sql else "db"
+        with timing(phase):
+            return execute(sql, params, many, context)
+
+    def server_timing(self, total):
+        """
+        Return the value of a Server-Timing header for the request.
+        """
+        metrics = []
+        for phase, seconds in self.phases.items():
+            metric = f"{phase};dur={seconds * 1000:.1f}"
+            if phase == "db":
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def start_timer():
+    timer = RequestTimer()
+    return timer, _timer.set(timer)
+
+
+def stop_timer(token):
+    _timer.reset(token)
+
+
+def current_timer():
+    return _timer.get()
+
+
+@contextmanager
+def timing(phase):
+    """
+    Add the time spent in the block to phase of the request being timed, if
+    any. Blocks nested in another timing() block count only towards the
+    outer one.
+    """
+    timer = _timer.get()
+    if timer is None or timer.active is not None:
+        yield
+        return
+    timer.active = phase
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, time.perf_counter() - started)
+        timer.active = None
+
+
+def record(phase, seconds):
+    """
+    Add seconds measured elsewhere, such as in another thread, to phase of
+    the request being timed, if any, unless it is inside a timing() block.
+    """
+    timer = _timer.get()
+    if timer is not None and timer.active is None:
+        timer.add(phase, seconds)
+
+
+class Registry:
+    """
+    Histograms of phase durations and query counts per URL name. Each
+    histogram is a list of bucket counts, including the +Inf bucket,
+    followed by the sum and the count of observations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds = {}
+        self._queries = {}
+        self._published_at = 0
+
+    def observe(self, view, timer, total):
+        with self._lock:
+            for phase, seconds in timer.phases.items():
+                self._add(
+                    self._seconds, (view, phase), SECONDS_BUCKETS, seconds
+                )
+            self._add(self._seconds, (view, "total"), SECONDS_BUCKETS, total)
+            self._add(self._queries, (view,), QUERY_BUCKETS, timer.queries)
+
+    def _add(self, histograms, labels, buckets, value):
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = [0] * (len(buckets) + 3)
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "seconds": {k: list(v) for k, v in self._seconds.items()},
+                "queries": {k: list(v) for k, v in self._queries.items()},
+            }
+
+    def publish(self, interval):
+        """
+        Store a snapshot in the cache for the metrics endpoint, at most once
+        per interval seconds.
+        """
+        now = time.monotonic()
+        if now - self._published_at < interval:
+            return
+        self._published_at = now
+        pid = os.getpid()
+        timeout = interval * WORKER_TTL
+        cache.set(f"{KEY_PREFIX}:{pid}", self.snapshot(), timeout=timeout)
+        # Each worker's entry holds the time it expires, so workers that have
+        # exited are dropped by the next publish.
+        wall = time.time()
+        workers = live_workers(wall)
+        workers[pid] = wall + timeout
+        cache.set(f"{KEY_PREFIX}:live_workers", workers, timeout=timeout)
+
+
+registry = Registry()
+
+
+def live_workers(now):
+    """
+    Return the pids of the workers that have published recently, mapped to
+    the time their entry expires.
+    """
+    workers = cache.get(f"{KEY_PREFIX}:live_workers", {})
+    return {pid: expires for pid, expires in workers.items() if expires > now}
+
+
+def collect():
+    """
+    Merge the published snapshots of every worker with this process's
+    current one.
+    """
+    workers = live_workers(time.time())
+    snapshots = cache.get_many(
+        [f"{KEY_PREFIX}:{pid}" for pid in workers if pid != os.getpid()]
+    )
+    merged = registry.snapshot()
+    for snapshot in snapshots.values():
+        for name in ("seconds", "queries"):
+            for labels, histogram in snapshot[name].items():
+                total = merged[name].setdefault(labels, [0] * len(histogram))
+                for i, value in enumerate(histogram):
+                    total[i] += value
+    return merged
+
+
+def render_prometheus(snapshot):
+    lines = []
+    for name, key, labels, buckets, help_text in (
+        (
+            "accounts_request_phase_seconds",
+            "seconds",
+            ("view", "phase"),
+            SECONDS_BUCKETS,
+            "Time spent in each phase of sampled requests.",
+        ),
+        (
+            "accounts_request_queries",
+            "queries",
+            ("view",),
+            QUERY_BUCKETS,
+            "SQL queries made by sampled requests.",
+        ),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for values, histogram in sorted(snapshot[key].items()):
+            label = ",".join(
+                f'{label}="{value}"' for label, value in zip(labels, values)
+            )
+            cumulative = 0
+            for bound, count in zip(buckets + ("+Inf",), histogram[:-2]):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{label},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"{name}_sum{{{label}}} {histogram[-2]}")
+            lines.append(f"{name}_count{{{label}}} {histogram[-1]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,212 @@
+import json
+import math
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics, routers, user_cache
+from .hashers import HashingPoolSaturated
+from .throttling import (
+    CacheBucketStore,
+    MemoryBucketStore,
+    bucket_key,
+    client_ip,
+)
+
+
+class HashingPoolMiddleware(MiddlewareMixin):
+    """
+    Answer with a 503 straight away when the password hashing pool is full,
+    instead of queueing the request behind other hashes.
+    """
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingPoolSaturated):
+            response = HttpResponse(
+                "The server is busy. Please try again shortly.", status=503
+            )
+            response["Retry-After"] = "1"
+            return response
+
+
+def request_data(request):
+    """
+    Return the query string of a GET, or the form fields or JSON object
+    posted in the request.
+    """
+    if request.method in ("GET", "HEAD"):
+        return request.GET
+    if request.content_type != "application/json":
+        return request.POST
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+class ThrottleMiddleware:
+    """
+    Reject sign-in and password reset attempts, and the GETs to
+    THROTTLE_GET_URLS, that exceed the token buckets in THROTTLE_RATES with
+    a 429, before any password is hashed or the database is queried.
+    """
+
+    def __init__(self, get_response):
+        if not settings.THROTTLE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if settings.THROTTLE_STORE == "cache":
+            self.store = CacheBucketStore()
+        else:
+            self.store = MemoryBucketStore(settings.THROTTLE_MAX_KEYS)
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD", "POST"):
+            response = self.throttle(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def throttle(self, request):
+        try:
+            url_name = resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+        if (
+            request.method != "POST"
+            and url_name not in settings.THROTTLE_GET_URLS
+        ):
+            return None
+        rates = settings.THROTTLE_RATES.get(url_name)
+        if isinstance(rates, str):
+            # Shares the buckets of another view.
+            url_name, rates = rates, settings.THROTTLE_RATES[rates]
+        if not rates:
+            return None
+        data = request_data(request)
+        for scope, (burst, rate) in rates.items():
+            if scope == "ip":
+                value = client_ip(request)
+            else:
+                value = data.get(scope, "")
+                if not isinstance(value, str):
+                    value = ""
+            value = value.strip().lower()
+            if not value:
+                continue
+            allowed, retry_after = self.store.take(
+                bucket_key(url_name, scope, value), burst, rate
+            )
+            if not allowed:
+                response = HttpResponse(
+                    "Too many attempts. Please try again later.", status=429
+                )
+                response["Retry-After"] = str(math.ceil(retry_after))
+                return response
+        return None
+
+
+class MetricsMiddleware:
+    """
+    Time hashing, session I/O, SQL and template rendering for a sample of
+    METRICS_SAMPLE_RATE of requests and record them in the metrics
+    registry, adding a Server-Timing header with METRICS_SERVER_TIMING.
+    Unsampled requests are passed straight through.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        timer, token = metrics.start_timer()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            metrics.stop_timer(token)
+        total = time.perf_counter() - started
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = timer.server_timing(total)
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else "unknown"
+        metrics.registry.observe(view, timer, total)
+        metrics.registry.publish(settings.METRICS_PUBLISH_INTERVAL)
+        return response
+
+    def process_template_response(self, request, response):
+        timer = metrics.current_timer()
+        if timer is not None:
+            started = time.perf_counter()
+            before = sum(timer.phases.values())
+
+            def rendered(response):
+                # Queries made while rendering are counted as db, so leave
+                # them out of the template time.
+                nested = sum(timer.phases.values()) - before
+                timer.add("template", time.perf_counter() - started - nested)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Keep a client's reads on the primary database for DB_REPLICA_PIN_SECONDS
+    after a request of theirs has written to it, so that they see their own
+    changes before the replicas have caught up.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state, token = routers.start_request(
+            routers.PIN_COOKIE in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.finish_request(token)
+        if state.wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware that takes request.user from the shared cache
+    when USER_CACHE_SECONDS is above 0.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        if settings.USER_CACHE_SECONDS > 0:
+            request.user = SimpleLazyObject(
+                lambda: user_cache.get_user(request)
+            )
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# Django's iexact lookup on PostgreSQL compares UPPER("column"::text), so
+# these expression indexes let case-insensitive username and email lookups
+# use an index scan. They are built concurrently so that adding them to a
+# large table does not block writes.
+INDEXES = {
+    "accounts_customuser_username_upper_idx": "username",
+    "accounts_customuser_email_upper_idx": "email",
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f'ON accounts_customuser (UPPER("{column}"::text))'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0003_queuedemail"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
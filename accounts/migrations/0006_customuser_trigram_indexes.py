@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+# The admin change list searches with icontains, which Django compiles to
+# UPPER("column"::text) LIKE UPPER(%s) on PostgreSQL. GIN trigram indexes on
+# the same expressions let those searches avoid a sequential scan.
+COLUMNS = ("username", "first_name", "last_name", "email", "position")
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in COLUMNS:
+        schema_editor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            f"accounts_customuser_{column}_trgm_idx ON accounts_customuser "
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in COLUMNS:
+        schema_editor.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            f"accounts_customuser_{column}_trgm_idx"
+        )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0005_loginevent"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
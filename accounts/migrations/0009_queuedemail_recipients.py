@@ -0,0 +1,46 @@
+# Generated by Django 3.1.5 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+def blank_delivered(apps, schema_editor):
+    QueuedEmail = apps.get_model("accounts", "QueuedEmail")
+    QueuedEmail.objects.using(schema_editor.connection.alias).exclude(
+        status="queued"
+    ).update(body="", alternatives=[])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_accountdeletion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="queuedemail",
+            name="attachments",
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name="queuedemail",
+            name="bcc",
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name="queuedemail",
+            name="cc",
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name="queuedemail",
+            name="headers",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="queuedemail",
+            name="reply_to",
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(blank_delivered, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.5 on 2026-10-18 12:00
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_session_keys(apps, schema_editor):
+    LoginEvent = apps.get_model("accounts", "LoginEvent")
+    manager = LoginEvent.objects.db_manager(schema_editor.connection.alias)
+    events = manager.exclude(session_key="").only("session_key")
+    batch = []
+    for event in events.iterator(chunk_size=1000):
+        event.session_key_hash = hashlib.sha256(
+            event.session_key.encode()
+        ).hexdigest()
+        batch.append(event)
+        if len(batch) == 1000:
+            manager.bulk_update(batch, ["session_key_hash"])
+            batch = []
+    manager.bulk_update(batch, ["session_key_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_queuedemail_recipients"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loginevent",
+            name="session_key_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(hash_session_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="loginevent",
+            name="session_key",
+        ),
+    ]
@@ -1,6 +1,113 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 class CustomUser(AbstractUser):
     position = models.CharField(max_length=150, null=True, blank=False)
+
+
+class QueuedEmail(models.Model):
+    """
+    An outgoing email waiting to be delivered by the send_queued_email
+    management command. Once it has been sent, or has failed for good, its
+    content is blanked, as it may hold a password reset link, and
+    prune_queued_email deletes the row later.
+    """
+
+    QUEUED = "queued"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (SENT, "Sent"), (FAILED, "Failed")]
+
+    subject = models.TextField()
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    alternatives = models.JSONField(default=list)
+    # [filename, base64 content, mimetype] for each attachment.
+    attachments = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)}"
+
+
+def hash_session_key(session_key):
+    """
+    Return the SHA-256 hex digest of a session key, which the SHA256()
+    database function gives for the stored key too.
+    """
+    return hashlib.sha256(session_key.encode()).hexdigest()
+
+
+class LoginEvent(models.Model):
+    """
+    A successful sign-in, recorded for the user's personal data export. Only
+    a hash of the session key is kept, as the key itself is a credential.
+    purge_sessions deletes events older than LOGIN_EVENT_RETENTION_DAYS.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="login_events"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+    session_key_hash = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at"])]
+
+    def __str__(self):
+        return f"{self.user} at {self.created_at}"
+
+
+class RevokedToken(models.Model):
+    """
+    A refresh token id, or a token family id, that may no longer be used.
+    Rows are only needed until the tokens would have expired anyway, and
+    the clear_revoked_tokens management command deletes them after that.
+    """
+
+    jti = models.CharField(max_length=22, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class AccountDeletion(models.Model):
+    """
+    A user who has deleted their account, whose related rows are being
+    purged in batches by the purge_deleted_accounts management command.
+    The user is only referred to by id, as this row outlives them.
+    """
+
+    user_id = models.PositiveIntegerField(unique=True)
+    requested_at = models.DateTimeField(default=timezone.now)
+    # Rows purged from each table so far, and where each step has got to.
+    progress = models.JSONField(default=dict)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["completed_at", "requested_at"])]
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id}"
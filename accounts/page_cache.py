@@ -0,0 +1,118 @@
+"""
+Full-page caching for visitors who are not signed in.
+
+cache_anonymous_page() renders a page once and keeps it in the cache for
+PAGE_CACHE_SECONDS with every CSRF token replaced by a placeholder. Later
+GET requests from clients without a session cookie are answered from the
+cache with a new masked token for the visitor filled in, which only touches
+the template engine's output, not the template engine. Only requests whose
+query string holds nothing but QUERY_PARAMS are cached, so that made-up
+parameters cannot fill the cache and evict the real pages.
+
+Each response carries an ETag built from the cached page and the visitor's
+CSRF cookie, and is marked "private, no-cache" so that browsers revalidate it
+rather than use a stored copy. A matching If-None-Match gets a 304: the copy
+the browser already has was rendered with a token masked from the same CSRF
+secret, so its forms still submit.
+"""
+
+import hashlib
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, urlencode
+
+
+KEY_PREFIX = "accounts.page_cache"
+
+PLACEHOLDER = "__csrf_token__"
+
+# Query parameters the cached pages are rendered with.
+QUERY_PARAMS = frozenset(["next"])
+
+# The input rendered by the {% csrf_token %} tag.
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def cache_key(request):
+    url = request.build_absolute_uri(request.path)
+    if request.GET:
+        url += "?" + urlencode(sorted(request.GET.items()))
+    return f"{KEY_PREFIX}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def page_etag(digest, request):
+    csrf_cookie = request.META.get("CSRF_COOKIE", "")
+    tag = hashlib.md5(f"{digest}:{csrf_cookie}".encode()).hexdigest()
+    return f'"{tag}"'
+
+
+def is_cacheable(request):
+    return (
+        settings.PAGE_CACHE_SECONDS > 0
+        and request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and QUERY_PARAMS.issuperset(request.GET)
+    )
+
+
+def finish(response, digest, request):
+    response["ETag"] = page_etag(digest, request)
+    # Replaces never_cache on the auth views: the page may be stored as
+    # long as it is revalidated, since its token is tied to the CSRF cookie.
+    response["Cache-Control"] = "private, no-cache"
+    if response.has_header("Expires"):
+        del response["Expires"]
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def store(request, response):
+    """
+    Cache a rendered response as a template for later requests, and return
+    the digest identifying it.
+    """
+    content = response.content.decode(response.charset)
+    template = CSRF_INPUT.sub(rf"\g<1>{PLACEHOLDER}\g<2>", content)
+    digest = hashlib.md5(template.encode()).hexdigest()
+    cache.set(
+        cache_key(request),
+        (template, response["Content-Type"], digest),
+        settings.PAGE_CACHE_SECONDS,
+    )
+    return digest
+
+
+def cache_anonymous_page(view):
+    @wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return view(request, *args, **kwargs)
+        cached = cache.get(cache_key(request))
+        if cached is None:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            # csrf_protect on the auth views may already have set the CSRF
+            # cookie. That is fine, as CsrfViewMiddleware sets it for cached
+            # pages too.
+            cookies = set(response.cookies) - {settings.CSRF_COOKIE_NAME}
+            if response.status_code != 200 or response.streaming or cookies:
+                return response
+            return finish(response, store(request, response), request)
+
+        template, content_type, digest = cached
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if page_etag(digest, request) in if_none_match:
+            return finish(HttpResponseNotModified(), digest, request)
+        if PLACEHOLDER in template:
+            template = template.replace(PLACEHOLDER, get_token(request))
+        response = HttpResponse(template, content_type=content_type)
+        return finish(response, digest, request)
+
+    return wrapped_view
@@ -0,0 +1,212 @@
+"""
+Checking passwords against a breach corpus.
+
+The corpus is stored in a binary index file built by the
+build_breached_password_index management command. Each password is
+represented by the first 8 bytes of its SHA-1 hash, the same hash the Have I
+Been Pwned corpus is published with. The file holds:
+
+* an 8-byte magic string and the number of records as an unsigned 64-bit
+  integer,
+* a fan-out table of 65537 unsigned 64-bit integers, where entry i is the
+  number of records whose first two bytes are less than i,
+* the records themselves, sorted, as big-endian unsigned 64-bit integers.
+
+The file is memory-mapped read-only, so every worker process on a host
+shares the same pages through the page cache, and a lookup is a binary
+search within one fan-out bucket.
+"""
+
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+
+
+MAGIC = b"BPWIDX1\0"
+HEADER = struct.Struct(">8sQ")
+FANOUT = struct.Struct(">65537Q")
+RECORD = struct.Struct(">Q")
+RECORDS_OFFSET = HEADER.size + FANOUT.size
+
+
+def password_key(password):
+    return key_from_sha1(hashlib.sha1(password.encode()).digest())
+
+
+def key_from_sha1(digest):
+    return RECORD.unpack_from(digest)[0]
+
+
+def _from_big_endian(value):
+    """
+    Return the value of an unsigned 64-bit integer that was stored
+    big-endian but read in native byte order.
+    """
+    if sys.byteorder == "big":
+        return value
+    return int.from_bytes(value.to_bytes(8, "little"), "big")
+
+
+class BreachedPasswordIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ImproperlyConfigured(
+                f"{path} is not a breached password index."
+            )
+        # A view on the mapped pages rather than a copy, so the table stays
+        # shared between processes.
+        self._view = memoryview(self._mmap)
+        self._fanout = self._view[HEADER.size : RECORDS_OFFSET].cast("Q")
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        prefix = key >> 48
+        lo = _from_big_endian(self._fanout[prefix])
+        hi = _from_big_endian(self._fanout[prefix + 1])
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = RECORD.unpack_from(
+                self._mmap, RECORDS_OFFSET + mid * RECORD.size
+            )[0]
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self):
+        self._fanout.release()
+        self._view.release()
+        self._mmap.close()
+
+
+def write_index(keys, path, chunk_size=5000000):
+    """
+    Write an index file at path from an iterable of keys in any order.
+    Keys are sorted in chunks of chunk_size in memory and merged from
+    temporary files, so memory use is bounded however many keys there are.
+    """
+    chunk_paths = []
+    try:
+        chunk = array("Q")
+        for key in keys:
+            chunk.append(key)
+            if len(chunk) == chunk_size:
+                chunk_paths.append(_write_sorted_chunk(chunk))
+                chunk = array("Q")
+        if chunk:
+            chunk_paths.append(_write_sorted_chunk(chunk))
+        merged = heapq.merge(*(_read_chunk(p) for p in chunk_paths))
+        return _write_sorted_index(merged, path)
+    finally:
+        for chunk_path in chunk_paths:
+            os.remove(chunk_path)
+
+
+def _write_sorted_chunk(chunk):
+    fd, chunk_path = tempfile.mkstemp(suffix=".bpwchunk")
+    with os.fdopen(fd, "wb") as f:
+        array("Q", sorted(chunk)).tofile(f)
+    return chunk_path
+
+
+def _read_chunk(chunk_path, buffer_records=65536):
+    with open(chunk_path, "rb") as f:
+        while True:
+            buffer = array("Q")
+            try:
+                buffer.fromfile(f, buffer_records)
+            except EOFError:
+                pass
+            if not buffer:
+                return
+            yield from buffer
+
+
+def _write_sorted_index(sorted_keys, path):
+    counts = [0] * 65536
+    count = 0
+    previous = None
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.seek(RECORDS_OFFSET)
+        buffer = bytearray()
+        for key in sorted_keys:
+            if key == previous:
+                continue
+            previous = key
+            counts[key >> 48] += 1
+            count += 1
+            buffer += RECORD.pack(key)
+            if len(buffer) >= 1 << 20:
+                f.write(buffer)
+                buffer.clear()
+        f.write(buffer)
+        fanout = [0]
+        for bucket_count in counts:
+            fanout.append(fanout[-1] + bucket_count)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, count))
+        f.write(FANOUT.pack(*fanout))
+    os.replace(tmp_path, path)
+    return count
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(path):
+    """
+    Return the index at path, opening it once per process.
+    """
+    if path not in _indexes:
+        with _indexes_lock:
+            if path not in _indexes:
+                _indexes[path] = BreachedPasswordIndex(path)
+    return _indexes[path]
+
+
+class BreachedPasswordValidator:
+    """
+    Validate that the password does not appear in the breached password
+    index at BREACHED_PASSWORD_INDEX.
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path
+
+    @property
+    def index(self):
+        path = self.index_path or settings.BREACHED_PASSWORD_INDEX
+        if not path:
+            raise ImproperlyConfigured(
+                "BreachedPasswordValidator requires BREACHED_PASSWORD_INDEX."
+            )
+        return get_index(path)
+
+    def validate(self, password, user=None):
+        if password_key(password) in self.index:
+            raise ValidationError(
+                "This password has appeared in a data breach.",
+                code="password_breached",
+            )
+
+    def get_help_text(self):
+        return "Your password can’t have appeared in a data breach."
@@ -0,0 +1,77 @@
+"""
+PostgreSQL backend that borrows connections from a per-process pool.
+
+Set ENGINE to "accounts.postgresql_pool" and keep CONN_MAX_AGE at 0: Django
+then returns the connection to the pool at the end of every request, and
+the next request, on whichever thread, reuses it without a new TCP, TLS and
+authentication handshake.
+"""
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+from accounts.db import ConnectionPool, PoolTimeout, get_pool
+
+
+def _is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def _reset(connection):
+    if connection.closed:
+        raise psycopg2.InterfaceError("connection already closed")
+    status = connection.get_transaction_status()
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+def make_pool(conn_params):
+    return ConnectionPool(
+        connect=lambda: psycopg2.connect(**conn_params),
+        size=settings.DB_POOL_SIZE,
+        timeout=settings.DB_POOL_TIMEOUT,
+        health_check_idle=settings.DB_HEALTH_CHECK_IDLE,
+        is_usable=_is_usable,
+        reset=_reset,
+        close=lambda connection: connection.close(),
+    )
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, conn_params, make_pool)
+        try:
+            connection = pool.acquire()
+        except PoolTimeout as e:
+            raise psycopg2.OperationalError(str(e)) from e
+        # Returned to this pool even if the alias has moved to another.
+        self.pool = pool
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(
+                    self.connection, discard=self.errors_occurred
+                )
@@ -0,0 +1,69 @@
+"""
+Read replica routing.
+
+ReplicaRouter sends writes to the "default" database and reads to one of
+DATABASE_REPLICAS, except where the reader could miss its own write:
+- inside a transaction on the primary
+- later in a request that has written
+- in any request carrying the pin cookie, which ReplicaPinMiddleware sets
+  for DB_REPLICA_PIN_SECONDS after a request that wrote, to cover the
+  replication lag before the redirect that usually follows
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PIN_COOKIE = "pin_primary"
+
+
+class PinState:
+    """
+    Whether the current request reads from the primary. Shared by reference,
+    so that a write in a thread serving an async view is seen by the
+    middleware.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar("accounts_replica_pin", default=None)
+
+
+def start_request(pinned):
+    state = PinState(pinned)
+    return state, _state.set(state)
+
+
+def finish_request(token):
+    _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            not settings.DATABASE_REPLICAS
+            or (state is not None and (state.pinned or state.wrote))
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,259 @@
+"""
+Cached sessions that are persisted to the database in the background.
+
+Reads are served from the cache and only fall back to the database when the
+cache has lost the session. Writes go to the cache immediately and are
+buffered for the database, which is updated in batches every
+SESSION_WRITE_BEHIND_INTERVAL seconds. A crashed worker loses at most one
+interval of session writes. An interval of 0 writes through synchronously.
+A batch that fails to be written is queued again for the next one.
+
+Deletes are written through at once, and leave a tombstone in the cache for
+SESSION_COOKIE_AGE, so that a save still buffered in another worker cannot
+bring the session back. This relies on every worker sharing the cache, so
+the write-behind interval requires a cache backend other than locmem or
+dummy (see check_shared_cache).
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore,
+)
+from django.core import checks
+from django.core.cache import caches
+from django.db import (
+    IntegrityError,
+    close_old_connections,
+    router,
+    transaction,
+)
+
+from .metrics import timing
+
+KEY_PREFIX = "accounts.sessions"
+
+TOMBSTONE_PREFIX = "accounts.sessions.deleted"
+
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+NOT_PENDING = object()
+
+logger = logging.getLogger(__name__)
+
+
+def tombstone_key(session_key):
+    return f"{TOMBSTONE_PREFIX}:{session_key}"
+
+
+def check_shared_cache(app_configs, **kwargs):
+    if (
+        settings.SESSION_ENGINE != __name__
+        or settings.SESSION_WRITE_BEHIND_INTERVAL <= 0
+    ):
+        return []
+    backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]["BACKEND"]
+    if backend not in LOCAL_CACHES:
+        return []
+    return [
+        checks.Error(
+            "SESSION_WRITE_BEHIND_INTERVAL needs a cache shared by every "
+            "worker.",
+            hint="Set CACHE_URL to Redis or Memcached, or set "
+            "SESSION_WRITE_BEHIND_INTERVAL to 0.",
+            id="accounts.E001",
+        )
+    ]
+
+
+class SessionWriter:
+    """
+    Buffers session saves and applies them to the database in batches. Only
+    the latest state of each session key is kept, so a session saved
+    several times within one interval costs a single write.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return getattr(settings, "SESSION_WRITE_BEHIND_INTERVAL", 1.0)
+
+    def enqueue(self, session_key, obj):
+        """
+        Queue a Session instance to be saved.
+        """
+        if self.interval <= 0:
+            self._apply({session_key: obj})
+            return
+        with self._lock:
+            self._pending[session_key] = obj
+            if self._thread is None:
+                self._start()
+
+    def get_pending(self, session_key, default=None):
+        with self._lock:
+            return self._pending.get(session_key, default)
+
+    def delete(self, session_key):
+        """
+        Delete a session from the database now, with any save of it that is
+        still waiting.
+        """
+        from django.contrib.sessions.models import Session
+
+        with self._lock:
+            self._pending.pop(session_key, None)
+        Session.objects.using(router.db_for_write(Session)).filter(
+            session_key=session_key
+        ).delete()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self._apply(pending)
+        except Exception:
+            # Try again with the next batch, unless a later save of the same
+            # session has been queued since.
+            with self._lock:
+                for session_key, obj in pending.items():
+                    self._pending.setdefault(session_key, obj)
+            raise
+
+    def _apply(self, pending):
+        from django.contrib.sessions.models import Session
+
+        deleted = caches[settings.SESSION_CACHE_ALIAS].get_many(
+            [tombstone_key(session_key) for session_key in pending]
+        )
+        saved = [
+            obj
+            for session_key, obj in pending.items()
+            if tombstone_key(session_key) not in deleted
+        ]
+        if not saved:
+            return
+        using = router.db_for_write(Session)
+        sessions = Session.objects.using(using)
+        fields = ["session_data", "expire_date"]
+        with transaction.atomic(using=using):
+            existing = set(
+                sessions.filter(
+                    session_key__in=[obj.pk for obj in saved]
+                ).values_list("session_key", flat=True)
+            )
+            sessions.bulk_update(
+                [obj for obj in saved if obj.pk in existing], fields
+            )
+            missing = [obj for obj in saved if obj.pk not in existing]
+            try:
+                with transaction.atomic(using=using):
+                    sessions.bulk_create(missing)
+            except IntegrityError:
+                # Another worker inserted some of them first.
+                sessions.bulk_create(missing, ignore_conflicts=True)
+                sessions.bulk_update(missing, fields)
+
+    def _start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="session-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered sessions")
+            finally:
+                close_old_connections()
+
+
+writer = SessionWriter()
+
+
+class SessionStore(CachedDBStore):
+    """
+    Implement cached sessions with write-behind database persistence.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    @timing("session")
+    def exists(self, session_key):
+        # Only used to avoid handing out a duplicate key when creating a
+        # session. Keys are random enough that skipping the database here is
+        # safe, and it keeps sign-in free of session table reads.
+        return bool(session_key) and (
+            self.cache_key_prefix + session_key in self._cache
+            or writer.get_pending(session_key, NOT_PENDING) is not NOT_PENDING
+        )
+
+    @timing("session")
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            # Some backends (e.g. memcache) raise an exception on invalid
+            # cache keys. If this happens, reset the session.
+            data = None
+        if data is not None:
+            return data
+        # The cache may have evicted a session that is still waiting to be
+        # written, so check the buffer before the database.
+        obj = writer.get_pending(self.session_key, default=NOT_PENDING)
+        if obj is NOT_PENDING or self._cache.get(
+            tombstone_key(self.session_key)
+        ):
+            obj = self._get_session_from_db()
+        if obj is None:
+            self._session_key = None
+            return {}
+        data = self.decode(obj.session_data)
+        self._cache.set(
+            self.cache_key, data, self.get_expiry_age(expiry=obj.expire_date)
+        )
+        return data
+
+    @timing("session")
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if must_create:
+            if not self._cache.add(
+                self.cache_key, data, self.get_expiry_age()
+            ):
+                raise CreateError
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+        writer.enqueue(self.session_key, self.create_model_instance(data))
+
+    @timing("session")
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.set(
+            tombstone_key(session_key), True, settings.SESSION_COOKIE_AGE
+        )
+        self._cache.delete(self.cache_key_prefix + session_key)
+        writer.delete(session_key)
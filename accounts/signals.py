@@ -0,0 +1,66 @@
+import ipaddress
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .availability import FIELDS, taken_filter
+from .last_login import writer
+from .models import CustomUser, LoginEvent, hash_session_key
+from .throttling import client_ip
+from .user_cache import invalidate_user
+
+
+def parse_ip(value):
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+@receiver(user_logged_in)
+def record_login(sender, request, user, **kwargs):
+    """
+    Record the sign-in, buffered with the last_login update when
+    LAST_LOGIN_WRITE_BEHIND_INTERVAL is above 0.
+    """
+    if request is None:
+        return
+    session_key = request.session.session_key
+    event = LoginEvent(
+        user=user,
+        ip_address=parse_ip(client_ip(request)),
+        user_agent=request.META.get("HTTP_USER_AGENT", "")[:255],
+        session_key_hash=hash_session_key(session_key) if session_key else "",
+    )
+    if settings.LAST_LOGIN_WRITE_BEHIND_INTERVAL > 0:
+        writer.enqueue_event(event)
+    else:
+        event.save()
+
+
+@receiver(user_logged_in, dispatch_uid="accounts.update_last_login")
+def update_last_login(sender, request, user, **kwargs):
+    """
+    Replaces django.contrib.auth.models.update_last_login, buffering the
+    update when LAST_LOGIN_WRITE_BEHIND_INTERVAL is above 0.
+    """
+    user.last_login = timezone.now()
+    if settings.LAST_LOGIN_WRITE_BEHIND_INTERVAL > 0:
+        writer.enqueue(user.pk, user.last_login)
+    else:
+        user.save(update_fields=["last_login"])
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def add_to_taken_filter(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or not set(update_fields).isdisjoint(FIELDS):
+        taken_filter.add_user(instance)
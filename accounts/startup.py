@@ -0,0 +1,122 @@
+"""
+Import profiling for the profile_startup command.
+
+Run as ``python -m accounts.startup config.wsgi`` in a fresh interpreter. It
+imports the given module and prints, as JSON, the time and resident memory
+each module added while it was imported, not counting the modules it
+imported in turn, like ``python -X importtime`` but with memory as well.
+"""
+
+import importlib
+import json
+import os
+import sys
+import time
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+
+        # The peak rather than the current size, outside Linux.
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+class ImportProfiler:
+    """
+    A meta path finder that wraps the loader of every module found by the
+    other finders, to time module creation and execution.
+    """
+
+    def __init__(self):
+        self.modules = {}
+        # Time and memory used by nested imports, per import in progress.
+        self._stack = []
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, "exec_module"):
+            spec.loader = ProfilingLoader(self, spec.loader)
+        return spec
+
+    def measure(self, name, func, *args):
+        self._stack.append([0.0, 0])
+        started = time.perf_counter()
+        rss = rss_kb()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            grown = rss_kb() - rss
+            nested_time, nested_rss = self._stack.pop()
+            seconds, kb = self.modules.get(name, (0.0, 0))
+            self.modules[name] = (
+                seconds + elapsed - nested_time,
+                kb + grown - nested_rss,
+            )
+            if self._stack:
+                self._stack[-1][0] += elapsed
+                self._stack[-1][1] += grown
+
+
+class ProfilingLoader:
+    def __init__(self, profiler, loader):
+        self.profiler = profiler
+        self.loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        # Extension modules are loaded and initialised here.
+        return self.profiler.measure(
+            spec.name, self.loader.create_module, spec
+        )
+
+    def exec_module(self, module):
+        try:
+            self.profiler.measure(
+                module.__name__, self.loader.exec_module, module
+            )
+        finally:
+            # Leave nothing behind that could change how the module behaves
+            # once imported.
+            module.__loader__ = self.loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+
+
+def profile(module_name):
+    profiler = ImportProfiler()
+    rss_before = rss_kb()
+    started = time.perf_counter()
+    sys.meta_path.insert(0, profiler)
+    try:
+        importlib.import_module(module_name)
+    finally:
+        sys.meta_path.remove(profiler)
+    return {
+        "seconds": time.perf_counter() - started,
+        "rss_before_kb": rss_before,
+        "rss_after_kb": rss_kb(),
+        "modules": [
+            [name, seconds, kb]
+            for name, (seconds, kb) in profiler.modules.items()
+        ],
+    }
+
+
+if __name__ == "__main__":
+    json.dump(profile(sys.argv[1]), sys.stdout)
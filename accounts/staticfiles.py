@@ -0,0 +1,154 @@
+"""
+WSGI middleware serving STATIC_ROOT, for deployments without Nginx in front.
+
+Files are listed once at startup. Names in the manifest written by
+CompressedManifestStaticFilesStorage contain a hash of their content, so they
+are served as immutable for a year; other files are cached briefly. Where
+the client accepts it, the brotli or gzip copy written by collectstatic is
+sent instead of the file.
+"""
+
+import json
+import mimetypes
+import os
+from wsgiref.util import FileWrapper
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 60
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or "application/octet-stream"
+        )
+        if self.content_type.startswith("text/") or self.content_type in (
+            "application/javascript",
+            "application/json",
+        ):
+            self.content_type += "; charset=utf-8"
+        self.cache_control = (
+            f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+            if immutable
+            else f"public, max-age={DEFAULT_MAX_AGE}"
+        )
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants[encoding] = self.stat(path + suffix)
+        self.identity = self.stat(path)
+
+    def stat(self, path):
+        stat = os.stat(path)
+        return path, stat.st_size, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def choose(self, accept_encoding):
+        """
+        Return (path, size, etag, content encoding) of the copy to send.
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        # The highest q-value wins, then the order of ENCODINGS.
+        candidates = [
+            (accepted.get(encoding, accepted.get("*", 0)), -i, encoding)
+            for i, (encoding, _) in enumerate(ENCODINGS)
+            if encoding in self.variants
+        ]
+        if candidates:
+            q, _, encoding = max(candidates)
+            if q > 0:
+                return self.variants[encoding] + (encoding,)
+        return self.identity + (None,)
+
+
+def parse_accept_encoding(accept_encoding):
+    """
+    Return a dict of each coding in an Accept-Encoding header to its q-value.
+    A coding with a malformed q-value counts as not accepted.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, "staticfiles.json")) as f:
+            return set(json.load(f)["paths"].values())
+    except (OSError, ValueError, KeyError):
+        return set()
+
+
+def scan(root):
+    hashed = read_manifest(root)
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(suffixes) or filename == "staticfiles.json":
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            files[name] = StaticFile(path, name in hashed)
+    return files
+
+
+class StaticFilesApplication:
+    """
+    Serve GET and HEAD requests for files under prefix from root, and pass
+    every other request to application.
+    """
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.prefix = "/" + prefix.strip("/") + "/"
+        self.files = scan(root) if os.path.isdir(root) else {}
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        method = environ["REQUEST_METHOD"]
+        if method in ("GET", "HEAD") and path.startswith(self.prefix):
+            static_file = self.files.get(path[len(self.prefix) :])
+            if static_file is not None:
+                return self.serve(static_file, environ, start_response)
+        return self.application(environ, start_response)
+
+    def serve(self, static_file, environ, start_response):
+        path, size, etag, encoding = static_file.choose(
+            environ.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        headers = [
+            ("Cache-Control", static_file.cache_control),
+            ("ETag", etag),
+        ]
+        if static_file.variants:
+            headers.append(("Vary", "Accept-Encoding"))
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            start_response("304 Not Modified", headers)
+            return []
+        headers.append(("Content-Type", static_file.content_type))
+        headers.append(("Content-Length", str(size)))
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+        start_response("200 OK", headers)
+        if environ["REQUEST_METHOD"] == "HEAD":
+            return []
+        file_wrapper = environ.get("wsgi.file_wrapper", FileWrapper)
+        return file_wrapper(open(path, "rb"))
@@ -0,0 +1,63 @@
+"""
+Static files storage that adds precompressed variants.
+
+After ManifestStaticFilesStorage has stored each file under a content-hashed
+name, every compressible file is also written gzipped (name.gz) and, when
+the optional brotli package is installed, brotli compressed (name.br), so
+Nginx's gzip_static or accounts.staticfiles can serve them without
+compressing on each request.
+"""
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".map",
+    ".svg",
+    ".json",
+    ".txt",
+    ".html",
+    ".xml",
+    ".ico",
+)
+
+# Below this size the compressed file saves too little to be worth serving.
+MIN_SIZE = 200
+
+
+def compress(path):
+    """
+    Write the compressed variants of the file at path where they are
+    smaller than the file itself.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    if len(content) < MIN_SIZE:
+        return
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(content)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in names:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress(self.path(name))
@@ -0,0 +1,26 @@
+from django import template
+from django.utils.html import format_html
+
+from accounts.assets import ASSETS, asset_url
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def stylesheet(name):
+    return format_html(
+        '<link rel="stylesheet" href="{}" integrity="{}" '
+        'crossorigin="anonymous">',
+        asset_url(name),
+        ASSETS[name].integrity,
+    )
+
+
+@register.simple_tag
+def script(name):
+    return format_html(
+        '<script src="{}" integrity="{}" crossorigin="anonymous"></script>',
+        asset_url(name),
+        ASSETS[name].integrity,
+    )
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.admin import CustomUserAdmin, EstimatedCountPaginator
+from accounts.models import CustomUser
+
+
+class CustomUserAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = CustomUser.objects.create_superuser(
+            username="admin", email="admin@email.com", password="wibble1234"
+        )
+        CustomUser.objects.bulk_create(
+            [
+                CustomUser(
+                    username=f"user{i:02}",
+                    email=f"user{i:02}@email.com",
+                    position="Songwriter" if i == 7 else "Tester",
+                )
+                for i in range(25)
+            ]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.url = reverse("admin:accounts_customuser_changelist")
+        patcher = mock.patch.object(CustomUserAdmin, "list_per_page", 10)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def usernames(self, response):
+        return [user.username for user in response.context["cl"].result_list]
+
+    def test_changelist_pages_by_keyset(self):
+        response = self.client.get(self.url)
+        cl = response.context["cl"]
+        self.assertTrue(cl.keyset)
+        self.assertEqual(cl.result_count, 26)
+        self.assertIsNone(cl.keyset_first_url)
+        self.assertEqual(self.usernames(response)[0], "admin")
+        self.assertEqual(cl.keyset_next_url, "?after=user08")
+
+        response = self.client.get(self.url + cl.keyset_next_url)
+        cl = response.context["cl"]
+        self.assertEqual(
+            self.usernames(response), [f"user{i:02}" for i in range(9, 19)]
+        )
+        self.assertEqual(cl.keyset_first_url, "?")
+        self.assertContains(response, "Next")
+
+        response = self.client.get(self.url, {"after": "user18"})
+        cl = response.context["cl"]
+        self.assertEqual(len(self.usernames(response)), 6)
+        self.assertIsNone(cl.keyset_next_url)
+
+    def test_keyset_page_fetches_its_rows_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url, {"after": "user08"})
+        pages = [
+            query["sql"]
+            for query in context.captured_queries
+            if "LIMIT" in query["sql"] and '"username" >' in query["sql"]
+        ]
+        self.assertEqual(len(pages), 1, pages)
+
+    def test_invalid_keyset_value_is_rejected(self):
+        with mock.patch.object(CustomUserAdmin, "ordering", ("-id",)):
+            response = self.client.get(self.url, {"after": "user08"})
+        self.assertRedirects(response, f"{self.url}?e=1")
+
+    def test_changelist_sorted_by_other_column_uses_page_numbers(self):
+        response = self.client.get(self.url, {"o": "2"})
+        self.assertFalse(response.context["cl"].keyset)
+
+    def test_search_includes_position(self):
+        response = self.client.get(self.url, {"q": "songwriter"})
+        self.assertEqual(self.usernames(response), ["user07"])
+
+    def test_paginator_uses_estimate_above_limit(self):
+        queryset = CustomUser.objects.order_by("pk")
+        with mock.patch("accounts.admin.estimate_count", return_value=50000):
+            paginator = EstimatedCountPaginator(queryset, 10)
+            self.assertEqual(paginator.count, 50000)
+            self.assertTrue(paginator.estimated)
+        with mock.patch("accounts.admin.estimate_count", return_value=100):
+            paginator = EstimatedCountPaginator(queryset, 10)
+            self.assertEqual(paginator.count, 26)
+            self.assertFalse(paginator.estimated)
@@ -0,0 +1,215 @@
+import datetime
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser, RevokedToken
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        testuser = CustomUser.objects.create(
+            username="testuser",
+            email="testuser@email.com",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+        )
+        testuser.set_password("wibble1234")
+        testuser.save()
+        cls.testuser = testuser
+
+    def post(self, name, data):
+        return self.client.post(
+            reverse(name), json.dumps(data), content_type="application/json"
+        )
+
+    def login(self):
+        response = self.post(
+            "api_login", {"username": "testuser", "password": "wibble1234"}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def refresh(self, token):
+        return self.post("api_refresh", {"refresh_token": token})
+
+    def get_profile(self, access, **extra):
+        return self.client.get(
+            reverse("api_profile"),
+            HTTP_AUTHORIZATION=f"Bearer {access}",
+            **extra,
+        )
+
+    def patch_profile(self, access, data, **extra):
+        return self.client.patch(
+            reverse("api_profile"),
+            json.dumps(data),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {access}",
+            **extra,
+        )
+
+    def test_login(self):
+        tokens = self.login()
+        self.assertEqual(tokens["token_type"], "Bearer")
+        self.assertEqual(tokens["expires_in"], 300)
+        self.testuser.refresh_from_db()
+        self.assertIsNotNone(self.testuser.last_login)
+        self.assertNotIn("sessionid", self.client.cookies)
+
+    def test_login_failure(self):
+        response = self.post(
+            "api_login", {"username": "testuser", "password": "wrong"}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "invalid_grant"})
+
+    def test_non_string_fields_are_rejected(self):
+        for data in (
+            {"username": "testuser", "password": 1234},
+            {"username": ["testuser"], "password": "wibble1234"},
+            {"username": "testuser", "password": None},
+        ):
+            with self.subTest(data):
+                response = self.post("api_login", data)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "invalid_request"})
+        for name in ("api_refresh", "api_logout"):
+            with self.subTest(name):
+                response = self.post(name, {"refresh_token": 1})
+                self.assertEqual(response.status_code, 400)
+
+    def test_malformed_body(self):
+        response = self.client.post(
+            reverse("api_login"), "[1", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_access_token_is_checked_without_the_database(self):
+        access = self.login()["access_token"]
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_profile(access)
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(response.json()["position"], "Tester")
+        self.assertEqual(response.json()["id"], self.testuser.pk)
+
+    def test_bad_access_token(self):
+        for header in ("", "Bearer", "Bearer nonsense", "Basic abc"):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    reverse("api_profile"), HTTP_AUTHORIZATION=header
+                )
+                self.assertEqual(response.status_code, 401)
+                self.assertIn("WWW-Authenticate", response)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        refresh = self.login()["refresh_token"]
+        self.assertEqual(self.get_profile(refresh).status_code, 401)
+
+    @override_settings(API_ACCESS_TOKEN_SECONDS=-1)
+    def test_expired_access_token(self):
+        access = self.login()["access_token"]
+        self.assertEqual(self.get_profile(access).status_code, 401)
+
+    def test_refresh_rotates(self):
+        first = self.login()
+        response = self.refresh(first["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        second = response.json()
+        self.assertNotEqual(second["refresh_token"], first["refresh_token"])
+        self.assertEqual(
+            self.get_profile(second["access_token"]).status_code, 200
+        )
+        self.assertEqual(
+            self.refresh(second["refresh_token"]).status_code, 200
+        )
+
+    def test_reusing_a_refresh_token_revokes_its_family(self):
+        first = self.login()
+        second = self.refresh(first["refresh_token"]).json()
+        other = self.login()
+        self.assertEqual(self.refresh(first["refresh_token"]).status_code, 401)
+        self.assertEqual(
+            self.refresh(second["refresh_token"]).status_code, 401
+        )
+        self.assertEqual(self.refresh(other["refresh_token"]).status_code, 200)
+
+    def test_logout(self):
+        tokens = self.login()
+        response = self.post(
+            "api_logout", {"refresh_token": tokens["refresh_token"]}
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.refresh(tokens["refresh_token"]).status_code, 401
+        )
+
+    def test_password_change_ends_refresh_tokens(self):
+        tokens = self.login()
+        self.testuser.set_password("wobble5678!")
+        self.testuser.save()
+        self.assertEqual(
+            self.refresh(tokens["refresh_token"]).status_code, 401
+        )
+
+    def test_inactive_user(self):
+        tokens = self.login()
+        CustomUser.objects.filter(pk=self.testuser.pk).update(is_active=False)
+        self.assertEqual(
+            self.get_profile(tokens["access_token"]).status_code, 401
+        )
+        self.assertEqual(
+            self.refresh(tokens["refresh_token"]).status_code, 401
+        )
+
+    def test_patch(self):
+        access = self.login()["access_token"]
+        etag = self.get_profile(access)["ETag"]
+        response = self.patch_profile(
+            access, {"position": "Developer"}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["position"], "Developer")
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            CustomUser.objects.get(pk=self.testuser.pk).username, "testuser"
+        )
+
+        response = self.patch_profile(
+            access, {"position": "Manager"}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 412)
+        self.testuser.refresh_from_db()
+        self.assertEqual(self.testuser.position, "Developer")
+
+    def test_patch_validation_errors(self):
+        CustomUser.objects.create(username="other", email="other@email.com")
+        access = self.login()["access_token"]
+        response = self.patch_profile(access, {"email": "OTHER@email.com"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "invalid")
+        self.assertIn("email", response.json()["fields"])
+
+    def test_clear_revoked_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(
+            jti="old", expires_at=now - datetime.timedelta(days=1)
+        )
+        RevokedToken.objects.create(
+            jti="new", expires_at=now + datetime.timedelta(days=1)
+        )
+        call_command("clear_revoked_tokens", stdout=StringIO())
+        self.assertQuerysetEqual(
+            RevokedToken.objects.all(), ["new"], lambda token: token.jti
+        )
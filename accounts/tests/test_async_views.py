@@ -0,0 +1,178 @@
+import json
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser, LoginEvent
+
+
+@override_settings(ROOT_URLCONF="config.asgi_urls")
+class TestAsyncViews(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.testuser = CustomUser.objects.create(
+            username="testuser",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+            email="testuser@email.com",
+        )
+        cls.testuser.set_password("wibble1234")
+        cls.testuser.save()
+
+    async def test_login_view_uses_correct_template(self):
+        response = await self.async_client.get(reverse("login"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "registration/login.html")
+
+    async def test_login_view_signs_in(self):
+        response = await self.post(
+            reverse("login"),
+            {"username": "testuser", "password": "wibble1234"},
+        )
+        self.assertRedirects(
+            response, reverse("home"), fetch_redirect_response=False
+        )
+        self.assertIn("_auth_user_id", await self.session_keys())
+
+    async def test_login_view_with_wrong_password(self):
+        response = await self.post(
+            reverse("login"),
+            {"username": "testuser", "password": "wrong"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+
+    async def test_logout_view_signs_out(self):
+        await self.post(
+            reverse("login"),
+            {"username": "testuser", "password": "wibble1234"},
+        )
+        response = await self.async_client.get(reverse("logout"))
+        self.assertRedirects(
+            response, reverse("home"), fetch_redirect_response=False
+        )
+        self.assertNotIn("_auth_user_id", await self.session_keys())
+
+    async def test_register_view_uses_correct_template(self):
+        response = await self.async_client.get(reverse("register"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "registration/register.html")
+
+    async def test_register_view_creates_user(self):
+        response = await self.post(
+            reverse("register"),
+            {
+                "username": "newuser",
+                "email": "newuser@email.com",
+                "first_name": "New",
+                "last_name": "User",
+                "position": "Tester",
+                "password1": "testpassword",
+                "password2": "testpassword",
+            },
+        )
+        self.assertRedirects(
+            response, reverse("login"), fetch_redirect_response=False
+        )
+
+    async def test_user_update_view_uses_correct_template(self):
+        response = await self.async_client.get(
+            reverse("user_update", args=[self.testuser.id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "registration/user_update_form.html")
+
+    async def test_user_update_view_saves_changes(self):
+        response = await self.post(
+            reverse("user_update", args=[self.testuser.id]),
+            {
+                "username": "testuser",
+                "email": "testuser@email.com",
+                "first_name": "Changed",
+                "last_name": "User",
+                "position": "Tester",
+            },
+        )
+        self.assertRedirects(
+            response, reverse("home"), fetch_redirect_response=False
+        )
+
+    async def test_personal_data_export_through_asgi_handler(self):
+        await sync_to_async(self.client.force_login)(self.testuser)
+        await sync_to_async(LoginEvent.objects.bulk_create)(
+            [LoginEvent(user=self.testuser) for _ in range(3)]
+        )
+        cookie = f"sessionid={self.client.cookies['sessionid'].value}"
+        status, body = await self.asgi_get(reverse("user_export"), cookie)
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertEqual(data["profile"]["username"], "testuser")
+        self.assertEqual(len(data["logins"]), 4)
+        self.assertEqual(len(data["sessions"]), 1)
+
+    async def test_personal_data_export_requires_sign_in(self):
+        status, _ = await self.asgi_get(reverse("user_export"))
+        self.assertEqual(status, 302)
+
+    async def asgi_get(self, path, cookie=""):
+        """
+        Serve a GET through the real ASGIHandler and return the status and
+        the whole body.
+        """
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"cookie", cookie.encode()),
+            ],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 12345),
+        }
+        # As the test client does, keep the handler from closing the test
+        # transaction's connection.
+        request_started.disconnect(close_old_connections)
+        try:
+            await ASGIHandler()(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+        status = messages[0]["status"]
+        body = b"".join(
+            message.get("body", b"")
+            for message in messages
+            if message["type"] == "http.response.body"
+        )
+        return status, body
+
+    async def post(self, path, data):
+        # The async test client in Django 3.1 cannot read back multipart
+        # bodies, so post the form urlencoded as a browser would.
+        return await self.async_client.post(
+            path,
+            urlencode(data),
+            content_type="application/x-www-form-urlencoded",
+        )
+
+    async def session_keys(self):
+        return await sync_to_async(
+            lambda: list(self.async_client.session.keys())
+        )()
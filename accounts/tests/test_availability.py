@@ -0,0 +1,142 @@
+import time
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts import availability
+from accounts.availability import (
+    BloomFilter,
+    TakenFilter,
+    filter_key,
+    is_available,
+    taken_filter,
+)
+from accounts.forms import CustomUserUpdateForm
+from accounts.models import CustomUser
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(10000, 0.01)
+        for i in range(10000):
+            bloom.add(f"user{i}")
+        self.assertTrue(all(f"user{i}" in bloom for i in range(10000)))
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 200)
+
+
+@override_settings(AVAILABILITY_FILTER_REFRESH_SECONDS=60)
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.testuser = CustomUser.objects.create(
+            username="testuser",
+            email="testuser@email.com",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+        )
+
+    def setUp(self):
+        taken_filter.clear()
+        self.addCleanup(taken_filter.clear)
+        # Update in the request thread, which can see the test's data.
+        patcher = mock.patch.object(
+            TakenFilter, "_start_update", TakenFilter.update
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def check(self, **query):
+        response = self.client.get(reverse("user_availability"), query)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["available"]
+
+    def test_endpoint(self):
+        self.assertFalse(self.check(username="TestUser"))
+        self.assertFalse(self.check(email="TESTUSER@email.com"))
+        self.assertTrue(self.check(username="newuser"))
+        self.assertTrue(self.check(email="newuser@email.com"))
+        response = self.client.get(reverse("user_availability"))
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(AVAILABILITY_FILTER_REFRESH_SECONDS=0)
+    def test_without_the_filter(self):
+        self.assertFalse(self.check(username="testuser"))
+        self.assertTrue(self.check(username="newuser"))
+        self.assertIsNone(taken_filter._bloom)
+
+    def test_available_values_are_answered_without_the_database(self):
+        is_available("username", "testuser")
+        with self.assertNumQueries(0):
+            for i in range(100):
+                self.assertTrue(is_available("username", f"newuser{i}"))
+        with self.assertNumQueries(1):
+            self.assertFalse(is_available("username", "testuser"))
+
+    def test_new_and_renamed_users_are_added(self):
+        is_available("username", "testuser")
+        CustomUser.objects.create(username="newuser")
+        self.assertFalse(is_available("username", "newuser"))
+
+        form = CustomUserUpdateForm(
+            {
+                "username": "renamed",
+                "email": "testuser@email.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "position": "Tester",
+            },
+            instance=self.testuser,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertFalse(is_available("username", "renamed"))
+        self.assertTrue(is_available("username", "testuser"))
+
+    def test_users_added_elsewhere_are_fetched_on_refresh(self):
+        is_available("username", "testuser")
+        CustomUser.objects.bulk_create([CustomUser(username="imported")])
+        self.assertNotIn(
+            filter_key("username", "imported"), taken_filter._bloom
+        )
+        taken_filter._refreshed_at -= 60
+        self.assertFalse(is_available("username", "imported"))
+        self.assertIn(filter_key("username", "imported"), taken_filter._bloom)
+
+    def test_users_saved_while_building_are_kept(self):
+        def build(*args):
+            # As if saved by another thread, after its row was read.
+            taken_filter.add_user(CustomUser(pk=1000, username="newuser"))
+            return BloomFilter(*args)
+
+        with mock.patch.object(availability, "BloomFilter", build):
+            taken_filter.update()
+        self.assertIn(filter_key("username", "newuser"), taken_filter._bloom)
+
+    def test_checks_go_to_the_database_until_the_filter_is_built(self):
+        with mock.patch.object(TakenFilter, "_start_update") as start:
+            with self.assertNumQueries(1):
+                self.assertTrue(is_available("username", "newuser"))
+            with self.assertNumQueries(1):
+                self.assertFalse(is_available("username", "testuser"))
+        start.assert_called_with()
+        self.assertIsNone(taken_filter._bloom)
+
+
+@override_settings(AVAILABILITY_FILTER_REFRESH_SECONDS=60)
+class BackgroundUpdateTests(TransactionTestCase):
+    def setUp(self):
+        taken_filter.clear()
+        self.addCleanup(taken_filter.clear)
+
+    def test_filter_is_built_in_a_background_thread(self):
+        CustomUser.objects.create(username="testuser")
+        self.assertFalse(is_available("username", "testuser"))
+        deadline = time.monotonic() + 5
+        while taken_filter._updating and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn(filter_key("username", "testuser"), taken_filter._bloom)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_available("username", "newuser"))
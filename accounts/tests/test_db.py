@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from accounts import db
+from accounts.db import (
+    ConnectionPool,
+    PoolTimeout,
+    check_reused_connections,
+    get_pool,
+)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.usable = True
+        self.closed = False
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, size=2, health_check_idle=0):
+        self.opened = []
+
+        def connect():
+            connection = FakeConnection()
+            self.opened.append(connection)
+            return connection
+
+        def close(connection):
+            connection.closed = True
+
+        return ConnectionPool(
+            connect=connect,
+            size=size,
+            timeout=0.01,
+            health_check_idle=health_check_idle,
+            is_usable=lambda connection: connection.usable,
+            reset=lambda connection: None,
+            close=close,
+        )
+
+    def test_reuses_released_connections(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_replaces_dropped_connections(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.usable = False
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+
+    def test_skips_health_check_for_recently_used_connections(self):
+        pool = self.make_pool(health_check_idle=60)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.usable = False
+        self.assertIs(pool.acquire(), connection)
+
+    def test_discards_connections_after_errors(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.release(connection, discard=True)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.acquire(), connection)
+
+    def test_waits_for_a_free_connection(self):
+        pool = self.make_pool(size=1)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_retired_pools_close_connections(self):
+        pool = self.make_pool()
+        idle, in_use = pool.acquire(), pool.acquire()
+        pool.release(idle)
+        pool.retire()
+        self.assertTrue(idle.closed)
+        pool.release(in_use)
+        self.assertTrue(in_use.closed)
+
+
+class GetPoolTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(db._pools, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reuses_the_pool_for_the_same_params(self):
+        make_pool = mock.Mock()
+        pool = get_pool("default", {"dbname": "app"}, make_pool)
+        self.assertIs(get_pool("default", {"dbname": "app"}, make_pool), pool)
+        make_pool.assert_called_once_with({"dbname": "app"})
+
+    def test_replaces_the_pool_when_params_change(self):
+        make_pool = mock.Mock(side_effect=lambda params: mock.Mock())
+        old = get_pool("default", {"dbname": "app"}, make_pool)
+        new = get_pool("default", {"dbname": "test_app"}, make_pool)
+        self.assertIsNot(new, old)
+        old.retire.assert_called_once_with()
+        new.retire.assert_not_called()
+        self.assertIs(
+            get_pool("default", {"dbname": "test_app"}, make_pool), new
+        )
+
+    def test_keeps_a_pool_per_alias(self):
+        make_pool = mock.Mock(side_effect=lambda params: mock.Mock())
+        default = get_pool("default", {"dbname": "app"}, make_pool)
+        other = get_pool("other", {"dbname": "app"}, make_pool)
+        self.assertIsNot(other, default)
+        default.retire.assert_not_called()
+
+
+class CheckReusedConnectionsTests(SimpleTestCase):
+    @override_settings(DB_HEALTH_CHECK_IDLE=0)
+    def test_closes_dropped_connections(self):
+        connection = mock.Mock()
+        connection.is_usable.return_value = False
+        with mock.patch("accounts.db.connections") as connections:
+            connections.all.return_value = [connection]
+            check_reused_connections()
+        connection.close.assert_called_once_with()
@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Group
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.deletion import SESSIONS, purge_next_batch
+from accounts.models import AccountDeletion, CustomUser, LoginEvent
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+)
+class AccountDeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        testuser = CustomUser.objects.create(username="testuser")
+        testuser.set_password("wibble1234")
+        testuser.save()
+        testuser.groups.add(Group.objects.create(name="testers"))
+        LoginEvent.objects.bulk_create(
+            [LoginEvent(user=testuser) for _ in range(5)]
+        )
+        LogEntry.objects.log_action(
+            testuser.pk, None, None, "", ADDITION, change_message="Added"
+        )
+        cls.testuser = testuser
+        cls.other = CustomUser.objects.create(username="other")
+        LoginEvent.objects.create(user=cls.other)
+
+    def setUp(self):
+        self.client.login(username="testuser", password="wibble1234")
+
+    def delete_account(self, password="wibble1234"):
+        return self.client.post(reverse("user_delete"), {"password": password})
+
+    def test_wrong_password(self):
+        response = self.delete_account("wrong")
+        self.assertContains(response, "entered incorrectly")
+        self.assertFalse(AccountDeletion.objects.exists())
+        self.testuser.refresh_from_db()
+        self.assertTrue(self.testuser.is_active)
+
+    def test_deletion_is_immediate_for_the_user(self):
+        other_session = Client()
+        other_session.login(username="testuser", password="wibble1234")
+        response = self.delete_account()
+        self.assertRedirects(response, reverse("user_delete_done"))
+        self.testuser.refresh_from_db()
+        self.assertFalse(self.testuser.is_active)
+        self.assertFalse(self.testuser.has_usable_password())
+        self.assertContains(
+            other_session.get(reverse("home")), "You are not signed in"
+        )
+        self.assertFalse(
+            self.client.login(username="testuser", password="wibble1234")
+        )
+
+    def test_purge_in_batches(self):
+        self.delete_account()
+        deletion = AccountDeletion.objects.get()
+        batches = 0
+        while purge_next_batch(batch_size=2) is not None:
+            batches += 1
+        # Session keys, login events, log entries, group links, the user.
+        self.assertGreater(batches, 5)
+        deletion.refresh_from_db()
+        self.assertIsNotNone(deletion.completed_at)
+        self.assertEqual(deletion.progress[SESSIONS]["rows"], 1)
+        self.assertEqual(
+            deletion.progress["accounts.LoginEvent.user"]["rows"], 6
+        )
+        self.assertEqual(deletion.progress["admin.LogEntry.user"]["rows"], 1)
+        self.assertEqual(
+            deletion.progress["accounts.CustomUser_groups.customuser"]["rows"],
+            1,
+        )
+        self.assertEqual(deletion.progress["accounts.CustomUser"]["rows"], 1)
+        self.assertFalse(
+            CustomUser.objects.filter(pk=self.testuser.pk).exists()
+        )
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(LoginEvent.objects.get().user, self.other)
+        self.assertFalse(LogEntry.objects.exists())
+        self.assertTrue(Group.objects.exists())
+
+    def test_interrupted_purge_resumes(self):
+        self.delete_account()
+        # Sessions, log entries, group and permission links, then the first
+        # two login events.
+        for _ in range(5):
+            purge_next_batch(batch_size=2)
+        progress = AccountDeletion.objects.get().progress
+        self.assertEqual(progress["accounts.LoginEvent.user"]["rows"], 2)
+        self.assertFalse(progress["accounts.LoginEvent.user"]["done"])
+
+        out = StringIO()
+        call_command("purge_deleted_accounts", sleep=0, stdout=out)
+        self.assertIn("Completed 1 account deletions.", out.getvalue())
+        progress = AccountDeletion.objects.get().progress
+        self.assertEqual(progress["accounts.LoginEvent.user"]["rows"], 6)
+        self.assertFalse(
+            CustomUser.objects.filter(pk=self.testuser.pk).exists()
+        )
+        self.assertIsNone(purge_next_batch(batch_size=2))
@@ -1,6 +1,7 @@
 from django.test import TestCase, SimpleTestCase
 
 from accounts.forms import CustomUserCreationForm, CustomUserUpdateForm
+from accounts.models import CustomUser
 
 
 class CustomUserCreationFormTests(TestCase):
@@ -203,3 +204,62 @@ class CustomUserUpdateFormTests(TestCase):
         self.assertEqual(form.errors["last_name"], ["This field is required."])
         self.assertEqual(form.errors["position"], ["This field is required."])
         self.assertFalse(form.is_valid())
+
+
+class CaseInsensitiveUniqueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.testuser = CustomUser.objects.create(
+            username="testuser",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+            email="testuser@email.com",
+        )
+
+    def test_creation_form_rejects_username_differing_in_case(self):
+        form = CustomUserCreationForm(
+            {
+                "username": "TestUser",
+                "email": "other@email.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "position": "Tester",
+                "password1": "testpassword",
+                "password2": "testpassword",
+            }
+        )
+        self.assertEqual(
+            form.errors["username"],
+            ["A user with that username already exists."],
+        )
+
+    def test_creation_form_rejects_email_differing_in_case(self):
+        form = CustomUserCreationForm(
+            {
+                "username": "otheruser",
+                "email": "TestUser@Email.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "position": "Tester",
+                "password1": "testpassword",
+                "password2": "testpassword",
+            }
+        )
+        self.assertEqual(
+            form.errors["email"],
+            ["A user with that email address already exists."],
+        )
+
+    def test_update_form_accepts_own_username_and_email(self):
+        form = CustomUserUpdateForm(
+            {
+                "username": "TESTUSER",
+                "email": "TESTUSER@email.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "position": "Tester",
+            },
+            instance=self.testuser,
+        )
+        self.assertTrue(form.is_valid())
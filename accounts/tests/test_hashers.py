@@ -0,0 +1,170 @@
+import itertools
+import os
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from accounts import metrics
+from accounts.hashers import HashingPool, HashingPoolSaturated, load_policy
+from accounts.models import CustomUser
+from config import gunicorn
+
+POOLED_HASHERS = ["accounts.hashers.PooledPBKDF2PasswordHasher"]
+CALIBRATED_HASHERS = ["accounts.hashers.CalibratedPBKDF2PasswordHasher"]
+
+
+class HashingPoolTests(SimpleTestCase):
+    def test_run_returns_result_and_records_stats(self):
+        pool = HashingPool(size=2, queue_depth=0)
+        self.assertEqual(pool.run(sum, [1, 2]), 3)
+        stats = pool.stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["rejected"], 0)
+        self.assertGreaterEqual(stats["mean_hash_ms"], 0)
+        self.assertGreaterEqual(stats["mean_wait_ms"], 0)
+
+    def test_run_adds_wait_and_hash_time_to_request_timer(self):
+        pool = HashingPool(size=1, queue_depth=0)
+        timer, token = metrics.start_timer()
+        try:
+            pool.run(sum, [1, 2])
+        finally:
+            metrics.stop_timer(token)
+        self.assertEqual(set(timer.phases), {"hash_wait", "hash"})
+
+    def test_run_rejects_when_saturated(self):
+        pool = HashingPool(size=1, queue_depth=0)
+        pool._slots.acquire()
+        with self.assertRaises(HashingPoolSaturated):
+            pool.run(sum, [1, 2])
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    @mock.patch.dict(os.environ, {"PASSWORD_HASHING_POOL_SIZE": "4"})
+    def test_gunicorn_refuses_sync_workers(self):
+        def server(worker_class):
+            return SimpleNamespace(
+                cfg=SimpleNamespace(worker_class_str=worker_class)
+            )
+
+        with self.assertRaises(RuntimeError):
+            gunicorn.on_starting(server("sync"))
+        gunicorn.on_starting(server("gthread"))
+
+
+@override_settings(PASSWORD_HASHERS=POOLED_HASHERS)
+class PooledPBKDF2PasswordHasherTests(TestCase):
+    def setUp(self):
+        self.pool = HashingPool(size=1, queue_depth=0)
+        patcher = mock.patch("accounts.hashers._pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hashes_are_compatible_with_pbkdf2(self):
+        encoded = make_password("wibble1234")
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$"))
+        self.assertTrue(check_password("wibble1234", encoded))
+        self.assertEqual(self.pool.stats()["completed"], 2)
+
+    def test_login_returns_503_when_pool_is_saturated(self):
+        testuser = CustomUser.objects.create(username="testuser")
+        testuser.set_password("wibble1234")
+        testuser.save()
+
+        self.pool._slots.acquire()
+        response = self.client.post(
+            reverse("login"),
+            {"username": "testuser", "password": "wibble1234"},
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+@override_settings(
+    PASSWORD_HASHERS=CALIBRATED_HASHERS,
+    PASSWORD_PBKDF2_ITERATIONS=20000,
+    PASSWORD_PBKDF2_MIN_ITERATIONS=5000,
+    PASSWORD_HASHING_MAX_MS=10,
+)
+class CalibratedPBKDF2PasswordHasherTests(SimpleTestCase):
+    def setUp(self):
+        load_policy.reset()
+        self.addCleanup(load_policy.reset)
+        # Every hash made in a test takes 1 ms, far under the 10 ms limit,
+        # however busy the host running the tests is.
+        clock = mock.patch(
+            "accounts.hashers.time.perf_counter",
+            side_effect=itertools.count(step=0.001).__next__,
+        )
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def overload(self):
+        # 20000 iterations now take 20 ms, twice PASSWORD_HASHING_MAX_MS.
+        load_policy.reset()
+        load_policy.record(1, 0.001 / 1000)
+
+    def test_uses_configured_iterations(self):
+        self.assertTrue(
+            make_password("wibble1234").startswith("pbkdf2_sha256$20000$")
+        )
+
+    def test_caps_iterations_while_overloaded(self):
+        self.overload()
+        self.assertTrue(
+            make_password("wibble1234").startswith("pbkdf2_sha256$10000$")
+        )
+
+    def test_never_goes_below_minimum_iterations(self):
+        load_policy.record(1, 0.01 / 1000)
+        self.assertTrue(
+            make_password("wibble1234").startswith("pbkdf2_sha256$5000$")
+        )
+
+    def test_existing_hashes_verify_and_upgrade_after_load(self):
+        encoded = make_password("wibble1234")
+        self.overload()
+        capped = make_password("wibble1234")
+        setter = mock.Mock()
+        # Both hashes verify while overloaded, without rehashing.
+        self.assertTrue(check_password("wibble1234", encoded, setter))
+        self.overload()
+        self.assertTrue(check_password("wibble1234", capped, setter))
+        setter.assert_not_called()
+        # Once the load has passed the capped hash is upgraded.
+        load_policy.reset()
+        self.assertTrue(check_password("wibble1234", capped, setter))
+        setter.assert_called_once_with("wibble1234")
+
+
+class CalibrateHashersCommandTests(SimpleTestCase):
+    def test_writes_env_file(self):
+        fd, path = tempfile.mkstemp(suffix=".env")
+        with os.fdopen(fd, "w") as f:
+            f.write("DEBUG=True\nPASSWORD_PBKDF2_ITERATIONS=1\n")
+        self.addCleanup(os.remove, path)
+        out, err = StringIO(), StringIO()
+        call_command(
+            "calibrate_hashers",
+            "--hashers=pbkdf2",
+            "--target-ms=0.01",
+            "--runs=1",
+            f"--output={path}",
+            stdout=out,
+            stderr=err,
+        )
+        self.assertEqual(out.getvalue(), f"Wrote 1 settings to {path}.\n")
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "DEBUG=True")
+        key, value = lines[1].split("=")
+        self.assertEqual(key, "PASSWORD_PBKDF2_ITERATIONS")
+        # No host hashes that fast, so the minimum is suggested.
+        self.assertEqual(int(value), 100000)
+        self.assertIn("cannot hash in 0.01 ms", err.getvalue())
+        self.assertEqual(len(lines), 2)
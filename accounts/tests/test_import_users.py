@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.management.commands import import_users
+from accounts.models import CustomUser
+
+
+class ImportUsersCommandTests(TestCase):
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_users(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        path = self.write_file(
+            ".csv",
+            "username,first_name,last_name,position,email,password\n"
+            "johnlennon,John,Lennon,Songwriter,john@lennon.com,wibble1234\n"
+            "paulmccartney,Paul,McCartney,Bassist,paul@mccartney.com,"
+            "wobble5678\n",
+        )
+        out, err = self.import_users(path, "--processes=0")
+        self.assertIn("Imported 2 users, skipped 0", out)
+        self.assertEqual(err, "")
+        user = CustomUser.objects.get(username="johnlennon")
+        self.assertEqual(user.position, "Songwriter")
+        self.assertTrue(user.check_password("wibble1234"))
+
+    def test_import_jsonl_with_process_pool(self):
+        path = self.write_file(
+            ".jsonl",
+            json.dumps(
+                {
+                    "username": "johnlennon",
+                    "first_name": "John",
+                    "last_name": "Lennon",
+                    "position": "Songwriter",
+                    "email": "john@lennon.com",
+                    "password": "wibble1234",
+                }
+            )
+            + "\n",
+        )
+        out, err = self.import_users(path, "--processes=2")
+        self.assertIn("Imported 1 users, skipped 0", out)
+        user = CustomUser.objects.get(username="johnlennon")
+        self.assertTrue(user.check_password("wibble1234"))
+
+    def test_invalid_and_duplicate_rows_are_skipped(self):
+        CustomUser.objects.create(username="existing", email="a@b.com")
+        path = self.write_file(
+            ".csv",
+            "username,first_name,last_name,position,email,password\n"
+            "EXISTING,Ex,Isting,Tester,existing@email.com,wibble1234\n"
+            "nofirstname,,Name,Tester,no@email.com,wibble1234\n"
+            "weak,Weak,Password,Tester,weak@email.com,1234\n"
+            "newuser,New,User,Tester,new@email.com,wibble1234\n"
+            "NewUser,New,User,Tester,new2@email.com,wibble1234\n",
+        )
+        out, err = self.import_users(path, "--processes=0")
+        self.assertIn("Imported 1 users, skipped 4", out)
+        self.assertIn("Line 2: A user with that username already exists.", err)
+        self.assertIn("Line 3: This field is required.", err)
+        self.assertIn("Line 4: This password is too short.", err)
+        self.assertIn("Line 6: A user with that username already exists.", err)
+        self.assertEqual(CustomUser.objects.count(), 2)
+
+    def test_lines_that_are_not_json_objects_are_skipped(self):
+        row = {
+            "username": "johnlennon",
+            "first_name": "John",
+            "last_name": "Lennon",
+            "position": "Songwriter",
+            "email": "john@lennon.com",
+            "password": "wibble1234",
+        }
+        path = self.write_file(
+            ".jsonl", '{"username": \n[1, 2]\n' + json.dumps(row) + "\n"
+        )
+        out, err = self.import_users(path, "--processes=0")
+        self.assertIn("Imported 1 users, skipped 2", out)
+        self.assertIn("Line 1: Invalid JSON", err)
+        self.assertIn("Line 2: Each line must be a JSON object.", err)
+        self.assertTrue(
+            CustomUser.objects.filter(username="johnlennon").exists()
+        )
+
+    def test_users_added_after_validation_are_skipped(self):
+        CustomUser.objects.create(username="existing", email="a@b.com")
+        path = self.write_file(
+            ".csv",
+            "username,first_name,last_name,position,email,password\n"
+            "existing,Ex,Isting,Tester,existing@email.com,wibble1234\n"
+            "newuser,New,User,Tester,new@email.com,wibble1234\n",
+        )
+        # As if "existing" was added between validation and the insert.
+        with mock.patch.object(
+            import_users.Command, "taken", return_value=set()
+        ):
+            out, err = self.import_users(path, "--processes=0")
+        self.assertIn("Imported 1 users, skipped 1", out)
+        self.assertIn(
+            "Line 2: A user with that username or email address already "
+            "exists.",
+            err,
+        )
+        self.assertTrue(CustomUser.objects.filter(username="newuser").exists())
@@ -0,0 +1,46 @@
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+from accounts.models import CustomUser
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "Expression indexes are PostgreSQL only"
+)
+class CaseInsensitiveLookupPlanTests(TestCase):
+    """
+    The tables in tests are tiny, so sequential scans are disabled to make
+    the planner show whether an index can serve each lookup at all.
+    """
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn("Seq Scan", plan)
+        self.assertIn("Index", plan)
+
+    def test_password_reset_lookup_uses_index(self):
+        # The same lookup as PasswordResetForm.get_users().
+        self.assertUsesIndex(
+            CustomUser._default_manager.filter(
+                email__iexact="testuser@email.com", is_active=True
+            )
+        )
+
+    def test_login_lookup_uses_index(self):
+        self.assertUsesIndex(CustomUser.objects.filter(username="testuser"))
+
+    def test_registration_username_lookup_uses_index(self):
+        self.assertUsesIndex(
+            CustomUser.objects.filter(username__iexact="testuser")
+        )
+
+    def test_registration_email_lookup_uses_index(self):
+        self.assertUsesIndex(
+            CustomUser.objects.filter(email__iexact="testuser@email.com")
+        )
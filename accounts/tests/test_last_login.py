@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.last_login import LastLoginWriter, writer
+from accounts.models import CustomUser, LoginEvent, hash_session_key
+
+
+class LastLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = []
+        for username in ("johnlennon", "paulmccartney"):
+            user = CustomUser.objects.create(username=username)
+            user.set_password("wibble1234")
+            user.save()
+            cls.users.append(user)
+
+    def sign_in(self, user):
+        response = self.client.post(
+            reverse("login"),
+            {"username": user.username, "password": "wibble1234"},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_updated_at_sign_in_by_default(self):
+        self.sign_in(self.users[0])
+        self.users[0].refresh_from_db()
+        self.assertIsNotNone(self.users[0].last_login)
+
+    @override_settings(LAST_LOGIN_WRITE_BEHIND_INTERVAL=3600)
+    def test_buffered_sign_ins_are_flushed_in_one_update(self):
+        self.addCleanup(writer.flush)
+        for user in self.users:
+            self.sign_in(user)
+            self.client.logout()
+        self.sign_in(self.users[0])
+        self.assertFalse(
+            CustomUser.objects.filter(last_login__isnull=False).exists()
+        )
+        self.assertFalse(LoginEvent.objects.exists())
+        pending = writer.get_pending(self.users[0].pk)
+        # The home page shows the buffered time.
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["last_login"](), pending)
+
+        with CaptureQueriesContext(connection) as context:
+            writer.flush()
+        updates = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 1)
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_login, pending)
+        self.assertFalse(
+            CustomUser.objects.filter(last_login__isnull=True).exists()
+        )
+        self.assertEqual(LoginEvent.objects.count(), 3)
+
+    @override_settings(LAST_LOGIN_WRITE_BEHIND_INTERVAL=3600)
+    def test_failed_flushes_are_retried(self):
+        self.addCleanup(writer.flush)
+        self.sign_in(self.users[0])
+        pending = writer.get_pending(self.users[0].pk)
+        with mock.patch.object(
+            LastLoginWriter, "_apply", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                writer.flush()
+        self.assertEqual(writer.get_pending(self.users[0].pk), pending)
+        writer.flush()
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_login, pending)
+        self.assertIsNone(writer.get_pending(self.users[0].pk))
+
+
+class LoginEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username="johnlennon")
+        cls.user.set_password("wibble1234")
+        cls.user.save()
+
+    def sign_in(self, **extra):
+        self.client.post(
+            reverse("login"),
+            {"username": "johnlennon", "password": "wibble1234"},
+            **extra,
+        )
+        return LoginEvent.objects.get()
+
+    def test_only_a_hash_of_the_session_key_is_stored(self):
+        event = self.sign_in()
+        session_key = self.client.session.session_key
+        self.assertEqual(event.session_key_hash, hash_session_key(session_key))
+        self.assertNotIn(
+            session_key,
+            [
+                str(value)
+                for value in LoginEvent.objects.values().get().values()
+            ],
+        )
+
+    @override_settings(THROTTLE_IP_HEADER="HTTP_X_REAL_IP")
+    def test_ip_address_is_read_like_the_throttle_reads_it(self):
+        event = self.sign_in(HTTP_X_REAL_IP="203.0.113.7")
+        self.assertEqual(event.ip_address, "203.0.113.7")
+        LoginEvent.objects.all().delete()
+        self.client.logout()
+        self.assertIsNone(self.sign_in(HTTP_X_REAL_IP="nonsense").ip_address)
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.mail import FakeSESBackend
+from accounts.models import CustomUser, QueuedEmail
+
+
+@override_settings(
+    EMAIL_BACKEND="accounts.mail.QueuedEmailBackend",
+    QUEUED_EMAIL_BACKEND="accounts.mail.FakeSESBackend",
+    QUEUED_EMAIL_MAX_ATTEMPTS=2,
+)
+class QueuedEmailTests(TestCase):
+    def setUp(self):
+        FakeSESBackend.outbox = []
+        FakeSESBackend.failures = 0
+
+    def send_queued_email(self):
+        out = StringIO()
+        call_command("send_queued_email", stdout=out)
+        return out.getvalue()
+
+    def test_send_mail_is_queued(self):
+        mail.send_mail("Subject", "Body", "from@email.com", ["to@email.com"])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.subject, "Subject")
+        self.assertEqual(email.to, ["to@email.com"])
+        self.assertEqual(email.status, QueuedEmail.QUEUED)
+        self.assertEqual(FakeSESBackend.outbox, [])
+
+    def test_recipients_headers_and_attachments_are_kept(self):
+        EmailMessage(
+            "Subject",
+            "Body",
+            "from@email.com",
+            to=["to@email.com"],
+            cc=["cc@email.com"],
+            bcc=["bcc@email.com"],
+            reply_to=["reply@email.com"],
+            headers={"X-Tag": "reset"},
+            attachments=[("notes.txt", "Notes", "text/plain")],
+        ).send()
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.to, ["to@email.com"])
+        self.assertEqual(email.bcc, ["bcc@email.com"])
+
+        self.send_queued_email()
+        sent = FakeSESBackend.outbox[0]
+        self.assertEqual(sent.to, ["to@email.com"])
+        self.assertEqual(sent.cc, ["cc@email.com"])
+        self.assertEqual(sent.bcc, ["bcc@email.com"])
+        self.assertEqual(sent.reply_to, ["reply@email.com"])
+        message = sent.message()
+        self.assertEqual(message["X-Tag"], "reset")
+        self.assertNotIn("bcc@email.com", message["To"])
+        self.assertIsNone(message["Bcc"])
+        self.assertEqual(
+            sent.attachments, [("notes.txt", "Notes", "text/plain")]
+        )
+
+    def test_password_reset_is_queued_and_sent(self):
+        testuser = CustomUser.objects.create(
+            username="testuser", email="testuser@email.com"
+        )
+        testuser.set_password("wibble1234")
+        testuser.save()
+
+        response = self.client.post(
+            reverse("password_reset"), {"email": "testuser@email.com"}
+        )
+        self.assertRedirects(response, reverse("password_reset_done"))
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+        self.assertEqual(
+            self.send_queued_email(), "Sent 1 of 1 queued emails.\n"
+        )
+        self.assertEqual(len(FakeSESBackend.outbox), 1)
+        self.assertEqual(FakeSESBackend.outbox[0].to, ["testuser@email.com"])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, QueuedEmail.SENT)
+        # The reset link is not kept once it has been sent.
+        self.assertEqual(email.body, "")
+        self.assertEqual(email.alternatives, [])
+
+    def test_prune(self):
+        for _ in range(3):
+            mail.send_mail(
+                "Subject", "Body", "from@email.com", ["to@email.com"]
+            )
+        self.send_queued_email()
+        mail.send_mail("Subject", "Body", "from@email.com", ["to@email.com"])
+        QueuedEmail.objects.update(
+            created_at=timezone.now() - timedelta(days=8)
+        )
+        out = StringIO()
+        call_command("prune_queued_email", stdout=out)
+        self.assertIn("Deleted 3", out.getvalue())
+        self.assertEqual(QueuedEmail.objects.get().status, QueuedEmail.QUEUED)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        mail.send_mail("Subject", "Body", "from@email.com", ["to@email.com"])
+        FakeSESBackend.failures = 1
+        self.assertEqual(
+            self.send_queued_email(), "Sent 0 of 1 queued emails.\n"
+        )
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, QueuedEmail.QUEUED)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn("Fake SES is unavailable", email.last_error)
+
+        # Not due yet, so nothing is claimed.
+        self.assertEqual(
+            self.send_queued_email(), "Sent 0 of 0 queued emails.\n"
+        )
+
+        QueuedEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(
+            self.send_queued_email(), "Sent 1 of 1 queued emails.\n"
+        )
+        self.assertEqual(QueuedEmail.objects.get().status, QueuedEmail.SENT)
+
+    def test_email_fails_after_max_attempts(self):
+        mail.send_mail("Subject", "Body", "from@email.com", ["to@email.com"])
+        FakeSESBackend.failures = 2
+        self.send_queued_email()
+        QueuedEmail.objects.update(next_attempt_at=timezone.now())
+        self.send_queued_email()
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, QueuedEmail.FAILED)
+        self.assertEqual(email.attempts, 2)
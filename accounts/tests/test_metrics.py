@@ -0,0 +1,175 @@
+import os
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import engines
+from django.template.response import SimpleTemplateResponse
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from accounts import metrics
+from accounts.hashers import HashingPool
+from accounts.middleware import MetricsMiddleware
+from accounts.models import CustomUser
+from accounts.sessions import writer
+
+
+class RenderPrometheusTests(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        registry = metrics.Registry()
+        timer = metrics.RequestTimer()
+        timer.add("db", 0.002)
+        timer.queries = 3
+        registry.observe("login", timer, 0.02)
+        timer.queries = 500
+        registry.observe("login", timer, 20)
+        text = metrics.render_prometheus(registry.snapshot())
+        self.assertIn(
+            'accounts_request_phase_seconds_bucket{view="login",phase="db",'
+            'le="0.0025"} 2',
+            text,
+        )
+        self.assertIn(
+            'accounts_request_phase_seconds_bucket{view="login",'
+            'phase="total",le="10"} 1',
+            text,
+        )
+        self.assertIn(
+            'accounts_request_phase_seconds_bucket{view="login",'
+            'phase="total",le="+Inf"} 2',
+            text,
+        )
+        self.assertIn(
+            'accounts_request_queries_bucket{view="login",le="5"} 1', text
+        )
+        self.assertIn('accounts_request_queries_sum{view="login"} 503', text)
+        self.assertIn('accounts_request_queries_count{view="login"} 2', text)
+
+
+class CollectTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+
+    def test_workers_that_stop_publishing_are_dropped(self):
+        key = f"{metrics.KEY_PREFIX}:live_workers"
+        cache.set(key, {12345: time.time() - 1})
+        metrics.Registry().publish(10)
+        workers = cache.get(key)
+        self.assertEqual(set(workers), {os.getpid()})
+        self.assertEqual(metrics.live_workers(workers[os.getpid()] + 1), {})
+
+
+@override_settings(
+    METRICS_ENABLED=True,
+    METRICS_SERVER_TIMING=True,
+    METRICS_TOKEN="s3cret",
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        testuser = CustomUser.objects.create(username="testuser")
+        testuser.set_password("wibble1234")
+        testuser.save()
+
+    def setUp(self):
+        registry = metrics.Registry()
+        patcher = mock.patch("accounts.metrics.registry", registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+
+    def server_timing(self, response):
+        return dict(
+            metric.split(";", 1)[0:2]
+            for metric in response["Server-Timing"].split(", ")
+        )
+
+    def test_login_reports_hashing_session_and_db(self):
+        response = self.client.post(
+            reverse("login"),
+            {"username": "testuser", "password": "wibble1234"},
+        )
+        self.assertEqual(response.status_code, 302)
+        phases = self.server_timing(response)
+        self.assertEqual(
+            set(phases), {"hash", "session", "db", "total"}, phases
+        )
+
+    @override_settings(
+        PASSWORD_HASHERS=["accounts.hashers.PooledPBKDF2PasswordHasher"]
+    )
+    def test_pooled_hashing_reports_wait_and_hash_time(self):
+        pool = HashingPool(size=1, queue_depth=0)
+        with mock.patch("accounts.hashers._pool", pool):
+            response = self.client.post(
+                reverse("login"),
+                {"username": "testuser", "password": "wibble1234"},
+            )
+        self.assertEqual(response.status_code, 302)
+        phases = self.server_timing(response)
+        self.assertIn("hash_wait", phases)
+        self.assertIn("hash", phases)
+        text = metrics.render_prometheus(metrics.registry.snapshot())
+        self.assertIn('view="login",phase="hash_wait"', text)
+
+    @override_settings(
+        SESSION_ENGINE="accounts.sessions", SESSION_WRITE_BEHIND_INTERVAL=3600
+    )
+    def test_session_engine_cache_work_is_timed(self):
+        self.addCleanup(writer.flush)
+        with mock.patch(
+            "accounts.metrics.RequestTimer.__call__",
+            lambda timer, execute, *args: execute(*args),
+        ):
+            response = self.client.post(
+                reverse("login"),
+                {"username": "testuser", "password": "wibble1234"},
+            )
+        self.assertIn("session", self.server_timing(response))
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_is_off_by_default(self):
+        response = self.client.get(reverse("login"))
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertNotEqual(metrics.registry.snapshot()["seconds"], {})
+
+    def test_template_time_leaves_out_queries(self):
+        timer, token = metrics.start_timer()
+        self.addCleanup(metrics.stop_timer, token)
+        response = SimpleTemplateResponse(
+            engines["django"].from_string("{{ query }}"),
+            {"query": lambda: timer.add("db", 1.0)},
+        )
+        MetricsMiddleware(None).process_template_response(None, response)
+        response.render()
+        self.assertEqual(timer.phases["db"], 1.0)
+        self.assertLess(timer.phases["template"], 0.5)
+
+    def test_page_reports_template_rendering(self):
+        response = self.client.get(reverse("login"))
+        self.assertIn("template", self.server_timing(response))
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_timed(self):
+        response = self.client.get(reverse("login"))
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertEqual(metrics.registry.snapshot()["seconds"], {})
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("login"))
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            'accounts_request_phase_seconds_count{view="login",'
+            'phase="total"} 1',
+        )
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_endpoint_needs_a_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,98 @@
+import re
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+
+
+def csrf_token(response):
+    return re.search(
+        r'name="csrfmiddlewaretoken" value="([^"]+)"',
+        response.content.decode(),
+    ).group(1)
+
+
+@override_settings(
+    PAGE_CACHE_SECONDS=300,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        testuser = CustomUser.objects.create(username="testuser")
+        testuser.set_password("wibble1234")
+        testuser.save()
+        cls.testuser = testuser
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.client = Client(enforce_csrf_checks=True)
+
+    def test_cached_page_gets_a_working_csrf_token(self):
+        first = self.client.get(reverse("login"))
+        self.assertTemplateUsed(first, "registration/login.html")
+        second = self.client.get(reverse("login"))
+        self.assertEqual(second.templates, [])
+        self.assertNotIn("__csrf_token__", second.content.decode())
+        self.assertNotEqual(csrf_token(first), csrf_token(second))
+
+        response = self.client.post(
+            reverse("login"),
+            {
+                "username": "testuser",
+                "password": "wibble1234",
+                "csrfmiddlewaretoken": csrf_token(second),
+            },
+        )
+        self.assertRedirects(
+            response, reverse("home"), fetch_redirect_response=False
+        )
+
+    def test_new_visitor_gets_a_csrf_cookie_from_the_cache(self):
+        self.client.get(reverse("register"))
+        visitor = Client(enforce_csrf_checks=True)
+        response = visitor.get(reverse("register"))
+        self.assertEqual(response.templates, [])
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_conditional_get(self):
+        response = self.client.get(reverse("password_reset"))
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertIn("Cookie", response["Vary"])
+        response = self.client.get(
+            reverse("password_reset"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_new_csrf_cookie_invalidates_the_etag(self):
+        etag = self.client.get(reverse("login"))["ETag"]
+        self.client.cookies.clear()
+        response = self.client.get(reverse("login"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_signed_in_visitors_are_not_served_from_the_cache(self):
+        self.client.get(reverse("home"))
+        self.client.force_login(self.testuser)
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "You are logged in")
+
+    def test_only_known_query_parameters_are_cached(self):
+        login = reverse("login")
+        self.client.get(login, {"next": "/accounts/export/"})
+        response = self.client.get(login, {"next": "/accounts/export/"})
+        self.assertTemplateNotUsed(response, "registration/login.html")
+        for n in range(3):
+            response = self.client.get(login, {"x": n})
+            self.assertTemplateUsed(response, "registration/login.html")
+            self.assertFalse(response.has_header("ETag"))
+
+    @override_settings(PAGE_CACHE_SECONDS=0)
+    def test_disabled(self):
+        self.client.get(reverse("home"))
+        response = self.client.get(reverse("home"))
+        self.assertTemplateUsed(response, "home.html")
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from accounts.password_validation import (
+    BreachedPasswordIndex,
+    BreachedPasswordValidator,
+    password_key,
+    write_index,
+)
+
+
+BREACHED = ["password1", "qwerty123", "letmein!!", "iloveyou2"]
+
+
+class BreachedPasswordTests(SimpleTestCase):
+    def temp_path(self, suffix, content=None):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as f:
+            if content is not None:
+                f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def build(self, source, *args):
+        output = self.temp_path(".idx")
+        out = StringIO()
+        call_command(
+            "build_breached_password_index", source, output, *args, stdout=out
+        )
+        return output, out.getvalue()
+
+    def test_build_from_sha1_hashes(self):
+        lines = [
+            f"{hashlib.sha1(p.encode()).hexdigest().upper()}:{n}\r\n"
+            for n, p in enumerate(BREACHED)
+        ]
+        output, out = self.build(self.temp_path(".txt", "".join(lines)))
+        self.assertEqual(out, f"Wrote 4 hashes to {output}.\n")
+        index = BreachedPasswordIndex(output)
+        self.addCleanup(index.close)
+        for password in BREACHED:
+            self.assertIn(password_key(password), index)
+        self.assertNotIn(password_key("wibble1234"), index)
+
+    def test_build_rejects_bad_lines(self):
+        source = self.temp_path(".txt", "password1\n")
+        with self.assertRaisesMessage(CommandError, "Line 1 is not a SHA-1"):
+            self.build(source)
+
+    def test_unsorted_keys_across_chunks(self):
+        keys = [password_key(f"pw{i}") for i in range(1000)]
+        output = self.temp_path(".idx")
+        # Duplicates are written once.
+        self.assertEqual(write_index(keys + keys, output, chunk_size=97), 1000)
+        index = BreachedPasswordIndex(output)
+        self.addCleanup(index.close)
+        self.assertEqual(len(index), 1000)
+        # The fan-out table is read in place from the mapped file.
+        self.assertIsInstance(index._fanout, memoryview)
+        for key in keys:
+            self.assertIn(key, index)
+        self.assertNotIn(password_key("pw1000"), index)
+
+    def test_validator(self):
+        source = self.temp_path(".txt", "\n".join(BREACHED))
+        output, _ = self.build(source, "--plain")
+        validator = BreachedPasswordValidator(index_path=output)
+        with self.assertRaisesMessage(
+            ValidationError, "This password has appeared in a data breach."
+        ):
+            validator.validate("qwerty123")
+        self.assertIsNone(validator.validate("wibble1234"))
+
+    def test_validator_from_settings(self):
+        source = self.temp_path(".txt", "\n".join(BREACHED))
+        output, _ = self.build(source, "--plain")
+        validators = [
+            {
+                "NAME": "accounts.password_validation."
+                "BreachedPasswordValidator"
+            }
+        ]
+        with override_settings(
+            BREACHED_PASSWORD_INDEX=output,
+            AUTH_PASSWORD_VALIDATORS=validators,
+        ):
+            with self.assertRaises(ValidationError):
+                validate_password("letmein!!")
+            self.assertIsNone(validate_password("wibble1234"))
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import CustomUser, LoginEvent
+
+
+class PurgeSessionsCommandTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f"expired{i}",
+                session_data="",
+                expire_date=now - timedelta(hours=i + 1),
+            )
+            for i in range(5)
+        )
+        Session.objects.create(
+            session_key="live",
+            session_data="",
+            expire_date=now + timedelta(days=1),
+        )
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command(
+            "purge_sessions", "--batch-size=2", "--sleep=0", *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_deletes_only_expired_sessions(self):
+        out = self.purge()
+        self.assertIn("Deleted 5 expired sessions", out)
+        self.assertEqual(
+            list(Session.objects.values_list("session_key", flat=True)),
+            ["live"],
+        )
+
+    def checkpoint(self):
+        fd, checkpoint = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(checkpoint)
+        self.addCleanup(
+            lambda: os.path.exists(checkpoint) and os.remove(checkpoint)
+        )
+        return checkpoint
+
+    def test_stopped_run_resumes_from_checkpoint(self):
+        checkpoint = self.checkpoint()
+        out = self.purge(f"--checkpoint={checkpoint}", "--max-seconds=1e-9")
+        self.assertIn("Stopping after --max-seconds.", out)
+        self.assertIn("Deleted 2 expired sessions", out)
+        with open(checkpoint) as f:
+            self.assertTrue(f.read().strip().endswith(" expired3"))
+        # Sessions before the checkpoint are not looked at again.
+        Session.objects.create(
+            session_key="older",
+            session_data="",
+            expire_date=timezone.now() - timedelta(days=30),
+        )
+        out = self.purge(f"--checkpoint={checkpoint}")
+        self.assertIn("Deleted 3 expired sessions", out)
+        self.assertTrue(Session.objects.filter(session_key="older").exists())
+
+    def test_finished_run_clears_checkpoint(self):
+        checkpoint = self.checkpoint()
+        self.purge(f"--checkpoint={checkpoint}")
+        self.assertFalse(os.path.exists(checkpoint))
+        # So sessions that expire before the last one deleted are found.
+        Session.objects.create(
+            session_key="older",
+            session_data="",
+            expire_date=timezone.now() - timedelta(days=30),
+        )
+        out = self.purge(f"--checkpoint={checkpoint}")
+        self.assertIn("Deleted 1 expired sessions", out)
+        self.assertFalse(Session.objects.filter(session_key="older").exists())
+
+    @override_settings(LOGIN_EVENT_RETENTION_DAYS=30)
+    def test_deletes_old_login_events(self):
+        user = CustomUser.objects.create(username="testuser")
+        now = timezone.now()
+        LoginEvent.objects.bulk_create(
+            LoginEvent(user=user, created_at=now - timedelta(days=days))
+            for days in (90, 60, 31, 29, 0)
+        )
+        out = self.purge()
+        self.assertIn("Deleted 3 old login events", out)
+        self.assertEqual(LoginEvent.objects.count(), 2)
@@ -0,0 +1,27 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.bench_flows import FLOWS, QUERY_BUDGETS
+from benchmarks.harness import is_transaction_control
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+)
+class QueryBudgetTests(TestCase):
+    def test_flows_stay_within_query_budgets(self):
+        for name, flow in FLOWS.items():
+            with self.subTest(flow=name):
+                request = flow()
+                request()
+                with CaptureQueriesContext(connection) as context:
+                    request()
+                queries = [
+                    query["sql"]
+                    for query in context.captured_queries
+                    if not is_transaction_control(query["sql"])
+                ]
+                self.assertLessEqual(
+                    len(queries), QUERY_BUDGETS[name], "\n".join(queries)
+                )
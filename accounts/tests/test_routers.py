@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts import routers
+from accounts.models import CustomUser
+
+
+REPLICA = "replica"
+
+
+def setUpModule():
+    # A second SQLite database standing in for a replica that has not yet
+    # received the primary's latest writes.
+    global replica_dir
+    replica_dir = tempfile.mkdtemp()
+    path = os.path.join(replica_dir, "replica.sqlite3")
+    connections.databases[REPLICA] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "TEST": {"NAME": path},
+    }
+    call_command("migrate", database=REPLICA, verbosity=0)
+
+
+def tearDownModule():
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+    shutil.rmtree(replica_dir)
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_ROUTERS=["accounts.routers.ReplicaRouter"],
+)
+class ReplicaRouterTests(TransactionTestCase):
+    # REPLICA only exists once setUpModule() has run.
+    databases = "__all__"
+
+    def create_user(self, using, **fields):
+        return CustomUser.objects.db_manager(using).create(
+            username="testuser",
+            email="testuser@email.com",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+            **fields,
+        )
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self):
+        self.create_user("default")
+        self.assertFalse(CustomUser.objects.exists())
+        self.assertTrue(CustomUser.objects.using("default").exists())
+
+    def test_reads_in_a_transaction_go_to_the_primary(self):
+        with transaction.atomic():
+            self.create_user("default")
+            self.assertTrue(CustomUser.objects.exists())
+
+    def test_reads_after_a_write_in_the_same_request_go_to_the_primary(self):
+        router = routers.ReplicaRouter()
+        state, token = routers.start_request(pinned=False)
+        try:
+            self.assertEqual(router.db_for_read(CustomUser), REPLICA)
+            self.assertEqual(router.db_for_write(CustomUser), "default")
+            self.assertEqual(router.db_for_read(CustomUser), "default")
+        finally:
+            routers.finish_request(token)
+        self.assertTrue(state.wrote)
+        self.assertEqual(router.db_for_read(CustomUser), REPLICA)
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        user = self.create_user("default")
+        self.create_user(REPLICA, id=user.id)
+        url = reverse("user_update", args=[user.id])
+
+        response = self.client.get(url)
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+        response = self.client.post(
+            url,
+            {
+                "username": "testuser",
+                "email": "testuser@email.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "position": "Developer",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]["max-age"], 5)
+
+        # The replica has not caught up, but the pinned client reads the
+        # primary.
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context["form"]["position"].value(), "Developer"
+        )
+
+        del self.client.cookies[routers.PIN_COOKIE]
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context["form"]["position"].value(), "Tester"
+        )
@@ -0,0 +1,179 @@
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from accounts.sessions import (
+    SessionStore,
+    check_shared_cache,
+    writer,
+)
+
+
+@override_settings(
+    SESSION_ENGINE="accounts.sessions",
+    SESSION_WRITE_BEHIND_INTERVAL=3600,
+)
+class WriteBehindSessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(writer.flush)
+
+    def test_save_does_not_query_database(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        with self.assertNumQueries(0):
+            session.save()
+        self.assertFalse(Session.objects.exists())
+
+    def test_flush_persists_session(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        writer.flush()
+        stored = Session.objects.get(session_key=session.session_key)
+        self.assertEqual(stored.get_decoded(), {"colour": "blue"})
+
+    def test_repeated_saves_are_coalesced(self):
+        session = SessionStore()
+        session["count"] = 1
+        session.save()
+        session["count"] = 2
+        session.save()
+        with CaptureQueriesContext(connection) as queries:
+            writer.flush()
+        writes = [
+            query
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(len(writes), 1)
+        stored = Session.objects.get(session_key=session.session_key)
+        self.assertEqual(stored.get_decoded(), {"count": 2})
+
+    def test_load_is_served_from_cache(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        writer.flush()
+        with self.assertNumQueries(0):
+            loaded = SessionStore(session.session_key)
+            self.assertEqual(loaded["colour"], "blue")
+
+    def test_load_falls_back_to_pending_write_when_evicted(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        cache.clear()
+        with self.assertNumQueries(0):
+            loaded = SessionStore(session.session_key)
+            self.assertEqual(loaded["colour"], "blue")
+
+    def test_load_falls_back_to_database_when_evicted(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        writer.flush()
+        cache.clear()
+        loaded = SessionStore(session.session_key)
+        self.assertEqual(loaded["colour"], "blue")
+
+    def test_delete_removes_session(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        writer.flush()
+        session.delete()
+        self.assertEqual(SessionStore(session.session_key).load(), {})
+        writer.flush()
+        self.assertFalse(Session.objects.exists())
+
+    def test_delete_is_written_through(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        writer.flush()
+        session.delete()
+        self.assertFalse(Session.objects.exists())
+
+    def test_save_buffered_elsewhere_does_not_undo_a_delete(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        # Another worker deletes the session while this one still has its
+        # save buffered.
+        SessionStore(session.session_key).delete()
+        writer.enqueue(
+            session.session_key,
+            session.create_model_instance({"colour": "blue"}),
+        )
+        writer.flush()
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(SessionStore(session.session_key).load(), {})
+
+    def test_failed_flush_is_retried(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        with mock.patch(
+            "django.db.models.query.QuerySet.bulk_create",
+            side_effect=DatabaseError,
+        ):
+            with self.assertRaises(DatabaseError):
+                writer.flush()
+        writer.flush()
+        stored = Session.objects.get(session_key=session.session_key)
+        self.assertEqual(stored.get_decoded(), {"colour": "blue"})
+
+    def test_flush_overwrites_a_session_inserted_concurrently(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        other = session.create_model_instance({"colour": "red"})
+
+        def insert_first(*args, **kwargs):
+            # Another worker inserts the row after the existence check.
+            other.save()
+            return []
+
+        with mock.patch(
+            "django.db.models.query.QuerySet.values_list", insert_first
+        ):
+            writer.flush()
+        stored = Session.objects.get(session_key=session.session_key)
+        self.assertEqual(stored.get_decoded(), {"colour": "blue"})
+
+    def test_write_behind_requires_a_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)],
+            ["accounts.E001"],
+        )
+        with override_settings(SESSION_WRITE_BEHIND_INTERVAL=0):
+            self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(SESSION_WRITE_BEHIND_INTERVAL=0)
+    def test_zero_interval_writes_through(self):
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        self.assertTrue(
+            Session.objects.filter(session_key=session.session_key).exists()
+        )
+
+    def test_login_and_home_page(self):
+        testuser = CustomUser.objects.create(username="testuser")
+        testuser.set_password("wibble1234")
+        testuser.save()
+
+        login = self.client.login(username="testuser", password="wibble1234")
+        self.assertTrue(login)
+
+        response = self.client.get(reverse("home"))
+        self.assertContains(
+            response, "You are logged in as the following user.", 1
+        )
@@ -0,0 +1,16 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class ProfileStartupCommandTests(SimpleTestCase):
+    def test_reports_imports_without_the_email_backend(self):
+        out = StringIO()
+        call_command("profile_startup", "--by-module", "--limit=0", stdout=out)
+        modules = [line.split()[0] for line in out.getvalue().splitlines()]
+        self.assertIn("django.core.handlers.wsgi", modules)
+        self.assertIn("config.wsgi", modules)
+        # Sending mail is rare, so boto3 is only imported when it happens.
+        for module in ("django_ses", "boto3", "botocore"):
+            self.assertNotIn(module, modules)
@@ -0,0 +1,145 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.template import Context, Template
+
+from accounts.assets import ASSETS
+from accounts.management.commands import vendor_static
+from accounts.staticfiles import StaticFilesApplication
+
+CSS = "body { color: black; }\n" * 50
+
+
+class AssetTagTests(SimpleTestCase):
+    def render(self):
+        return Template(
+            '{% load assets %}{% stylesheet "bootstrap.min.css" %}'
+        ).render(Context())
+
+    def test_cdn(self):
+        html = self.render()
+        self.assertIn(ASSETS["bootstrap.min.css"].url, html)
+        self.assertIn(ASSETS["bootstrap.min.css"].integrity, html)
+
+    @override_settings(SELF_HOSTED_STATIC=True)
+    def test_self_hosted(self):
+        html = self.render()
+        self.assertIn(
+            'href="/static/vendor/bootstrap-5.0.0-beta1/bootstrap.min.css"',
+            html,
+        )
+        self.assertIn(ASSETS["bootstrap.min.css"].integrity, html)
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        with open(os.path.join(self.source, "site.css"), "w") as f:
+            f.write(CSS)
+        with override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=[
+                "django.contrib.staticfiles.finders.FileSystemFinder"
+            ],
+            STATICFILES_STORAGE=(
+                "accounts.storage.CompressedManifestStaticFilesStorage"
+            ),
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+        self.hashed = next(
+            name
+            for name in os.listdir(self.root)
+            if name.startswith("site.")
+            and name.endswith(".css")
+            and name != "site.css"
+        )
+        self.application = StaticFilesApplication(
+            self.django, self.root, "/static/"
+        )
+
+    def django(self, environ, start_response):
+        start_response("200 OK", [])
+        return [b"django"]
+
+    def get(self, path, **environ):
+        environ.update(REQUEST_METHOD="GET", PATH_INFO=path)
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = status
+            response["headers"] = dict(headers)
+
+        body = b"".join(self.application(environ, start_response))
+        return response["status"], response["headers"], body
+
+    def test_collectstatic_writes_gzip_copies(self):
+        path = os.path.join(self.root, self.hashed + ".gz")
+        with open(path, "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), CSS)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "site.css.gz")))
+
+    def test_hashed_names_are_immutable(self):
+        status, headers, body = self.get(f"/static/{self.hashed}")
+        self.assertEqual(status, "200 OK")
+        self.assertIn("immutable", headers["Cache-Control"])
+        self.assertEqual(body.decode(), CSS)
+        _, headers, _ = self.get("/static/site.css")
+        self.assertNotIn("immutable", headers["Cache-Control"])
+
+    def test_gzip_copy_is_sent_when_accepted(self):
+        status, headers, body = self.get(
+            f"/static/{self.hashed}", HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body).decode(), CSS)
+
+    def test_encodings_refused_with_q_0_are_not_sent(self):
+        for accept_encoding in ("gzip;q=0", "gzip; q=0.0, deflate", "*;q=0"):
+            with self.subTest(accept_encoding):
+                _, headers, body = self.get(
+                    f"/static/{self.hashed}",
+                    HTTP_ACCEPT_ENCODING=accept_encoding,
+                )
+                self.assertNotIn("Content-Encoding", headers)
+                self.assertEqual(body.decode(), CSS)
+        _, headers, _ = self.get(
+            f"/static/{self.hashed}", HTTP_ACCEPT_ENCODING="*;q=0.5"
+        )
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+
+    def test_not_modified(self):
+        _, headers, _ = self.get(f"/static/{self.hashed}")
+        status, _, body = self.get(
+            f"/static/{self.hashed}", HTTP_IF_NONE_MATCH=headers["ETag"]
+        )
+        self.assertEqual(status, "304 Not Modified")
+        self.assertEqual(body, b"")
+
+    def test_other_requests_reach_django(self):
+        self.assertEqual(self.get("/accounts/login/")[2], b"django")
+        self.assertEqual(self.get("/static/missing.css")[2], b"django")
+
+
+class VendorStaticCommandTests(SimpleTestCase):
+    def test_integrity_mismatch(self):
+        static_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_dir)
+        with mock.patch.object(
+            vendor_static, "STATIC_DIR", static_dir
+        ), mock.patch.object(
+            vendor_static, "urlopen", return_value=io.BytesIO(b"tampered")
+        ):
+            with self.assertRaisesMessage(CommandError, "integrity"):
+                call_command("vendor_static", stdout=io.StringIO())
+        self.assertEqual(os.listdir(static_dir), [])
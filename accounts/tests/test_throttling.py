@@ -0,0 +1,138 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from accounts.throttling import MemoryBucketStore, bucket_key, take_token
+
+
+class TakeTokenTests(SimpleTestCase):
+    def test_burst_then_refill(self):
+        full_at = None
+        for _ in range(3):
+            allowed, full_at, retry_after = take_token(full_at, 3, 1, 100)
+            self.assertTrue(allowed)
+        allowed, full_at, retry_after = take_token(full_at, 3, 1, 100)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 1)
+        allowed, full_at, retry_after = take_token(full_at, 3, 1, 101)
+        self.assertTrue(allowed)
+
+
+class MemoryBucketStoreTests(SimpleTestCase):
+    def test_store_evicts_least_recently_used_buckets(self):
+        store = MemoryBucketStore(max_keys=2)
+        store.take(1, 1, 0.001)
+        store.take(2, 1, 0.001)
+        store.take(1, 1, 0.001)
+        store.take(3, 1, 0.001)
+        self.assertEqual(len(store), 2)
+        # Bucket 2 was evicted, so it starts full again.
+        self.assertTrue(store.take(2, 1, 0.001)[0])
+        self.assertFalse(store.take(3, 1, 0.001)[0])
+
+    def test_bucket_key_is_stable(self):
+        self.assertEqual(
+            bucket_key("login", "ip", "127.0.0.1"),
+            bucket_key("login", "ip", "127.0.0.1"),
+        )
+        self.assertNotEqual(
+            bucket_key("login", "ip", "127.0.0.1"),
+            bucket_key("login", "ip", "127.0.0.2"),
+        )
+
+
+@override_settings(
+    THROTTLE_ENABLED=True,
+    THROTTLE_RATES={
+        "login": {"ip": (5, 0.001), "username": (2, 0.001)},
+        "password_reset": {"ip": (5, 0.001), "email": (1, 0.001)},
+        "api_login": "login",
+        "user_availability": {"ip": (3, 0.001)},
+    },
+    THROTTLE_GET_URLS=["user_availability"],
+)
+class ThrottleMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        testuser = CustomUser.objects.create(
+            username="testuser", email="testuser@email.com"
+        )
+        testuser.set_password("wibble1234")
+        testuser.save()
+
+    def sign_in(self, username="testuser"):
+        return self.client.post(
+            reverse("login"), {"username": username, "password": "wrong"}
+        )
+
+    def test_login_is_throttled_per_username(self):
+        self.assertEqual(self.sign_in().status_code, 200)
+        self.assertEqual(self.sign_in("TestUser").status_code, 200)
+        response = self.sign_in()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.sign_in("otheruser").status_code, 200)
+
+    def test_api_login_shares_the_username_bucket(self):
+        def api_sign_in(username):
+            return self.client.post(
+                reverse("api_login"),
+                json.dumps({"username": username, "password": "wrong"}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(self.sign_in().status_code, 200)
+        self.assertEqual(api_sign_in("TestUser").status_code, 401)
+        response = api_sign_in("testuser")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.sign_in().status_code, 429)
+        self.assertEqual(api_sign_in("otheruser").status_code, 401)
+
+    def test_login_is_throttled_per_ip(self):
+        for i in range(5):
+            self.assertEqual(self.sign_in(f"user{i}").status_code, 200)
+        self.assertEqual(self.sign_in("user5").status_code, 429)
+
+    def test_rejected_login_does_no_hashing_or_queries(self):
+        self.sign_in()
+        self.sign_in()
+        with mock.patch.object(
+            PBKDF2PasswordHasher, "encode"
+        ) as encode, self.assertNumQueries(0):
+            response = self.sign_in()
+        self.assertEqual(response.status_code, 429)
+        encode.assert_not_called()
+
+    def test_password_reset_is_throttled_per_email(self):
+        path = reverse("password_reset")
+        response = self.client.post(path, {"email": "testuser@email.com"})
+        self.assertEqual(response.status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post(path, {"email": "testuser@email.com"})
+        self.assertEqual(response.status_code, 429)
+
+    def test_availability_checks_are_throttled_per_ip(self):
+        path = reverse("user_availability")
+        for query in ({"username": "testuser"}, {"email": "a@example.com"}):
+            self.assertEqual(self.client.get(path, query).status_code, 200)
+        self.assertEqual(
+            self.client.get(path, {"email": "b@example.com"}).status_code, 200
+        )
+        response = self.client.get(path, {"username": "someone"})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        response = self.client.get(
+            path, {"username": "someone"}, REMOTE_ADDR="10.0.0.2"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_requests_are_not_throttled(self):
+        for _ in range(10):
+            self.assertEqual(
+                self.client.get(reverse("login")).status_code, 200
+            )
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.last_login import LastLoginWriter
+from accounts.models import CustomUser
+
+
+@override_settings(
+    USER_CACHE_SECONDS=300,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        testuser = CustomUser.objects.create(
+            username="testuser",
+            email="testuser@email.com",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+        )
+        testuser.set_password("wibble1234")
+        testuser.save()
+        cls.testuser = testuser
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.client.force_login(self.testuser)
+
+    def user_queries(self, path=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path or reverse("home"))
+        return response, [
+            query["sql"]
+            for query in context.captured_queries
+            if '"accounts_customuser"' in query["sql"]
+        ]
+
+    def test_steady_state_page_views_do_not_query_the_user_table(self):
+        _, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+        for _ in range(3):
+            response, queries = self.user_queries()
+            self.assertEqual(queries, [])
+            self.assertContains(response, "Tester")
+
+    def test_user_update_invalidates(self):
+        self.user_queries()
+        self.client.post(
+            reverse("user_update", args=[self.testuser.pk]),
+            {
+                "username": "testuser",
+                "email": "testuser@email.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "position": "Developer",
+            },
+        )
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, "Developer")
+
+    def test_password_change_signs_out_other_sessions(self):
+        other = Client()
+        other.force_login(self.testuser)
+        other.get(reverse("home"))
+        response = self.client.post(
+            reverse("password_change"),
+            {
+                "old_password": "wibble1234",
+                "new_password1": "wobble5678!",
+                "new_password2": "wobble5678!",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertContains(self.client.get(reverse("home")), "Tester")
+        self.assertContains(
+            other.get(reverse("home")), "You are not signed in"
+        )
+
+    def test_save_invalidates(self):
+        self.user_queries()
+        user = CustomUser.objects.get(pk=self.testuser.pk)
+        user.position = "Manager"
+        user.save()
+        response, _ = self.user_queries()
+        self.assertContains(response, "Manager")
+
+    def test_buffered_last_login_write_invalidates(self):
+        self.user_queries()
+        writer = LastLoginWriter()
+        writer._pending[self.testuser.pk] = timezone.now()
+        writer.flush()
+        _, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(USER_CACHE_SECONDS=0)
+    def test_disabled(self):
+        self.user_queries()
+        _, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
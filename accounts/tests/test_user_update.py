@@ -0,0 +1,120 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.forms import CustomUserUpdateForm
+from accounts.models import CustomUser
+
+
+class ChangeAwareUserUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.testuser = CustomUser.objects.create(
+            username="testuser",
+            email="testuser@email.com",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+        )
+
+    def setUp(self):
+        self.client.force_login(self.testuser)
+        self.url = reverse("user_update", args=[self.testuser.pk])
+
+    def open_form(self):
+        """
+        Return the form data as rendered, like a newly opened tab.
+        """
+        form = self.client.get(self.url).context["form"]
+        data = {name: form[name].value() for name in form.fields}
+        data["original"] = form.original
+        return data
+
+    def post(self, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, data)
+        updates = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "accounts_customuser"')
+        ]
+        return response, context.captured_queries, updates
+
+    def test_unchanged_form_writes_nothing(self):
+        data = self.open_form()
+        response, queries, updates = self.post(data)
+        self.assertRedirects(
+            response, reverse("home"), fetch_redirect_response=False
+        )
+        self.assertEqual(updates, [])
+        # Only the user to update: no uniqueness checks and no UPDATE.
+        self.assertEqual(len(queries), 1, queries)
+
+    def test_only_changed_fields_are_written(self):
+        data = self.open_form()
+        data["position"] = "Developer"
+        response, queries, updates = self.post(data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"position"', updates[0])
+        self.assertNotIn('"first_name"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+        self.assertEqual(len(queries), 2, queries)
+        self.testuser.refresh_from_db()
+        self.assertEqual(self.testuser.position, "Developer")
+
+    def test_changed_username_is_checked_for_uniqueness(self):
+        CustomUser.objects.create(username="Taken")
+        data = self.open_form()
+        data["username"] = "taken"
+        response, _, updates = self.post(data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(updates, [])
+
+    def test_edits_to_different_fields_in_two_tabs_are_kept(self):
+        first_tab = self.open_form()
+        second_tab = self.open_form()
+        first_tab["first_name"] = "Changed"
+        self.post(first_tab)
+        second_tab["position"] = "Developer"
+        response, _, _ = self.post(second_tab)
+        self.assertEqual(response.status_code, 302)
+        self.testuser.refresh_from_db()
+        self.assertEqual(self.testuser.first_name, "Changed")
+        self.assertEqual(self.testuser.position, "Developer")
+
+    def test_edits_to_the_same_field_in_two_tabs_conflict(self):
+        first_tab = self.open_form()
+        second_tab = self.open_form()
+        first_tab["position"] = "Developer"
+        self.post(first_tab)
+        second_tab["position"] = "Manager"
+        response, _, updates = self.post(second_tab)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(updates, [])
+        self.assertContains(response, "changed to “Developer” elsewhere")
+        self.testuser.refresh_from_db()
+        self.assertEqual(self.testuser.position, "Developer")
+
+        # Submitting again, after seeing the other value, replaces it.
+        second_tab["original"] = response.context["form"].original
+        response, _, _ = self.post(second_tab)
+        self.assertEqual(response.status_code, 302)
+        self.testuser.refresh_from_db()
+        self.assertEqual(self.testuser.position, "Manager")
+
+    def test_change_between_validation_and_save_is_not_overwritten(self):
+        form = CustomUserUpdateForm(
+            {**self.open_form(), "position": "Manager"},
+            instance=CustomUser.objects.get(pk=self.testuser.pk),
+        )
+        self.assertTrue(form.is_valid())
+        CustomUser.objects.filter(pk=self.testuser.pk).update(
+            position="Developer"
+        )
+        form.save()
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), [form.race_message])
+        self.testuser.refresh_from_db()
+        self.assertEqual(self.testuser.position, "Developer")
@@ -1,7 +1,11 @@
+import csv
+import json
+
 from django.test import TestCase, SimpleTestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from accounts.export import CSV_HEADER
 from accounts.models import CustomUser
 
 
@@ -90,3 +94,55 @@ class TestHomePageContent(TestCase):
         self.assertNotContains(response, "Email:")
         self.assertNotContains(response, "Date registered:")
         self.assertNotContains(response, "Last logged in:")
+
+
+class TestPersonalDataExportView(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.testuser = CustomUser.objects.create(
+            username="testuser",
+            first_name="Test",
+            last_name="User",
+            position="Tester",
+            email="testuser@email.com",
+        )
+        cls.testuser.set_password("wibble1234")
+        cls.testuser.save()
+
+    def test_view_requires_login(self):
+        response = self.client.get(reverse("user_export"))
+        self.assertRedirects(
+            response, f"{reverse('login')}?next={reverse('user_export')}"
+        )
+
+    def test_json_export(self):
+        self.client.post(
+            reverse("login"),
+            {"username": "testuser", "password": "wibble1234"},
+        )
+        response = self.client.get(reverse("user_export"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data["profile"]["username"], "testuser")
+        self.assertEqual(data["profile"]["position"], "Tester")
+        self.assertEqual(len(data["logins"]), 1)
+        self.assertEqual(data["logins"][0]["ip_address"], "127.0.0.1")
+        self.assertEqual(len(data["sessions"]), 1)
+        self.assertNotIn(
+            self.client.session.session_key, json.dumps(data["sessions"])
+        )
+
+    def test_csv_export(self):
+        self.client.login(username="testuser", password="wibble1234")
+        response = self.client.get(reverse("user_export"), {"format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(
+            csv.reader(
+                b"".join(response.streaming_content).decode().splitlines()
+            )
+        )
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertIn(["profile", "username", "testuser", "", "", ""], rows)
+        self.assertEqual([row[0] for row in rows].count("login"), 1)
+        self.assertEqual([row[0] for row in rows].count("session"), 1)
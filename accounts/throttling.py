@@ -0,0 +1,94 @@
+"""
+Token buckets for throttling sign-in and password reset attempts.
+
+Each bucket holds up to `burst` tokens and refills at `rate` tokens per
+second. A bucket is stored as a single float under a 64-bit hash of its key,
+which takes under 200 bytes in memory. MemoryBucketStore is local to the
+worker process and evicts the least recently used buckets once it holds
+max_keys of them; an evicted bucket simply starts full again.
+CacheBucketStore shares buckets between workers through the default cache.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def client_ip(request):
+    """
+    Return the client's address, read from THROTTLE_IP_HEADER so that it is
+    not the proxy's behind one.
+    """
+    value = request.META.get(settings.THROTTLE_IP_HEADER, "")
+    return value.split(",")[0].strip()
+
+
+def bucket_key(*parts):
+    digest = hashlib.blake2b("\0".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def take_token(full_at, burst, rate, now):
+    """
+    Take one token from a bucket, given the time at which it will be full
+    again (None for a bucket that is already full). Return (allowed,
+    new_full_at, retry_after).
+
+    Storing only the time the bucket refills is the generic cell rate
+    algorithm form of a token bucket, which keeps each bucket to one float.
+    """
+    if full_at is None or full_at < now:
+        full_at = now
+    # Work from the refill time still owed rather than from absolute times,
+    # so a full bucket is never rejected through floating point rounding.
+    owed = full_at - now
+    overdraft = owed + (1 - burst) / rate
+    if overdraft > 0:
+        return False, full_at, overdraft
+    return True, full_at + 1 / rate, 0
+
+
+class MemoryBucketStore:
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key, burst, rate):
+        now = time.monotonic()
+        with self._lock:
+            allowed, full_at, retry_after = take_token(
+                self._buckets.get(key), burst, rate, now
+            )
+            self._buckets[key] = full_at
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class CacheBucketStore:
+    """
+    Buckets kept in the default cache. The read and write are not atomic, so
+    concurrent requests for the same key can occasionally both get a token.
+    """
+
+    key_prefix = "accounts.throttling"
+
+    def take(self, key, burst, rate):
+        now = time.time()
+        cache_key = f"{self.key_prefix}:{key:x}"
+        allowed, full_at, retry_after = take_token(
+            cache.get(cache_key), burst, rate, now
+        )
+        # Once the bucket is full again it is the same as a missing one.
+        cache.set(cache_key, full_at, timeout=math.ceil(full_at - now) + 1)
+        return allowed, retry_after
@@ -0,0 +1,136 @@
+"""
+Signed tokens for the JSON API.
+
+Access tokens are signed with SECRET_KEY and carry the user's pk and the
+time they were issued, so checking one is an HMAC and a clock comparison
+with no database access. They are valid for API_ACCESS_TOKEN_SECONDS and
+cannot be revoked, so keep that short.
+
+Refresh tokens live for API_REFRESH_TOKEN_SECONDS and are exchanged for a
+new pair at each refresh. Every token belongs to a family started at sign-in.
+Only revocations are stored, as RevokedToken rows: the id of each refresh
+token once it has been used, and the family id when the client signs out.
+Using a spent refresh token again means it was copied, so it revokes the
+whole family. A refresh token also carries part of the user's session auth
+hash, so changing the password ends every family.
+"""
+
+import datetime
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
+
+from .models import CustomUser, RevokedToken
+
+
+ACCESS_SALT = "accounts.tokens.access"
+REFRESH_SALT = "accounts.tokens.refresh"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _hash(user):
+    return user.get_session_auth_hash()[:16]
+
+
+def issue_tokens(user, family=None):
+    """
+    Return an access token and a refresh token for user. The refresh token
+    starts a new family unless one is given.
+    """
+    access = signing.dumps({"u": user.pk}, salt=ACCESS_SALT)
+    refresh = signing.dumps(
+        {
+            "u": user.pk,
+            "j": secrets.token_urlsafe(16),
+            "f": family or secrets.token_urlsafe(16),
+            "h": _hash(user),
+        },
+        salt=REFRESH_SALT,
+    )
+    return access, refresh
+
+
+def verify_access_token(token):
+    """
+    Return the pk of the user an access token was issued to.
+    """
+    try:
+        payload = signing.loads(
+            token, salt=ACCESS_SALT, max_age=settings.API_ACCESS_TOKEN_SECONDS
+        )
+    except signing.BadSignature:
+        raise InvalidToken
+    return payload["u"]
+
+
+def _load_refresh_token(token):
+    try:
+        return signing.loads(
+            token,
+            salt=REFRESH_SALT,
+            max_age=settings.API_REFRESH_TOKEN_SECONDS,
+        )
+    except signing.BadSignature:
+        raise InvalidToken
+
+
+def _expires_at():
+    """
+    When tokens issued now expire, after which their revocation can go.
+    """
+    return timezone.now() + datetime.timedelta(
+        seconds=settings.API_REFRESH_TOKEN_SECONDS
+    )
+
+
+def _revoke(jti):
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=jti, expires_at=_expires_at())],
+        ignore_conflicts=True,
+    )
+
+
+def refresh_tokens(token):
+    """
+    Spend a refresh token and return the user with a new pair of tokens in
+    the same family.
+    """
+    payload = _load_refresh_token(token)
+    # Read from the primary, which a replica may not have caught up with.
+    revoked = RevokedToken.objects.using(
+        router.db_for_write(RevokedToken)
+    ).filter(jti__in=[payload["j"], payload["f"]])
+    if revoked.exists():
+        # A spent token is being reused: whoever holds the family's current
+        # token may not be its owner.
+        _revoke(payload["f"])
+        raise InvalidToken
+    try:
+        user = CustomUser._default_manager.get(pk=payload["u"])
+    except CustomUser.DoesNotExist:
+        raise InvalidToken
+    if not user.is_active or _hash(user) != payload["h"]:
+        raise InvalidToken
+    try:
+        with transaction.atomic():
+            # Fails if a concurrent request has already spent the token.
+            RevokedToken.objects.create(
+                jti=payload["j"], expires_at=_expires_at()
+            )
+    except IntegrityError:
+        _revoke(payload["f"])
+        raise InvalidToken
+    return user, issue_tokens(user, family=payload["f"])
+
+
+def revoke_family(token):
+    """
+    Sign out the client holding a refresh token, ending its family.
+    """
+    _revoke(_load_refresh_token(token)["f"])
@@ -1,12 +1,50 @@
+from django.contrib.auth import views as auth_views
 from django.urls import path
+from django.views.generic import TemplateView
 
+from .api import LoginApiView, LogoutApiView, ProfileApiView, RefreshApiView
+from .page_cache import cache_anonymous_page
 from .views import RegisterView
+from .views import AvailabilityView
 from .views import CustomUserUpdateView
+from .views import PersonalDataExportView
+from .views import AccountDeletionView
+from .views import MetricsView
 
 
 urlpatterns = [
-    path("register/", RegisterView.as_view(), name="register"),
+    path(
+        "register/",
+        cache_anonymous_page(RegisterView.as_view()),
+        name="register",
+    ),
+    # Served ahead of django.contrib.auth.urls to cache the empty forms.
+    path(
+        "login/",
+        cache_anonymous_page(auth_views.LoginView.as_view()),
+        name="login",
+    ),
+    path(
+        "password_reset/",
+        cache_anonymous_page(auth_views.PasswordResetView.as_view()),
+        name="password_reset",
+    ),
+    path("available/", AvailabilityView.as_view(), name="user_availability"),
     path(
         "<int:pk>/update/", CustomUserUpdateView.as_view(), name="user_update"
     ),
+    path("export/", PersonalDataExportView.as_view(), name="user_export"),
+    path("delete/", AccountDeletionView.as_view(), name="user_delete"),
+    path(
+        "delete/done/",
+        TemplateView.as_view(
+            template_name="registration/user_delete_done.html"
+        ),
+        name="user_delete_done",
+    ),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("api/login/", LoginApiView.as_view(), name="api_login"),
+    path("api/refresh/", RefreshApiView.as_view(), name="api_refresh"),
+    path("api/logout/", LogoutApiView.as_view(), name="api_logout"),
+    path("api/profile/", ProfileApiView.as_view(), name="api_profile"),
 ]
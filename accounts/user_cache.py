@@ -0,0 +1,64 @@
+"""
+Cross-request cache of the signed-in user.
+
+With USER_CACHE_SECONDS above 0, CachedAuthenticationMiddleware takes
+request.user from the shared cache instead of loading the CustomUser row on
+every request. A cached user is only used if the session's auth hash still
+matches it, as Django checks for a user it loads; anything else falls back
+to django.contrib.auth.get_user(), which also handles logging the session
+out.
+
+Every save or delete of a CustomUser, and the bulk writes that bypass
+signals, call invalidate_user(), and entries expire after
+USER_CACHE_SECONDS in any case. Keys carry KEY_VERSION, so that after a
+change to CustomUser's fields, workers running the new code ignore copies
+pickled by the old.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+
+KEY_VERSION = 1
+
+
+def cache_key(user_id):
+    return f"accounts.user:{user_id}"
+
+
+def get_user(request):
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        return auth.get_user(request)
+    user = cache.get(cache_key(user_id), version=KEY_VERSION)
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if (
+        user is not None
+        and request.session.get(BACKEND_SESSION_KEY)
+        in settings.AUTHENTICATION_BACKENDS
+        and session_hash
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(
+            cache_key(user_id),
+            user,
+            settings.USER_CACHE_SECONDS,
+            version=KEY_VERSION,
+        )
+    return user
+
+
+def invalidate_user(*user_ids):
+    cache.delete_many(
+        [cache_key(user_id) for user_id in user_ids], version=KEY_VERSION
+    )
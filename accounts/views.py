@@ -1,9 +1,26 @@
+from django.conf import settings
 from django.urls import reverse_lazy
-from django.http import HttpResponseRedirect
-from django.views.generic import CreateView, UpdateView
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.contrib.auth import logout
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.crypto import constant_time_compare
+from django.views import View
+from django.views.generic import CreateView, FormView, UpdateView
 
+from . import metrics
+from .availability import FIELDS, is_available
+from .deletion import request_deletion
+from .export import stream_csv, stream_json
 from .models import CustomUser
 from .forms import (
+    AccountDeletionForm,
     CustomUserCreationForm,
     CustomUserChangeForm,
     CustomUserUpdateForm,
@@ -16,8 +33,93 @@ class RegisterView(CreateView):
     template_name = "registration/register.html"
 
 
+class AvailabilityView(View):
+    """
+    Tells the registration page whether ?username= or ?email= is free.
+    """
+
+    def get(self, request):
+        for field in FIELDS:
+            value = request.GET.get(field, "").strip()
+            if value:
+                return JsonResponse(
+                    {field: value, "available": is_available(field, value)}
+                )
+        return JsonResponse({"error": "invalid_request"}, status=400)
+
+
 class CustomUserUpdateView(UpdateView):
     model = CustomUser
     form_class = CustomUserUpdateForm
     success_url = reverse_lazy("home")
     template_name = "registration/user_update_form.html"
+
+    def form_valid(self, form):
+        self.object = form.save()
+        if form.errors:
+            # Another save changed the same fields first.
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AccountDeletionView(LoginRequiredMixin, FormView):
+    """
+    Deactivates the signed-in user's account once they confirm their
+    password. The rest of their data is purged in the background by the
+    purge_deleted_accounts management command.
+    """
+
+    form_class = AccountDeletionForm
+    success_url = reverse_lazy("user_delete_done")
+    template_name = "registration/user_delete_form.html"
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        request_deletion(self.request.user)
+        logout(self.request)
+        return super().form_valid(form)
+
+
+class PersonalDataExportView(LoginRequiredMixin, View):
+    """
+    Streams the signed-in user's profile, login history and active sessions
+    as JSON, or as CSV with ?format=csv.
+    """
+
+    def get(self, request):
+        if request.GET.get("format") == "csv":
+            response = StreamingHttpResponse(
+                stream_csv(request.user), content_type="text/csv"
+            )
+            filename = "personal_data.csv"
+        else:
+            response = StreamingHttpResponse(
+                stream_json(request.user), content_type="application/json"
+            )
+            filename = "personal_data.json"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class MetricsView(View):
+    """
+    Serves the request metrics of every worker in the Prometheus text format
+    to scrapers that send METRICS_TOKEN as a bearer token.
+    """
+
+    def get(self, request):
+        if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+            raise Http404
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not constant_time_compare(
+            request.META.get("HTTP_AUTHORIZATION", ""), expected
+        ):
+            return HttpResponseForbidden()
+        return HttpResponse(
+            metrics.render_prometheus(metrics.collect()),
+            content_type="text/plain; version=0.0.4",
+        )
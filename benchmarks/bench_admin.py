@@ -0,0 +1,85 @@
+"""
+Seed a large user table and compare the stock change list techniques
+(COUNT(*), OFFSET pagination) with the ones CustomUserAdmin uses (planner
+estimates, keyset pagination), plus change list and search page latency.
+Estimates and trigram indexes only take effect on PostgreSQL.
+"""
+
+from benchmarks.harness import benchmark_database, measure, report
+
+
+USERS = 200000
+PER_PAGE = 100
+
+
+def seed():
+    from accounts.models import CustomUser
+
+    CustomUser.objects.bulk_create(
+        (
+            CustomUser(
+                username=f"user{i:07}",
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                email=f"user{i:07}@email.com",
+                position="Tester",
+                password="!",
+            )
+            for i in range(USERS)
+        ),
+        batch_size=5000,
+    )
+    return CustomUser.objects.create_superuser(
+        username="admin", email="admin@email.com", password="wibble1234"
+    )
+
+
+def run(iterations=20):
+    from django.core.paginator import Paginator
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from accounts.admin import EstimatedCountPaginator
+    from accounts.models import CustomUser
+
+    client = Client()
+    client.force_login(seed())
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE accounts_customuser")
+
+    users = CustomUser.objects.order_by("username")
+    deep = USERS - PER_PAGE
+    last_key = users.values_list("username", flat=True)[deep - 1]
+    url = reverse("admin:accounts_customuser_changelist")
+    return {
+        "count: COUNT(*)": measure(
+            lambda: Paginator(users, PER_PAGE).count, iterations
+        ),
+        "count: estimated": measure(
+            lambda: EstimatedCountPaginator(users, PER_PAGE).count,
+            iterations,
+        ),
+        "last page: OFFSET": measure(
+            lambda: list(users[deep : deep + PER_PAGE]), iterations
+        ),
+        "last page: keyset": measure(
+            lambda: list(users.filter(username__gt=last_key)[:PER_PAGE]),
+            iterations,
+        ),
+        "changelist: first page": measure(
+            lambda: client.get(url), iterations
+        ),
+        "changelist: last page": measure(
+            lambda: client.get(url, {"after": last_key}), iterations
+        ),
+        "changelist: search": measure(
+            lambda: client.get(url, {"q": "first12345"}), iterations
+        ),
+    }
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report(f"User admin with {USERS} users", run())
@@ -0,0 +1,77 @@
+"""
+Compare requests/sec and latency for the sign-in and register pages served
+by the sync views through the WSGI handler and by the async views through
+the ASGI handler, at high concurrency. Besides GETs of the empty forms,
+sign-in and registration are POSTed, which hash a password and write to
+the database.
+"""
+
+import itertools
+
+from benchmarks.harness import (
+    benchmark_database,
+    drive_asgi,
+    drive_wsgi,
+    report,
+)
+
+
+CONCURRENCY = 64
+
+PASSWORD = "wibble1234"
+
+# POSTs hash a password each, so fewer are made than GETs.
+POST_SHARE = 10
+
+_serial = itertools.count()
+
+
+def sign_in_data(n):
+    return {"username": "benchuser", "password": PASSWORD}
+
+
+def register_data(n):
+    serial = next(_serial)
+    return {
+        "username": f"newuser{serial}",
+        "first_name": "New",
+        "last_name": "User",
+        "position": "Tester",
+        "email": f"newuser{serial}@example.com",
+        "password1": PASSWORD,
+        "password2": PASSWORD,
+    }
+
+
+def run(iterations=1000):
+    from django.test import override_settings
+    from django.urls import reverse
+
+    from accounts.models import CustomUser
+
+    CustomUser.objects.create_user(
+        username="benchuser", email="benchuser@example.com", password=PASSWORD
+    )
+    posts = max(1, iterations // POST_SHARE)
+    cases = (
+        ("GET login", "login", iterations, None),
+        ("GET register", "register", iterations, None),
+        ("POST login", "login", posts, sign_in_data),
+        ("POST register", "register", posts, register_data),
+    )
+    results = {}
+    for name, url_name, count, data in cases:
+        with override_settings(ROOT_URLCONF="config.urls"):
+            results[f"wsgi: {name}"] = drive_wsgi(
+                reverse(url_name), count, CONCURRENCY, data=data
+            )
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            results[f"asgi: {name}"] = drive_asgi(
+                reverse(url_name), count, CONCURRENCY, data=data
+            )
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report(f"WSGI versus ASGI at concurrency {CONCURRENCY}", run())
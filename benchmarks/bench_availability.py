@@ -0,0 +1,47 @@
+"""
+Compare availability checks/sec with and without the Bloom filter against a
+seeded user table, for unused usernames, which the filter answers alone,
+and for taken ones, which still need the database.
+"""
+
+import itertools
+
+from benchmarks.harness import benchmark_database, measure, report
+
+USERS = 50000
+
+
+def run(iterations=5000):
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from accounts.availability import is_available, taken_filter
+    from benchmarks.bench_flows import seed_users
+
+    seed_users(USERS)
+    url = reverse("user_availability")
+    results = {}
+    for name, refresh in (("database", 0), ("filter", 60)):
+        with override_settings(AVAILABILITY_FILTER_REFRESH_SECONDS=refresh):
+            taken_filter.clear()
+            is_available("username", "seeduser0")
+            unused = (f"newuser{i}" for i in itertools.count())
+            taken = (f"seeduser{i % USERS}" for i in itertools.count())
+            results[f"{name}: unused"] = measure(
+                lambda: is_available("username", next(unused)), iterations
+            )
+            results[f"{name}: taken"] = measure(
+                lambda: is_available("username", next(taken)), iterations
+            )
+            client = Client()
+            results[f"{name}: endpoint"] = measure(
+                lambda: client.get(url, {"username": next(unused)}),
+                iterations // 5,
+            )
+    taken_filter.clear()
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report(f"Availability checks against {USERS} users", run())
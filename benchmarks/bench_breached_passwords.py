@@ -0,0 +1,109 @@
+"""
+Build a breached password index of random hashes and compare validation
+latency and the private (anonymous) memory each worker needs against
+Django's CommonPasswordValidator. Pages of the memory-mapped index are file
+backed, so they are shared by every worker through the page cache.
+"""
+
+import itertools
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.harness import measure, report
+
+
+INDEX_SIZE = 10000000
+
+
+def rss_kb():
+    """
+    Return the anonymous and file-backed resident memory of this process
+    in kB, or (None, None) where /proc is not available.
+    """
+    values = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name.startswith("Rss"):
+                    values[name] = int(value.split()[0])
+    except OSError:
+        return None, None
+    return values["RssAnon"], values["RssFile"]
+
+
+def run(iterations=20000, index_size=INDEX_SIZE):
+    from django.contrib.auth.password_validation import (
+        CommonPasswordValidator,
+    )
+    from django.core.exceptions import ValidationError
+
+    from accounts.password_validation import (
+        BreachedPasswordValidator,
+        password_key,
+        write_index,
+    )
+
+    def validate(validator, password):
+        try:
+            validator.validate(password)
+        except ValidationError:
+            pass
+
+    fd, path = tempfile.mkstemp(suffix=".idx")
+    os.close(fd)
+    results = {}
+    try:
+        rng = random.Random(0)
+        keys = (rng.getrandbits(64) for _ in range(index_size - 1))
+        write_index(
+            itertools.chain(keys, [password_key("password1")]),
+            path,
+            chunk_size=2000000,
+        )
+
+        anon_before, file_before = rss_kb()
+        common = CommonPasswordValidator()
+        anon_after, _ = rss_kb()
+        if anon_before is not None:
+            print(f"Common list: {anon_after - anon_before} kB private")
+
+        breached = BreachedPasswordValidator(index_path=path)
+        results["common: hit"] = measure(
+            lambda: validate(common, "password1"), iterations
+        )
+        results["common: miss"] = measure(
+            lambda: validate(common, "wibble1234"), iterations
+        )
+        anon_before, file_before = rss_kb()
+        results["breached: hit"] = measure(
+            lambda: validate(breached, "password1"), iterations
+        )
+        passwords = [f"wibble{i}" for i in range(iterations)]
+        results["breached: miss"] = measure(
+            lambda: validate(breached, passwords.pop()), iterations
+        )
+        anon_after, file_after = rss_kb()
+        if anon_before is not None:
+            print(
+                f"Breached index of {index_size} hashes "
+                f"({os.path.getsize(path) // 1024} kB): "
+                f"{anon_after - anon_before} kB private, "
+                f"{file_after - file_before} kB shared page cache"
+            )
+    finally:
+        os.remove(path)
+    return results
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+
+    django.setup()
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else INDEX_SIZE
+    report("Breached password lookups", run(index_size=size))
@@ -0,0 +1,57 @@
+"""
+Measure the signed-in home page through the WSGI handler, which opens and
+closes database connections the way a production worker does, with a new
+connection per request and with connections reused for CONN_MAX_AGE, and
+report how many connections each case opened.
+
+Run with DB_POOL_SIZE set to measure the pooled backend instead of plain
+reuse. SQLite in-memory test databases never close their connection, so run
+this against PostgreSQL.
+"""
+
+from benchmarks.harness import benchmark_database, drive_wsgi, report
+
+
+def run(iterations=500):
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.test import Client
+    from django.urls import reverse
+
+    from accounts.models import CustomUser
+
+    user = CustomUser.objects.create(username="benchuser")
+    client = Client()
+    client.force_login(user)
+    cookie = "; ".join(
+        f"{key}={morsel.value}" for key, morsel in client.cookies.items()
+    )
+    home = reverse("home")
+
+    connection = connections["default"]
+    opened = []
+
+    def count_connection(sender, connection, **kwargs):
+        opened.append(connection)
+
+    connection_created.connect(count_connection)
+    results = {}
+    try:
+        for name, max_age in (("new per request", 0), ("reused", 600)):
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+            opened.clear()
+            # One thread, so that every request reuses the same connection.
+            results[name] = drive_wsgi(home, iterations, 1, cookie)
+            print(
+                f"{type(connection).__module__}, {name}: "
+                f"{len(opened)} connections for {iterations} requests"
+            )
+    finally:
+        connection_created.disconnect(count_connection)
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report("Connection setup per request", run())
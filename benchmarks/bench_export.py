@@ -0,0 +1,67 @@
+"""
+Stream the personal data export for a user with a large synthetic login
+history and report throughput and peak Python memory, which should stay
+flat as the history grows.
+"""
+
+import time
+import tracemalloc
+
+from benchmarks.harness import benchmark_database
+
+
+HISTORY_SIZES = (10000, 100000)
+
+
+def run():
+    from datetime import timedelta
+
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+
+    from accounts.models import CustomUser, LoginEvent
+
+    user = CustomUser.objects.create(username="benchuser")
+    client = Client()
+    client.force_login(user)
+    created = 0
+    started_at = timezone.now()
+    for size in HISTORY_SIZES:
+        LoginEvent.objects.bulk_create(
+            (
+                LoginEvent(
+                    user=user,
+                    created_at=started_at - timedelta(minutes=i),
+                    ip_address="192.0.2.1",
+                    user_agent="Mozilla/5.0 (benchmark)",
+                )
+                for i in range(created, size)
+            ),
+            batch_size=5000,
+        )
+        created = size
+        for export_format in ("json", "csv"):
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = client.get(
+                reverse("user_export"), {"format": export_format}
+            )
+            size_bytes = sum(
+                len(chunk) for chunk in response.streaming_content
+            )
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"  {size:>7} logins {export_format:>4}: "
+                f"{size / elapsed:>9.0f} rows/sec, "
+                f"{size_bytes / 1e6:>6.1f} MB streamed, "
+                f"peak {peak / 1e6:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        print("Personal data export")
+        run()
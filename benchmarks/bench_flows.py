@@ -0,0 +1,318 @@
+"""
+End-to-end benchmark of the account flows against a seeded user table.
+
+Each flow in FLOWS is driven through the test client, and the sign-in page
+and the authenticated home page are also served by in-process WSGI and ASGI
+handlers. Results can be saved as a JSON baseline and later runs compared
+against it; a comparison fails on slower p99 latency or throughput beyond
+the tolerance, on more queries per request than the baseline, or on a flow
+exceeding its budget in QUERY_BUDGETS.
+
+    python -m benchmarks.bench_flows --save
+    python -m benchmarks.bench_flows --compare
+"""
+
+import argparse
+import itertools
+import sys
+
+from benchmarks.harness import (
+    baseline_path,
+    benchmark_database,
+    compare_baseline,
+    drive_asgi,
+    drive_wsgi,
+    measure,
+    report,
+    save_baseline,
+)
+
+
+BASELINE = "flows"
+
+PASSWORDS = ("wibble1234", "wobble5678")
+
+# Maximum queries per request for each flow.
+QUERY_BUDGETS = {
+    "register": 4,
+    "login": 6,
+    "home": 2,
+    "user_update": 2,
+    "password_change": 8,
+    "password_reset": 1,
+}
+
+CONCURRENCY = 16
+
+_serial = itertools.count()
+
+
+def seed_users(count, batch_size=5000):
+    """
+    Insert count users sharing one password hash, so seeding a large table
+    does not spend its time hashing.
+    """
+    from django.contrib.auth.hashers import make_password
+
+    from accounts.models import CustomUser
+
+    password = make_password(PASSWORDS[0])
+    for start in range(0, count, batch_size):
+        CustomUser.objects.bulk_create(
+            CustomUser(
+                username=f"seeduser{i}",
+                first_name="Seed",
+                last_name="User",
+                position="Tester",
+                email=f"seeduser{i}@example.com",
+                password=password,
+            )
+            for i in range(start, min(start + batch_size, count))
+        )
+
+
+def create_flow_user():
+    from accounts.models import CustomUser
+
+    n = next(_serial)
+    return CustomUser.objects.create_user(
+        username=f"flowuser{n}",
+        first_name="Flow",
+        last_name="User",
+        position="Tester",
+        email=f"flowuser{n}@example.com",
+        password=PASSWORDS[0],
+    )
+
+
+def expect(response, status_code):
+    if response.status_code != status_code:
+        raise AssertionError(
+            f"{response.request['PATH_INFO']} returned "
+            f"{response.status_code}, expected {status_code}"
+        )
+    return response
+
+
+def register_flow():
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    url = reverse("register")
+
+    def request():
+        n = next(_serial)
+        expect(
+            client.post(
+                url,
+                {
+                    "username": f"newuser{n}",
+                    "first_name": "New",
+                    "last_name": "User",
+                    "position": "Tester",
+                    "email": f"newuser{n}@example.com",
+                    "password1": PASSWORDS[0],
+                    "password2": PASSWORDS[0],
+                },
+            ),
+            302,
+        )
+
+    return request
+
+
+def login_flow():
+    from django.test import Client
+    from django.urls import reverse
+
+    user = create_flow_user()
+    url = reverse("login")
+
+    def request():
+        expect(
+            Client().post(
+                url, {"username": user.username, "password": PASSWORDS[0]}
+            ),
+            302,
+        )
+
+    return request
+
+
+def home_flow():
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    client.force_login(create_flow_user())
+    url = reverse("home")
+
+    def request():
+        expect(client.get(url), 200)
+
+    return request
+
+
+def user_update_flow():
+    from django.test import Client
+    from django.urls import reverse
+
+    user = create_flow_user()
+    client = Client()
+    client.force_login(user)
+    url = reverse("user_update", args=[user.pk])
+    positions = itertools.cycle(["Tester", "Developer"])
+
+    def request():
+        expect(
+            client.post(
+                url,
+                {
+                    "username": user.username,
+                    "first_name": user.first_name,
+                    "last_name": user.last_name,
+                    "position": next(positions),
+                    "email": user.email,
+                },
+            ),
+            302,
+        )
+
+    return request
+
+
+def password_change_flow():
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    client.force_login(create_flow_user())
+    url = reverse("password_change")
+    changes = itertools.cycle([PASSWORDS, PASSWORDS[::-1]])
+
+    def request():
+        old, new = next(changes)
+        expect(
+            client.post(
+                url,
+                {
+                    "old_password": old,
+                    "new_password1": new,
+                    "new_password2": new,
+                },
+            ),
+            302,
+        )
+
+    return request
+
+
+def password_reset_flow():
+    from django.test import Client
+    from django.urls import reverse
+
+    user = create_flow_user()
+    client = Client()
+    url = reverse("password_reset")
+
+    def request():
+        expect(client.post(url, {"email": user.email}), 302)
+
+    return request
+
+
+FLOWS = {
+    "register": register_flow,
+    "login": login_flow,
+    "home": home_flow,
+    "user_update": user_update_flow,
+    "password_change": password_change_flow,
+    "password_reset": password_reset_flow,
+}
+
+
+def run(iterations=50, server_iterations=500):
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    results = {}
+    with override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+    ):
+        for name, flow in FLOWS.items():
+            request = flow()
+            # The first request fills caches and compiles templates.
+            request()
+            results[f"client: {name}"] = measure(request, iterations)
+
+    client = Client()
+    client.force_login(create_flow_user())
+    cookie = "; ".join(
+        f"{key}={morsel.value}" for key, morsel in client.cookies.items()
+    )
+    for urlconf, server, drive in (
+        ("config.urls", "wsgi", drive_wsgi),
+        ("config.asgi_urls", "asgi", drive_asgi),
+    ):
+        with override_settings(ROOT_URLCONF=urlconf):
+            results[f"{server}: login page"] = drive(
+                reverse("login"), server_iterations, CONCURRENCY
+            )
+            results[f"{server}: home"] = drive(
+                reverse("home"), server_iterations, CONCURRENCY, cookie
+            )
+    return results
+
+
+def over_budget(results):
+    return [
+        f"client: {name}: {results[f'client: {name}']['queries']} queries, "
+        f"budget {budget}"
+        for name, budget in QUERY_BUDGETS.items()
+        if results[f"client: {name}"]["queries"] > budget
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--server-iterations", type=int, default=500)
+    parser.add_argument(
+        "--save", action="store_true", help="Save the results as baseline."
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Fail on regressions against the saved baseline.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the baseline, as a fraction.",
+    )
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        seed_users(args.users)
+        results = run(args.iterations, args.server_iterations)
+    report(f"Account flows with {args.users} seeded users", results)
+
+    failures = over_budget(results)
+    if args.compare:
+        try:
+            failures += compare_baseline(BASELINE, results, args.tolerance)
+        except FileNotFoundError:
+            failures.append("no baseline to compare with; run with --save")
+    if args.save and not failures:
+        save_baseline(BASELINE, results)
+        print(f"Saved baseline to {baseline_path(BASELINE)}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
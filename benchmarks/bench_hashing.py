@@ -0,0 +1,73 @@
+"""
+Measure anonymous home page latency while other threads hash passwords,
+with hashing inline and in the bounded hashing pool, and report how long
+pooled hashes waited for a thread versus how long they took.
+"""
+
+import threading
+import time
+
+from benchmarks.harness import benchmark_database, measure, report
+
+
+HASHING_THREADS = 16
+
+
+def hash_passwords(stop, rejected):
+    from django.contrib.auth.hashers import make_password
+
+    from accounts.hashers import HashingPoolSaturated
+
+    while not stop.is_set():
+        try:
+            make_password("wibble1234")
+        except HashingPoolSaturated:
+            rejected.append(1)
+            time.sleep(0.01)
+
+
+def run(iterations=200):
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from accounts.hashers import get_pool
+
+    hashers = {
+        "inline": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "pooled": "accounts.hashers.PooledPBKDF2PasswordHasher",
+    }
+    results = {}
+    for name, hasher in hashers.items():
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            get_pool().reset_stats()
+            stop = threading.Event()
+            rejected = []
+            threads = [
+                threading.Thread(target=hash_passwords, args=(stop, rejected))
+                for _ in range(HASHING_THREADS)
+            ]
+            for thread in threads:
+                thread.start()
+            client = Client()
+            home = reverse("home")
+            results[f"{name}: home under hash load"] = measure(
+                lambda: client.get(home), iterations
+            )
+            stop.set()
+            for thread in threads:
+                thread.join()
+            if name == "pooled":
+                stats = get_pool().stats()
+                print(
+                    f"Pool: {stats['completed']} hashes, "
+                    f"{len(rejected)} rejected, "
+                    f"mean wait {stats['mean_wait_ms']:.1f} ms, "
+                    f"max wait {stats['max_wait_ms']:.1f} ms, "
+                    f"mean hash {stats['mean_hash_ms']:.1f} ms"
+                )
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report("Password hashing", run())
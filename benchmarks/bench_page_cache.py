@@ -0,0 +1,50 @@
+"""
+Compare requests/sec for the pages anonymous visitors see, rendered on every
+request, served from the page cache to a new visitor, and revalidated with
+If-None-Match by a returning one.
+"""
+
+from benchmarks.harness import benchmark_database, drive_wsgi, report
+
+
+PAGES = ("home", "login", "register", "password_reset")
+
+CONCURRENCY = 8
+
+
+def run(iterations=2000):
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    results = {}
+    for name in PAGES:
+        path = reverse(name)
+        with override_settings(PAGE_CACHE_SECONDS=0):
+            results[f"{name}: rendered"] = drive_wsgi(
+                path, iterations, CONCURRENCY
+            )
+        with override_settings(PAGE_CACHE_SECONDS=300):
+            cache.clear()
+            client = Client()
+            etag = client.get(path)["ETag"]
+            cookie = "; ".join(
+                f"{key}={morsel.value}"
+                for key, morsel in client.cookies.items()
+            )
+            results[f"{name}: cached"] = drive_wsgi(
+                path, iterations, CONCURRENCY
+            )
+            results[f"{name}: revalidated"] = drive_wsgi(
+                path,
+                iterations,
+                CONCURRENCY,
+                cookie,
+                {"HTTP_IF_NONE_MATCH": etag},
+            )
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report(f"Anonymous pages at concurrency {CONCURRENCY}", run())
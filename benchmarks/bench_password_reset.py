@@ -0,0 +1,49 @@
+"""
+Compare password reset latency when email is sent inline through a slow
+SES stand-in and when it is queued for the send_queued_email command.
+"""
+
+from benchmarks.harness import benchmark_database, measure, report
+
+
+SES_LATENCY = 0.2
+
+
+def run(iterations=20):
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from accounts.mail import FakeSESBackend
+    from accounts.models import CustomUser
+
+    user = CustomUser.objects.create(
+        username="benchuser", email="benchuser@email.com"
+    )
+    user.set_password("wibble1234")
+    user.save()
+
+    FakeSESBackend.latency = SES_LATENCY
+    backends = {
+        "inline": "accounts.mail.FakeSESBackend",
+        "queued": "accounts.mail.QueuedEmailBackend",
+    }
+    results = {}
+    for name, backend in backends.items():
+        with override_settings(
+            EMAIL_BACKEND=backend,
+            QUEUED_EMAIL_BACKEND="accounts.mail.FakeSESBackend",
+        ):
+            client = Client()
+            path = reverse("password_reset")
+            results[f"{name}: password_reset"] = measure(
+                lambda: client.post(path, {"email": user.email}), iterations
+            )
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report(
+            f"Password reset with {SES_LATENCY * 1000:.0f} ms SES latency",
+            run(),
+        )
@@ -0,0 +1,106 @@
+"""
+Fill django_session with tens of millions of rows, most of them expired,
+and compare clearsessions, which deletes them in one statement, with the
+batched purge_sessions command. For each, report the total time and the
+longest single delete, which is how long other writers can be held up.
+
+    python -m benchmarks.bench_purge_sessions 20000000
+"""
+
+import sys
+import time
+
+from benchmarks.harness import benchmark_database
+
+
+ROWS = 20000000
+EXPIRED_FRACTION = 0.9
+
+
+def fill_sessions(rows, batch_size=50000):
+    from django.db import connection
+
+    expired = int(rows * EXPIRED_FRACTION)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "INSERT INTO django_session "
+                "SELECT md5(i::text), '', now() + (i - %s) * interval '1 s' "
+                "FROM generate_series(1, %s) AS i",
+                [expired, rows],
+            )
+            cursor.execute("ANALYZE django_session")
+            return
+        sql = (
+            "INSERT INTO django_session (session_key, session_data, "
+            "expire_date) VALUES (%s, '', %s)"
+        )
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        now = timezone.now()
+        for start in range(0, rows, batch_size):
+            cursor.executemany(
+                sql,
+                [
+                    (
+                        f"{i:032x}",
+                        now + timedelta(seconds=i - expired),
+                    )
+                    for i in range(start, min(start + batch_size, rows))
+                ],
+            )
+
+
+def longest_statement(func):
+    """
+    Run func and return (elapsed seconds, longest DELETE in seconds).
+    """
+    from django.db import connection
+
+    longest = 0
+
+    def time_delete(execute, sql, params, many, context):
+        nonlocal longest
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if sql.lstrip().upper().startswith("DELETE"):
+                longest = max(longest, time.perf_counter() - started)
+
+    with connection.execute_wrapper(time_delete):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    return elapsed, longest
+
+
+def run(rows=ROWS):
+    from io import StringIO
+
+    from django.contrib.sessions.models import Session
+    from django.core.management import call_command
+
+    results = {}
+    for name, args in (
+        ("clearsessions", ["clearsessions"]),
+        ("purge_sessions", ["purge_sessions", "--sleep=0"]),
+    ):
+        Session.objects.all().delete()
+        fill_sessions(rows)
+        results[name] = longest_statement(
+            lambda: call_command(*args, stdout=StringIO())
+        )
+    return results
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with benchmark_database():
+        results = run(rows)
+    print(f"Purging {int(rows * EXPIRED_FRACTION)} of {rows} sessions")
+    print(f"  {'command':<20}{'total s':>12}{'longest delete ms':>20}")
+    for name, (elapsed, longest) in results.items():
+        print(f"  {name:<20}{elapsed:>12.2f}{longest * 1000:>20.1f}")
@@ -0,0 +1,46 @@
+"""
+Compare the database session engine with the write-behind cached engine for
+authenticated page views and sign-ins.
+"""
+
+from benchmarks.harness import benchmark_database, measure, report
+
+
+ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "write-behind": "accounts.sessions",
+}
+
+
+def run(iterations=500):
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from accounts.models import CustomUser
+    from accounts.sessions import writer
+
+    user = CustomUser.objects.create(username="benchuser")
+    user.set_password("wibble1234")
+    user.save()
+
+    results = {}
+    for name, engine in ENGINES.items():
+        with override_settings(
+            SESSION_ENGINE=engine, SESSION_WRITE_BEHIND_INTERVAL=3600
+        ):
+            client = Client()
+            client.force_login(user)
+            home = reverse("home")
+            results[f"{name}: home"] = measure(
+                lambda: client.get(home), iterations
+            )
+            results[f"{name}: sign-in"] = measure(
+                lambda: Client().force_login(user), iterations
+            )
+            writer.flush()
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report("Session engines", run())
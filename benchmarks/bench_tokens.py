@@ -0,0 +1,53 @@
+"""
+Compare authenticating a request with an API access token, which needs no
+database access, against loading a database session and its user.
+"""
+
+from benchmarks.harness import benchmark_database, measure, report
+
+
+def run(iterations=2000):
+    from django.contrib.auth import get_user
+    from django.test import Client, RequestFactory
+    from django.urls import reverse
+
+    from accounts.models import CustomUser
+    from accounts.tokens import issue_tokens, verify_access_token
+
+    user = CustomUser.objects.create(username="benchuser")
+    user.set_password("wibble1234")
+    user.save()
+
+    access, _ = issue_tokens(user)
+    client = Client()
+    client.force_login(user)
+    request = RequestFactory().get("/")
+    request.session = client.session
+
+    def session_user():
+        request.session = client.session
+        get_user(request)
+
+    profile = reverse("api_profile")
+    home = reverse("home")
+    results = {
+        "access token": measure(
+            lambda: verify_access_token(access), iterations
+        ),
+        "session and user": measure(session_user, iterations),
+        "api profile: access token": measure(
+            lambda: Client().get(
+                profile, HTTP_AUTHORIZATION=f"Bearer {access}"
+            ),
+            iterations // 4,
+        ),
+        "home page: session": measure(
+            lambda: client.get(home), iterations // 4
+        ),
+    }
+    return results
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        report("Request authentication", run())
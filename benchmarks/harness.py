@@ -0,0 +1,292 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created from the configured
+DATABASES, so they never touch real data. Run them from the project root, for
+example ``python -m benchmarks.bench_sessions``.
+"""
+
+import asyncio
+import io
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlencode
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def setup():
+    """
+    Configure Django and create the test database.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def teardown(old_name):
+    from django.db import connection
+    from django.test.utils import teardown_test_environment
+
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+@contextmanager
+def benchmark_database():
+    old_name = setup()
+    try:
+        yield
+    finally:
+        teardown(old_name)
+
+
+def measure(func, iterations):
+    """
+    Call func repeatedly and return latency percentiles in milliseconds,
+    throughput, and the average number of queries per call, not counting
+    transaction control statements.
+    """
+    from django.db import connection
+
+    latencies = []
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        if not is_transaction_control(sql):
+            queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            call_started = time.perf_counter()
+            func()
+            latencies.append((time.perf_counter() - call_started) * 1000)
+        elapsed = time.perf_counter() - started
+    return summarise(latencies, elapsed, len(queries) / iterations)
+
+
+def is_transaction_control(sql):
+    """
+    Return whether sql only begins, ends or marks a transaction. These are
+    not counted as queries, as they depend on the database backend and on
+    whether the code runs inside a test case's transaction.
+    """
+    return sql.lstrip().split(" ", 1)[0].upper() in (
+        "BEGIN",
+        "COMMIT",
+        "ROLLBACK",
+        "SAVEPOINT",
+        "RELEASE",
+    )
+
+
+def summarise(latencies, elapsed, queries=None):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "per_second": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "queries": None if queries is None else round(queries, 2),
+    }
+
+
+def percentile(sorted_values, percent):
+    index = min(
+        len(sorted_values) - 1,
+        int(round(percent / 100 * (len(sorted_values) - 1))),
+    )
+    return sorted_values[index]
+
+
+def report(title, results):
+    """
+    Print a table of named results returned by measure().
+    """
+    print(title)
+    print(
+        f"  {'case':<32}{'req/s':>10}{'mean ms':>10}"
+        f"{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}"
+    )
+    for name, result in results.items():
+        queries = "-" if result["queries"] is None else result["queries"]
+        print(
+            f"  {name:<32}{result['per_second']:>10}{result['mean_ms']:>10}"
+            f"{result['p50_ms']:>10}{result['p99_ms']:>10}{queries:>10}"
+        )
+
+
+def form_post(data, cookie):
+    """
+    Return the body of a form POST of data, with a CSRF token, and the
+    cookie to send with it.
+    """
+    from django.middleware.csrf import _get_new_csrf_token
+
+    token = _get_new_csrf_token()
+    body = urlencode({**data, "csrfmiddlewaretoken": token}).encode()
+    cookie = f"{cookie}; csrftoken={token}" if cookie else f"csrftoken={token}"
+    return body, cookie
+
+
+def drive_wsgi(
+    path, iterations, concurrency, cookie="", headers=None, data=None
+):
+    """
+    GET path through an in-process WSGI handler from concurrency threads
+    and return latency percentiles and throughput. headers holds any other
+    WSGI environ entries, such as HTTP_IF_NONE_MATCH. With data, a function
+    returning the form fields for the nth request, each request POSTs them
+    instead.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def start_response(status, headers):
+        pass
+
+    def request(n):
+        method, body, request_cookie = "GET", b"", cookie
+        if data is not None:
+            method = "POST"
+            body, request_cookie = form_post(data(n), cookie)
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_COOKIE": request_cookie,
+            "CONTENT_TYPE": "application/x-www-form-urlencoded",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": io.StringIO(),
+            **(headers or {}),
+        }
+        started = time.perf_counter()
+        b"".join(handler(environ, start_response))
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(request, range(iterations)))
+    return summarise(latencies, time.perf_counter() - started)
+
+
+def drive_asgi(path, iterations, concurrency, cookie="", data=None):
+    """
+    GET path through an in-process ASGI handler with at most concurrency
+    requests in flight and return latency percentiles and throughput. data
+    is as for drive_wsgi().
+    """
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def send(message):
+        pass
+
+    async def request(semaphore, n):
+        method, body, request_cookie = "GET", b"", cookie
+        headers = [(b"host", b"testserver")]
+        if data is not None:
+            method = "POST"
+            body, request_cookie = form_post(data(n), cookie)
+            headers.append(
+                (b"content-type", b"application/x-www-form-urlencoded")
+            )
+        if request_cookie:
+            headers.append((b"cookie", request_cookie.encode()))
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": headers,
+            "server": ("testserver", 80),
+            "scheme": "http",
+        }
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            return (time.perf_counter() - started) * 1000
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(request(semaphore, n) for n in range(iterations))
+        )
+
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    return summarise(latencies, time.perf_counter() - started)
+
+
+def baseline_path(name):
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(name, results):
+    BASELINE_DIR.mkdir(exist_ok=True)
+    with open(baseline_path(name), "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_baseline(name, results, tolerance):
+    """
+    Return a message for each case in results that regressed against the
+    saved baseline: p99 latency or throughput worse by more than tolerance
+    (a fraction), or more queries per request.
+    """
+    with open(baseline_path(name)) as f:
+        baseline = json.load(f)
+    regressions = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        base = baseline[case]
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{case}: p99 {result['p99_ms']} ms, "
+                f"baseline {base['p99_ms']} ms"
+            )
+        if result["per_second"] < base["per_second"] / (1 + tolerance):
+            regressions.append(
+                f"{case}: {result['per_second']} req/s, "
+                f"baseline {base['per_second']} req/s"
+            )
+        if (
+            result["queries"] is not None
+            and base["queries"] is not None
+            and result["queries"] > base["queries"]
+        ):
+            regressions.append(
+                f"{case}: {result['queries']} queries, "
+                f"baseline {base['queries']}"
+            )
+    return regressions
@@ -0,0 +1,57 @@
+"""
+Gunicorn settings, used with ``gunicorn -c config/gunicorn.py config.wsgi``.
+
+With GUNICORN_PRELOAD the master process imports and warms up the
+application once and forks every worker from it, so workers start serving
+straight away and share the master's memory pages until they write to them.
+Whatever the master opened that cannot be shared, such as database
+connections, is closed before the first fork.
+"""
+
+import gc
+import multiprocessing
+
+from environs import Env
+
+
+env = Env()
+env.read_env()
+
+bind = env.str("GUNICORN_BIND", default="127.0.0.1:8000")
+workers = env.int(
+    "GUNICORN_WORKERS", default=multiprocessing.cpu_count() * 2 + 1
+)
+threads = env.int("GUNICORN_THREADS", default=1)
+preload_app = env.bool("GUNICORN_PRELOAD", default=False)
+
+
+def on_starting(server):
+    # A sync worker handles one request at a time, so a hashing pool can
+    # never fill up there and only adds a thread hop to every hash.
+    if (
+        env.int("PASSWORD_HASHING_POOL_SIZE", default=0)
+        and server.cfg.worker_class_str == "sync"
+    ):
+        raise RuntimeError(
+            "PASSWORD_HASHING_POOL_SIZE needs concurrent workers: set "
+            "GUNICORN_THREADS above 1 or use an async worker class."
+        )
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    # Import every view and compile the base template in the master rather
+    # than on each worker's first request. The email backend, and boto3
+    # with it, is still only imported when mail is first sent.
+    get_resolver().url_patterns
+    get_template("base.html")
+    connections.close_all()
+    # Move everything allocated so far out of the collector's reach, so that
+    # collections in the workers do not write to, and so copy, the pages
+    # they share with the master.
+    gc.freeze()
@@ -51,16 +51,22 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "accounts.middleware.MetricsMiddleware",
+    "accounts.middleware.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "accounts.middleware.ThrottleMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # local
+    "accounts.middleware.HashingPoolMiddleware",
 ]
 
-ROOT_URLCONF = "config.urls"
+# config/asgi.py switches this to config.asgi_urls to serve async views.
+ROOT_URLCONF = env.str("ROOT_URLCONF", default="config.urls")
 
 TEMPLATES = [
     {
@@ -73,6 +79,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "accounts.context_processors.last_login",
             ],
         },
     },
@@ -84,21 +91,200 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# With DB_POOL_SIZE above 0, each process shares a pool of that many
+# connections between its threads (see accounts.db); keep DB_CONN_MAX_AGE at
+# 0 so connections go back to the pool after each request. Otherwise
+# DB_CONN_MAX_AGE keeps each thread's connection open for that many seconds.
+# Reused connections idle for DB_HEALTH_CHECK_IDLE seconds are checked before
+# use.
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", default=0)
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", default=10)
+DB_HEALTH_CHECK_IDLE = env.float("DB_HEALTH_CHECK_IDLE", default=1.0)
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "accounts.postgresql_pool"
+        if DB_POOL_SIZE
+        else "django.db.backends.postgresql_psycopg2",
         "NAME": env.str("DB_NAME"),
         "USER": env.str("DB_USER"),
         "PASSWORD": env.str("DB_PASSWORD"),
-        "HOST": "localhost",
-        "PORT": "",
+        "HOST": env.str("DB_HOST", default="localhost"),
+        "PORT": env.str("DB_PORT", default=""),
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=0),
     }
 }
 
+# DB_REPLICA_HOSTS lists read replicas of the default database as host or
+# host:port. Reads go to a random replica, except for DB_REPLICA_PIN_SECONDS
+# after a client's request has written, when they stay on the primary (see
+# accounts.routers).
+for number, replica in enumerate(
+    env.list("DB_REPLICA_HOSTS", default=[]), start=1
+):
+    host, _, port = replica.partition(":")
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = (
+    ["accounts.routers.ReplicaRouter"] if DATABASE_REPLICAS else []
+)
+DB_REPLICA_PIN_SECONDS = env.int("DB_REPLICA_PIN_SECONDS", default=5)
+
+
+# Cache and sessions
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# https://docs.djangoproject.com/en/3.1/topics/http/sessions/
+
+CACHES = {"default": env.dj_cache_url("CACHE_URL", default="locmem://")}
+
+# With PAGE_CACHE_SECONDS above 0, the home, sign-in, register and password
+# reset pages are cached for that long for visitors without a session, with
+# their CSRF tokens filled in per request (see accounts.page_cache).
+PAGE_CACHE_SECONDS = env.int("PAGE_CACHE_SECONDS", default=0)
+
+# With USER_CACHE_SECONDS above 0, the signed-in user is kept in the cache for
+# up to that long instead of being loaded on every request, and dropped from
+# it whenever the user is saved (see accounts.user_cache).
+USER_CACHE_SECONDS = env.int("USER_CACHE_SECONDS", default=0)
+
+# With AVAILABILITY_FILTER_REFRESH_SECONDS above 0, the registration page's
+# availability checks are answered from an in-memory Bloom filter where
+# possible. Each process fetches users added elsewhere that often, and
+# rebuilds its filter every AVAILABILITY_FILTER_REBUILD_SECONDS (see
+# accounts.availability).
+AVAILABILITY_FILTER_REFRESH_SECONDS = env.float(
+    "AVAILABILITY_FILTER_REFRESH_SECONDS", default=0
+)
+AVAILABILITY_FILTER_REBUILD_SECONDS = env.float(
+    "AVAILABILITY_FILTER_REBUILD_SECONDS", default=3600
+)
+
+# Lifetimes of the JSON API's tokens (see accounts.tokens). Access tokens are
+# checked without the database and cannot be revoked, so keep them short.
+API_ACCESS_TOKEN_SECONDS = env.int("API_ACCESS_TOKEN_SECONDS", default=300)
+API_REFRESH_TOKEN_SECONDS = env.int(
+    "API_REFRESH_TOKEN_SECONDS", default=60 * 60 * 24 * 30
+)
+
+# Set to "accounts.sessions" to serve sessions from the cache and write them
+# to the database in the background every SESSION_WRITE_BEHIND_INTERVAL
+# seconds (0 writes through synchronously). Writing behind needs CACHE_URL to
+# point at a cache shared by every worker.
+SESSION_ENGINE = env.str(
+    "SESSION_ENGINE", default="django.contrib.sessions.backends.db"
+)
+SESSION_WRITE_BEHIND_INTERVAL = env.float(
+    "SESSION_WRITE_BEHIND_INTERVAL", default=1.0
+)
+
+# Above 0, sign-ins buffer last_login and their login event in memory, and
+# they are written to the database in one bulk update and one bulk insert
+# every LAST_LOGIN_WRITE_BEHIND_INTERVAL seconds. 0 writes them at each
+# sign-in, as Django does.
+LAST_LOGIN_WRITE_BEHIND_INTERVAL = env.float(
+    "LAST_LOGIN_WRITE_BEHIND_INTERVAL", default=0
+)
+# purge_sessions deletes login events older than this. 0 keeps them.
+LOGIN_EVENT_RETENTION_DAYS = env.int("LOGIN_EVENT_RETENTION_DAYS", default=90)
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.1/topics/auth/passwords/
+
+# With a pool size above 0, PBKDF2 runs in a bounded pool of threads and
+# requests that would queue beyond PASSWORD_HASHING_QUEUE_DEPTH (after waiting
+# up to PASSWORD_HASHING_QUEUE_TIMEOUT seconds) get a 503. This needs workers
+# that serve requests concurrently: GUNICORN_THREADS above 1, or ASGI.
+PASSWORD_HASHING_POOL_SIZE = env.int("PASSWORD_HASHING_POOL_SIZE", default=0)
+PASSWORD_HASHING_QUEUE_DEPTH = env.int(
+    "PASSWORD_HASHING_QUEUE_DEPTH", default=8
+)
+PASSWORD_HASHING_QUEUE_TIMEOUT = env.float(
+    "PASSWORD_HASHING_QUEUE_TIMEOUT", default=0
+)
+
+# Work factors measured for this host by `python manage.py calibrate_hashers`.
+# 0 keeps Django's default.
+PASSWORD_PBKDF2_ITERATIONS = env.int("PASSWORD_PBKDF2_ITERATIONS", default=0)
+PASSWORD_ARGON2_TIME_COST = env.int("PASSWORD_ARGON2_TIME_COST", default=0)
+PASSWORD_ARGON2_MEMORY_COST = env.int("PASSWORD_ARGON2_MEMORY_COST", default=0)
+PASSWORD_BCRYPT_ROUNDS = env.int("PASSWORD_BCRYPT_ROUNDS", default=0)
+
+# While a PBKDF2 hash would take longer than PASSWORD_HASHING_MAX_MS, new
+# hashes use fewer iterations, down to PASSWORD_PBKDF2_MIN_ITERATIONS, and are
+# upgraded at a later sign-in. 0 switches this off.
+PASSWORD_HASHING_MAX_MS = env.float("PASSWORD_HASHING_MAX_MS", default=0)
+PASSWORD_PBKDF2_MIN_ITERATIONS = env.int(
+    "PASSWORD_PBKDF2_MIN_ITERATIONS", default=100000
+)
+
+PASSWORD_HASHERS = [
+    "accounts.hashers.PooledPBKDF2PasswordHasher"
+    if PASSWORD_HASHING_POOL_SIZE
+    else "accounts.hashers.CalibratedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "accounts.hashers.CalibratedArgon2PasswordHasher",
+    "accounts.hashers.CalibratedBCryptSHA256PasswordHasher",
+]
+
+
+# Metrics
+# MetricsMiddleware times hashing, session I/O, SQL and template rendering for
+# METRICS_SAMPLE_RATE of requests and serves histograms per URL name in the
+# Prometheus text format at /accounts/metrics/ to requests with
+# "Authorization: Bearer METRICS_TOKEN". METRICS_SERVER_TIMING also adds a
+# Server-Timing header to the sampled responses. It tells any client how its
+# request was handled, e.g. whether a password reset found the email, so
+# keep it off in production.
+
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=False)
+METRICS_SAMPLE_RATE = env.float("METRICS_SAMPLE_RATE", default=1.0)
+METRICS_SERVER_TIMING = env.bool("METRICS_SERVER_TIMING", default=False)
+# Seconds between publishing each worker's histograms to CACHES.
+METRICS_PUBLISH_INTERVAL = env.float("METRICS_PUBLISH_INTERVAL", default=10)
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+
+
+# Throttling
+# Token buckets for POSTs to the named URLs, and GETs to THROTTLE_GET_URLS,
+# keyed by client IP ("ip") or by a field of the query string, form or JSON
+# body. Each scope maps to (burst, tokens refilled per second); a URL name
+# mapped to another name shares its buckets.
+# THROTTLE_STORE is "memory" (per worker, at most THROTTLE_MAX_KEYS buckets)
+# or "cache" (shared through CACHES).
+
+THROTTLE_ENABLED = env.bool("THROTTLE_ENABLED", default=False)
+THROTTLE_STORE = env.str("THROTTLE_STORE", default="memory")
+THROTTLE_MAX_KEYS = env.int("THROTTLE_MAX_KEYS", default=200000)
+# Use HTTP_X_REAL_IP when Nginx sets it in front of Gunicorn.
+THROTTLE_IP_HEADER = env.str("THROTTLE_IP_HEADER", default="REMOTE_ADDR")
+THROTTLE_RATES = {
+    "login": {"ip": (30, 0.5), "username": (10, 1 / 60)},
+    "password_reset": {"ip": (10, 1 / 60), "email": (3, 1 / 600)},
+    # Sign-ins through the JSON API share the login page's buckets.
+    "api_login": "login",
+    # Answers whether a username or email is in use, so limit how fast one
+    # client can ask.
+    "user_availability": {"ip": (20, 0.1)},
+}
+# URL names whose GETs are throttled as well.
+THROTTLE_GET_URLS = env.list(
+    "THROTTLE_GET_URLS", default=["user_availability"]
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
+# A breached password index built by build_breached_password_index. When set,
+# passwords are checked against it instead of Django's common password list.
+BREACHED_PASSWORD_INDEX = env.str("BREACHED_PASSWORD_INDEX", default="")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -107,7 +293,9 @@ AUTH_PASSWORD_VALIDATORS = [
         "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
     },
     {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+        "NAME": "accounts.password_validation.BreachedPasswordValidator"
+        if BREACHED_PASSWORD_INDEX
+        else "django.contrib.auth.password_validation.CommonPasswordValidator",
     },
     {
         "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
@@ -135,6 +323,19 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "static/")
 
+# SELF_HOSTED_STATIC serves Bootstrap from STATIC_ROOT instead of jsDelivr,
+# after `python manage.py vendor_static` has fetched it into accounts/static.
+# collectstatic then stores every file under a content-hashed name with gzip
+# and, if brotli is installed, brotli compressed copies beside it.
+SELF_HOSTED_STATIC = env.bool("SELF_HOSTED_STATIC", default=False)
+if SELF_HOSTED_STATIC:
+    STATICFILES_STORAGE = "accounts.storage.CompressedManifestStaticFilesStorage"
+
+# SERVE_STATIC has config/wsgi.py serve STATIC_ROOT itself, with far-future
+# cache headers for hashed names and the precompressed copies, for
+# deployments without Nginx in front.
+SERVE_STATIC = env.bool("SERVE_STATIC", default=False)
+
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 
 AUTH_USER_MODEL = "accounts.CustomUser"
@@ -142,7 +343,19 @@ AUTH_USER_MODEL = "accounts.CustomUser"
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
 
-EMAIL_BACKEND = "django_ses.SESBackend"
+# Set EMAIL_BACKEND to accounts.mail.QueuedEmailBackend to queue outgoing
+# email in the database and deliver it through QUEUED_EMAIL_BACKEND with the
+# send_queued_email management command.
+EMAIL_BACKEND = env.str("EMAIL_BACKEND", default="django_ses.SESBackend")
+QUEUED_EMAIL_BACKEND = env.str(
+    "QUEUED_EMAIL_BACKEND", default="django_ses.SESBackend"
+)
+QUEUED_EMAIL_MAX_ATTEMPTS = env.int("QUEUED_EMAIL_MAX_ATTEMPTS", default=5)
+QUEUED_EMAIL_RETRY_DELAY = env.int("QUEUED_EMAIL_RETRY_DELAY", default=30)
+QUEUED_EMAIL_MAX_RETRY_DELAY = env.int(
+    "QUEUED_EMAIL_MAX_RETRY_DELAY", default=3600
+)
+QUEUED_EMAIL_LEASE = env.int("QUEUED_EMAIL_LEASE", default=300)
 DEFAULT_FROM_EMAIL = env.str("DEFAULT_FROM_EMAIL")
 
 AWS_ACCESS_KEY_ID = env.str("AWS_ACCESS_KEY_ID")
@@ -2,10 +2,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic.base import TemplateView
 
+from accounts.page_cache import cache_anonymous_page
+
 
 urlpatterns = [
     path("fish1234/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
     path("accounts/", include("django.contrib.auth.urls")),
-    path("", TemplateView.as_view(template_name="home.html"), name="home"),
+    path(
+        "",
+        cache_anonymous_page(TemplateView.as_view(template_name="home.html")),
+        name="home",
+    ),
 ]
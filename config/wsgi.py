@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.SERVE_STATIC:
+    from accounts.staticfiles import StaticFilesApplication
+
+    application = StaticFilesApplication(
+        application, settings.STATIC_ROOT, settings.STATIC_URL
+    )